@@ -0,0 +1,133 @@
+"""대역 LLM 서버를 띄워 두고 /call 을 HTTP로 끝까지 호출하는 벤치마크.
+
+provider(ollama/chatgpt/solar/hyperclova) x 모드(일반/stream) 별로
+처리량, p50/p95/p99, 오류 수, tracemalloc 기준 메모리 할당을 출력한다.
+
+mcp_server 디렉토리에서 실행:
+    python -m benchmarks.bench_call --requests 200 --concurrency 20
+    python -m benchmarks.bench_call --latency lognormal:-2,0.6 --error-rate 0.05 --stream --allocations
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+import tracemalloc
+
+from benchmarks.mock_llm import free_port, provider_env, settings, start_server, stop_server
+
+MOCK_PORT = free_port()
+APP_PORT = free_port()
+# config가 import 되기 전에 모든 provider를 대역 서버로 돌리고, 캐시는 끈다 (매 요청이 upstream까지 가도록)
+os.environ.update(provider_env(f"http://127.0.0.1:{MOCK_PORT}"))
+os.environ.setdefault("CACHE_ENABLED", "false")
+os.environ.setdefault("LOG_LEVEL", "warn")
+os.environ.setdefault("PROBLEM_STORE_PATH", ":memory:")
+
+import httpx  # noqa: E402
+import main  # noqa: E402
+
+PROVIDERS = ("ollama", "chatgpt", "solar", "hyperclova")
+
+
+def _body(llm: str, i: int, stream: bool):
+    # 프롬프트를 매번 다르게 해서 single-flight로 합쳐지지 않게 한다
+    return {
+        "tool": "generate_problem",
+        "stream": stream,
+        "input": {"prompt": f"조건부확률 문제 #{i}", "llm": llm},
+    }
+
+
+async def _one(client: httpx.AsyncClient, body) -> bool:
+    if body["stream"]:
+        ok = False
+        async with client.stream("POST", "/call", json=body) as res:
+            async for line in res.aiter_lines():
+                if line.startswith("event: result"):
+                    ok = True
+                elif line.startswith("event: error"):
+                    ok = False
+        return ok and res.status_code == 200
+    res = await client.post("/call", json=body)
+    return res.status_code == 200 and res.json().get("output") is not None
+
+
+async def run_scenario(client, llm: str, stream: bool, requests: int, concurrency: int, allocations: bool, quiet: bool = False):
+    samples = []
+    errors = 0
+    sem = asyncio.Semaphore(concurrency)
+
+    async def worker(i: int):
+        nonlocal errors
+        async with sem:
+            start = time.perf_counter()
+            try:
+                ok = await _one(client, _body(llm, i, stream))
+            except httpx.HTTPError:
+                ok = False
+            samples.append((time.perf_counter() - start) * 1000)
+            if not ok:
+                errors += 1
+
+    if allocations:
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(requests)))
+    elapsed = time.perf_counter() - start
+
+    if quiet:
+        return
+    q = statistics.quantiles(samples, n=100)
+    line = (
+        f"{llm:<11} {'stream' if stream else 'call':<6} "
+        f"{requests / elapsed:8.1f} req/s  p50={q[49]:7.2f}ms p95={q[94]:7.2f}ms p99={q[98]:7.2f}ms  errors={errors}"
+    )
+    if allocations:
+        after = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        # 클라이언트, 앱, 대역 서버가 같은 프로세스라 셋의 할당이 함께 잡힌다
+        allocated = sum(s.size_diff for s in after.compare_to(before, "filename") if s.size_diff > 0)
+        count = sum(s.count_diff for s in after.compare_to(before, "filename") if s.count_diff > 0)
+        line += f"  alloc/req={allocated / requests / 1024:.1f}KiB blocks/req={count / requests:.0f} peak={peak / 1024 / 1024:.1f}MiB"
+    print(line)
+
+
+async def main_async(args):
+    settings.latency = args.latency
+    settings.error_rate = args.error_rate
+    settings.error_status = args.error_status
+    settings.token_delay = args.token_delay
+
+    mock_server, mock_task = await start_server(MOCK_PORT)
+    app_server, app_task = await start_server(APP_PORT, main.app)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{APP_PORT}", limits=limits, timeout=60) as client:
+            modes = (False, True) if args.stream else (False,)
+            for llm in args.providers:
+                # 워밍업 (커넥션, provider lazy import)
+                await run_scenario(client, llm, False, min(args.concurrency, args.requests), args.concurrency, False, quiet=True)
+            print(f"requests={args.requests} concurrency={args.concurrency} latency={args.latency} error_rate={args.error_rate}")
+            for llm in args.providers:
+                for stream in modes:
+                    await run_scenario(client, llm, stream, args.requests, args.concurrency, args.allocations)
+    finally:
+        await stop_server(app_server, app_task)
+        await stop_server(mock_server, mock_task)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--providers", nargs="+", default=list(PROVIDERS), choices=PROVIDERS)
+    parser.add_argument("--stream", action="store_true", help="stream=True 모드도 측정")
+    parser.add_argument("--latency", default="fixed:0.05", help="fixed:초 | uniform:a,b | lognormal:mu,sigma")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--token-delay", type=float, default=0.0)
+    parser.add_argument("--allocations", action="store_true", help="tracemalloc으로 할당량 측정 (느려짐)")
+    asyncio.run(main_async(parser.parse_args()))
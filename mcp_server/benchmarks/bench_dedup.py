@@ -0,0 +1,67 @@
+"""MinHash/LSH 중복 인덱스: 서명 계산, 대량 삽입, 조회 지연시간.
+
+비슷한 문제 쌍 / 다른 문제 쌍이 제대로 갈리는지 확인한 뒤
+무작위 서명 --items개를 넣고 조회 p50/p99를 잰다.
+
+mcp_server 디렉토리에서 실행:
+    python -m benchmarks.bench_dedup --items 1000000
+"""
+import argparse
+import asyncio
+import time
+
+import numpy as np
+
+from utils.dedup import DuplicateIndex
+
+ORIGINAL = "조건부확률\n주사위를 던져 짝수가 나왔을 때 6일 확률은?\n1) 1/6\n2) 1/3\n3) 1/2\n4) 2/3"
+SIMILAR = "주사위 조건부 확률\n주사위를 던져 짝수가 나왔을 때 6이 나올 확률은?\n1) 1/6\n2) 1/3\n3) 1/2\n4) 2/3"
+DIFFERENT = "이항분포\n동전을 10번 던질 때 앞면이 정확히 3번 나올 확률을 구하시오."
+CATEGORY = "수학/확률과통계"
+
+
+def percentile(values, p: float) -> float:
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+async def main(items: int, queries: int, categories: int) -> None:
+    index = DuplicateIndex(max_items=max(items, 1))
+    index.add(CATEGORY, index.signature(ORIGINAL), "original")
+    print("similar  :", index.query(CATEGORY, index.signature(SIMILAR)))
+    print("different:", index.query(CATEGORY, index.signature(DIFFERENT)))
+    print("other cat:", index.query("국어", index.signature(SIMILAR)))
+
+    start = time.perf_counter()
+    for _ in range(1000):
+        index.signature(SIMILAR)
+    print(f"signature: {(time.perf_counter() - start) * 1000:.1f}us")
+
+    rng = np.random.default_rng(0)
+    start = time.perf_counter()
+    for i in range(items):
+        index.add(f"cat{i % categories}", rng.integers(0, 2**32, index.num_perm, dtype=np.uint64).astype(np.uint32), i)
+        # 병합 스레드가 끝나면 결과를 반영할 수 있게 가끔 양보
+        if index._merging is not None and i % 8192 == 0:
+            await asyncio.sleep(0)
+    while index._merging is not None:
+        await asyncio.sleep(0.01)
+    elapsed = time.perf_counter() - start
+    print(f"insert: {items} items {elapsed:.1f}s ({elapsed / max(items, 1) * 1e6:.1f}us/item) {index.stats()}")
+
+    signatures = [index.signature(SIMILAR if i % 2 else DIFFERENT) for i in range(queries)]
+    latencies = []
+    for sig in signatures:
+        start = time.perf_counter()
+        index.query(CATEGORY, sig)
+        latencies.append((time.perf_counter() - start) * 1e6)
+    latencies.sort()
+    print(f"query: p50={percentile(latencies, 0.5):.1f}us p99={percentile(latencies, 0.99):.1f}us max={latencies[-1]:.1f}us")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--categories", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.items, args.queries, args.categories))
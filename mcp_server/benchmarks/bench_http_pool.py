@@ -0,0 +1,68 @@
+"""호출마다 AsyncClient를 새로 만드는 방식과 공유 커넥션 풀 방식의 지연시간 비교.
+
+mcp_server 디렉토리에서 실행:
+    python -m benchmarks.bench_http_pool --calls 500
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+from benchmarks.mock_llm import free_port, start_server, stop_server
+
+PORT = free_port()
+# config가 import 되기 전에 Ollama 주소를 대역 서버로 돌려둔다
+os.environ["OLLAMA_URL"] = f"http://127.0.0.1:{PORT}/api/generate"
+
+import httpx  # noqa: E402
+from config import OLLAMA_URL, OLLAMA_MODEL  # noqa: E402
+from llm import ollama  # noqa: E402
+from llm.http_client import open_clients, close_clients  # noqa: E402
+
+
+# 기존 구현: 호출마다 새 클라이언트 (TCP 핸드셰이크 매번 발생)
+async def generate_per_call_client(prompt: str) -> str:
+    data = {"model": OLLAMA_MODEL, "prompt": prompt, "stream": False}
+    async with httpx.AsyncClient() as client:
+        res = await client.post(OLLAMA_URL, json=data)
+        res.raise_for_status()
+        return res.json()["response"]
+
+
+async def measure(fn, calls: int):
+    samples = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        await fn("벤치마크 프롬프트")
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def summarize(name: str, samples):
+    q = statistics.quantiles(samples, n=100)
+    print(f"{name:<12} mean={statistics.fmean(samples):.3f}ms p50={q[49]:.3f}ms p95={q[94]:.3f}ms")
+    return statistics.fmean(samples)
+
+
+async def main(calls: int):
+    server, task = await start_server(PORT)
+    await open_clients()
+    try:
+        # 워밍업
+        await measure(generate_per_call_client, 20)
+        await measure(ollama.generate, 20)
+
+        per_call = summarize("per-call", await measure(generate_per_call_client, calls))
+        pooled = summarize("pooled", await measure(ollama.generate, calls))
+        print(f"saved per call: {per_call - pooled:.3f}ms ({(1 - pooled / per_call) * 100:.1f}%)")
+    finally:
+        await close_clients()
+        await stop_server(server, task)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(main(args.calls))
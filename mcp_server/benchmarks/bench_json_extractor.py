@@ -0,0 +1,68 @@
+"""기존 find/rfind 추출기와 단일 패스 스트리밍 추출기 비교.
+
+mcp_server 디렉토리에서 실행:
+    python -m benchmarks.bench_json_extractor --repeat 200
+"""
+import argparse
+import json
+import time
+
+from benchmarks.mock_llm import SAMPLE_PROBLEM
+from utils.json_extractor import JsonStreamExtractor, extract_first_json
+
+
+# 기존 구현 (첫 '{' ~ 마지막 '}')
+def legacy_extract(text: str):
+    try:
+        start, end = text.find("{"), text.rfind("}") + 1
+        if start != -1 and end > start:
+            return json.loads(text[start:end])
+        return json.loads(text)
+    except json.JSONDecodeError:
+        return None
+
+
+def build_cases():
+    problem = json.dumps(SAMPLE_PROBLEM, ensure_ascii=False)
+    large = dict(SAMPLE_PROBLEM, content="긴 지문 { 중괄호 } 포함 \\\" 따옴표 " * 5000)
+    return {
+        "clean": problem,
+        "fenced": f"다음은 요청하신 문제입니다.\n```json\n{problem}\n```\n필요하면 {{수정}} 요청하세요.",
+        "two_objects": f"{problem}\n\n추가 예시:\n{problem}",
+        "large": "응답:\n" + json.dumps(large, ensure_ascii=False) + "\n끝.",
+        "large_prose": ("설명 {변수} 를 채워 주세요. " * 2000) + problem,
+    }
+
+
+def bench(fn, text: str, repeat: int):
+    ok = fn(text) is not None
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(text)
+    return ok, (time.perf_counter() - start) / repeat * 1e6
+
+
+# 64자 청크로 나누어 feed (스트리밍 경로)
+def chunked_extract(text: str):
+    extractor = JsonStreamExtractor()
+    for i in range(0, len(text), 64):
+        if extractor.feed(text[i:i + 64]) is not None:
+            break
+    return extractor.result
+
+
+def main(repeat: int):
+    print(f"{'case':<12} {'size':>8} {'legacy':>18} {'single-pass':>18} {'chunked(64)':>18}")
+    for name, text in build_cases().items():
+        cols = []
+        for fn in (legacy_extract, extract_first_json, chunked_extract):
+            ok, us = bench(fn, text, repeat)
+            cols.append(f"{us:9.1f}us {'ok' if ok else 'FAIL':>4}")
+        print(f"{name:<12} {len(text):>8} " + " ".join(f"{c:>18}" for c in cols))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    main(args.repeat)
@@ -0,0 +1,78 @@
+"""/call 처리 경로의 로그 출력이 이벤트 루프를 얼마나 막는지 비교 (print / 구조화 로거 / 끔).
+
+mcp_server 디렉토리에서 실행:
+    python -m benchmarks.bench_logging --workers 50 --requests 200
+"""
+import argparse
+import asyncio
+import contextlib
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from benchmarks.mock_llm import SAMPLE_PROBLEM
+from logger import StructuredLogger
+
+# 긴 한국어 문제 본문
+PAYLOAD = dict(SAMPLE_PROBLEM, content=SAMPLE_PROBLEM["content"] * 200)
+
+
+async def probe_lag(samples, stop: asyncio.Event, interval: float = 0.001):
+    # 1ms 마다 깨어나도록 예약하고 실제로 늦어진 시간을 기록
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append((time.perf_counter() - start - interval) * 1000)
+
+
+async def worker(mode: str, requests: int, logger: StructuredLogger):
+    for _ in range(requests):
+        body = {"tool": "generate_problem", "input": {"prompt": "조건부확률 문제", "llm": "ollama"}}
+        if mode == "print":
+            print(f"[DEBUG] Request body: {body}")
+            print(f"[DEBUG] Generated problem result: {PAYLOAD}")
+        elif mode.startswith("structured"):
+            logger.debug("/call request", input=body)
+            logger.debug("/call result", output=PAYLOAD)
+        await asyncio.sleep(0)
+
+
+async def run(mode: str, workers: int, requests: int, sink):
+    # structured-sampled: 기본 설정처럼 debug 로그의 10%만 기록
+    sample_rate = 0.1 if mode == "structured-sampled" else 1.0
+    logger = StructuredLogger("debug", sample_rate=sample_rate, max_field_chars=500, stream=sink)
+    samples = []
+    stop = asyncio.Event()
+    prober = asyncio.create_task(probe_lag(samples, stop))
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(sink):
+        await asyncio.gather(*(worker(mode, requests, logger) for _ in range(workers)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await prober
+    logger.close()
+
+    # inclusive: 관측값 범위 밖으로 외삽하지 않는다 (p99 <= max)
+    q = statistics.quantiles(samples, n=100, method="inclusive") if len(samples) > 1 else [0.0] * 99
+    print(
+        f"{mode:<18} handle={elapsed * 1000:8.1f}ms  lag p50={q[49]:.3f}ms p99={q[98]:.3f}ms "
+        f"max={max(samples, default=0.0):.3f}ms written={logger.written} dropped={logger.dropped}",
+        file=sys.stderr,
+    )
+
+
+def main(workers: int, requests: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ("off", "print", "structured", "structured-sampled"):
+            with open(os.path.join(tmp, f"{mode}.log"), "w", buffering=1, encoding="utf-8") as sink:
+                asyncio.run(run(mode, workers, requests, sink))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+    main(args.workers, args.requests)
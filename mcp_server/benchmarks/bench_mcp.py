@@ -0,0 +1,120 @@
+"""MCP 네이티브 (FastMCP streamable HTTP) 와 /call 비교 벤치마크.
+
+대역 LLM 서버와 앱을 띄워 두고 같은 요청을 세 가지 경로로 보낸다.
+- call: httpx로 /call (기존 JSON 변환 경로)
+- mcp-pipelined: MCP 세션 하나에 tools/call 을 --concurrency 개씩 동시에
+- mcp-sessions: --sessions 개의 MCP 세션에 나눠서
+
+mcp_server 디렉토리에서 실행:
+    python -m benchmarks.bench_mcp --requests 500 --concurrency 20 --sessions 10
+    python -m benchmarks.bench_mcp --latency fixed:0.2 --concurrency 100
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+from benchmarks.mock_llm import free_port, provider_env, settings, start_server, stop_server
+
+MOCK_PORT = free_port()
+APP_PORT = free_port()
+os.environ.update(provider_env(f"http://127.0.0.1:{MOCK_PORT}"))
+os.environ.setdefault("CACHE_ENABLED", "false")
+os.environ.setdefault("LOG_LEVEL", "warn")
+os.environ.setdefault("PROBLEM_STORE_PATH", ":memory:")
+os.environ.setdefault("OLLAMA_WARMUP", "false")
+os.environ.setdefault("MCP_TRANSPORT", "streamable-http")
+
+import httpx  # noqa: E402
+from fastmcp import Client  # noqa: E402
+import main  # noqa: E402
+from config import MCP_PATH  # noqa: E402
+
+
+def _input(llm: str, i: int):
+    # 프롬프트를 매번 다르게 해서 single-flight로 합쳐지지 않게 한다
+    return {"prompt": f"조건부확률 문제 #{i}", "llm": llm}
+
+
+async def _measure(name: str, senders, requests: int, concurrency: int) -> None:
+    """senders[k % len(senders)] 로 i번째 요청을 보낸다."""
+    samples = []
+    errors = 0
+    sem = asyncio.Semaphore(concurrency)
+
+    async def worker(i: int):
+        nonlocal errors
+        async with sem:
+            start = time.perf_counter()
+            try:
+                ok = await senders[i % len(senders)](i)
+            except Exception:
+                ok = False
+            samples.append((time.perf_counter() - start) * 1000)
+            if not ok:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(requests)))
+    elapsed = time.perf_counter() - start
+    if name is None:
+        return
+    q = statistics.quantiles(samples, n=100)
+    print(
+        f"{name:<15} {requests / elapsed:8.1f} req/s  "
+        f"p50={q[49]:7.2f}ms p95={q[94]:7.2f}ms p99={q[98]:7.2f}ms  errors={errors}"
+    )
+
+
+async def main_async(args):
+    settings.latency = args.latency
+    mock_server, mock_task = await start_server(MOCK_PORT)
+    app_server, app_task = await start_server(APP_PORT, main.app)
+    base = f"http://127.0.0.1:{APP_PORT}"
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    try:
+        async with httpx.AsyncClient(base_url=base, limits=limits, timeout=60) as http:
+            async def call(i: int) -> bool:
+                body = {"tool": "generate_problem", "input": _input(args.llm, i)}
+                res = await http.post("/call", json=body)
+                return res.status_code == 200 and res.json().get("output") is not None
+
+            clients = [Client(f"{base}{MCP_PATH}/", timeout=60) for _ in range(max(args.sessions, 1))]
+            for client in clients:
+                await client.__aenter__()
+            try:
+                def mcp_sender(client):
+                    async def send(i: int) -> bool:
+                        result = await client.call_tool("generate_problem", {"input": _input(args.llm, i)})
+                        return bool(result)
+
+                    return send
+
+                pipelined = [mcp_sender(clients[0])]
+                sessions = [mcp_sender(client) for client in clients]
+
+                # 워밍업 (커넥션, provider lazy import)
+                for senders in ([call], pipelined, sessions):
+                    await _measure(None, senders, args.concurrency, args.concurrency)
+
+                print(f"requests={args.requests} concurrency={args.concurrency} sessions={len(clients)} latency={args.latency} llm={args.llm}")
+                await _measure("call", [call], args.requests, args.concurrency)
+                await _measure("mcp-pipelined", pipelined, args.requests, args.concurrency)
+                await _measure("mcp-sessions", sessions, args.requests, args.concurrency)
+            finally:
+                for client in clients:
+                    await client.__aexit__(None, None, None)
+    finally:
+        await stop_server(app_server, app_task)
+        await stop_server(mock_server, mock_task)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--sessions", type=int, default=10, help="mcp-sessions 시나리오의 MCP 세션 수")
+    parser.add_argument("--llm", default="solar")
+    parser.add_argument("--latency", default="fixed:0.05", help="fixed:초 | uniform:a,b | lognormal:mu,sigma")
+    asyncio.run(main_async(parser.parse_args()))
@@ -0,0 +1,115 @@
+"""요청 파싱/검증과 응답 직렬화 비용.
+
+1) 요청 하나당: json.loads + dict 접근 (이전 방식) vs pydantic model_validate_json + 입력 검증
+2) 응답 하나당: dict 반환 (jsonable_encoder + JSONResponse, 이전 방식) vs JSONResponse vs ORJSONResponse
+3) 부하: 캐시 적중 /call (upstream 호출 없음)을 동시에 보내 프레임워크 부분만 비교
+
+mcp_server 디렉토리에서 실행:
+    python -m benchmarks.bench_schema --repeat 20000 --requests 2000 --concurrency 50
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+
+from benchmarks.mock_llm import SAMPLE_PROBLEM, free_port, provider_env, start_server, stop_server
+
+MOCK_PORT = free_port()
+APP_PORT = free_port()
+os.environ.update(provider_env(f"http://127.0.0.1:{MOCK_PORT}"))
+# 같은 프롬프트는 캐시에서 바로 응답하도록
+os.environ["CACHE_ENABLED"] = "true"
+os.environ.setdefault("CACHE_SQLITE_PATH", "")
+os.environ.setdefault("LOG_LEVEL", "warn")
+os.environ.setdefault("PROBLEM_STORE_PATH", ":memory:")
+os.environ.setdefault("OLLAMA_WARMUP", "false")
+
+import httpx  # noqa: E402
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse, ORJSONResponse  # noqa: E402
+import main  # noqa: E402
+import router  # noqa: E402
+from schemas import ToolCall, validate_input  # noqa: E402
+
+BODY = {"tool": "generate_problem", "input": {"prompt": "조건부확률 문제를 하나 만들어줘", "llm": "solar", "lang": "ko"}}
+OUTPUT = {"output": dict(SAMPLE_PROBLEM, id="01a14f5748e768122f6327c7", provider="solar")}
+
+
+def _per_call_us(fn, repeat: int) -> float:
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def legacy_parse(raw: bytes):
+    body = json.loads(raw)
+    tool = body.get("tool")
+    input_data = body.get("input", {})
+    return tool, input_data, body.get("stream")
+
+
+def model_parse(raw: bytes):
+    call = ToolCall.model_validate_json(raw)
+    return call.tool, validate_input(call.tool, call.input), call.stream
+
+
+def micro(repeat: int) -> None:
+    raw = json.dumps(BODY, ensure_ascii=False).encode()
+    print(f"parse    legacy json.loads      {_per_call_us(lambda: legacy_parse(raw), repeat):7.2f}us")
+    print(f"parse    pydantic + validation  {_per_call_us(lambda: model_parse(raw), repeat):7.2f}us")
+    print(f"render   dict (jsonable_encoder) {_per_call_us(lambda: JSONResponse(jsonable_encoder(OUTPUT)), repeat):6.2f}us")
+    print(f"render   JSONResponse           {_per_call_us(lambda: JSONResponse(OUTPUT), repeat):7.2f}us")
+    print(f"render   ORJSONResponse         {_per_call_us(lambda: ORJSONResponse(OUTPUT), repeat):7.2f}us")
+
+
+async def load(client: httpx.AsyncClient, name: str, body, requests: int, concurrency: int, expect: int) -> None:
+    samples = []
+    errors = 0
+    sem = asyncio.Semaphore(concurrency)
+
+    async def worker():
+        nonlocal errors
+        async with sem:
+            start = time.perf_counter()
+            res = await client.post("/call", json=body)
+            samples.append((time.perf_counter() - start) * 1000)
+            if res.status_code != expect:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(requests)))
+    elapsed = time.perf_counter() - start
+    q = statistics.quantiles(samples, n=100)
+    print(f"load     {name:<22} {requests / elapsed:8.1f} req/s  p50={q[49]:6.2f}ms p99={q[98]:6.2f}ms  errors={errors}")
+
+
+async def main_async(args) -> None:
+    micro(args.repeat)
+
+    mock_server, mock_task = await start_server(MOCK_PORT)
+    app_server, app_task = await start_server(APP_PORT, main.app)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{APP_PORT}", limits=limits, timeout=60) as client:
+            # 캐시 채우기
+            await client.post("/call", json=BODY)
+            invalid = {"tool": "generate_problem", "input": {"prompt": "x", "llm": "unknown"}}
+            for name, response_class in (("std", JSONResponse), ("orjson", ORJSONResponse)):
+                router.ResponseClass = response_class
+                await load(client, f"cache hit ({name})", BODY, args.requests, args.concurrency, 200)
+            await load(client, "rejected (422)", invalid, args.requests, args.concurrency, 422)
+    finally:
+        await stop_server(app_server, app_task)
+        await stop_server(mock_server, mock_task)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=20000, help="마이크로 벤치마크 반복 횟수")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    asyncio.run(main_async(parser.parse_args()))
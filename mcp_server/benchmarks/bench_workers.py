@@ -0,0 +1,174 @@
+"""serve.py로 worker 수를 바꿔 띄우고 공유 상태가 있을 때/없을 때를 비교.
+
+각 설정마다 대역 LLM 서버를 두고 앱을 별도 프로세스로 띄워서
+1) cache hit: 같은 요청 반복 (upstream 호출 없이 프레임워크 처리량, worker 수만큼 늘어야 함)
+2) generate: 매번 다른 프롬프트 (no_cache). upstream 동시 호출 최대값이 provider limit을 넘지 않아야 함
+3) repeat: 같은 프롬프트를 새 연결로 여러 번 - 실제로 upstream에 간 호출 수 (공유 캐시면 1)
+4) circuit: provider가 전부 500일 때 upstream에 간 호출 수 (circuit이 worker끼리 공유되면 threshold 근처)
+마지막에 설정별 p99를 모아 공유 상태를 쓸 때 늘어나는 지연 (SQLite 왕복, 번호표 순서 대기)을 비교한다.
+
+mcp_server 디렉토리에서 실행:
+    python -m benchmarks.bench_workers --workers 4 --requests 2000 --concurrency 64
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+from benchmarks.mock_llm import counters, free_port, provider_env, settings, start_server, stop_server
+
+LLM = "solar"
+LIMIT = 4
+
+
+def _app_env(mock_port: int, state_dir: str, shared: bool) -> dict:
+    env = dict(os.environ, **provider_env(f"http://127.0.0.1:{mock_port}"))
+    env.update({
+        "LOG_LEVEL": "error",
+        "OLLAMA_WARMUP": "false",
+        "PROBLEM_STORE_PATH": os.path.join(state_dir, "problems.db"),
+        "DEDUP_MODE": "off",
+        "ADMISSION_PROVIDER_LIMITS": json.dumps({LLM: {"initial": LIMIT, "max": LIMIT}}),
+        "CIRCUIT_FAILURE_THRESHOLD": "3",
+        "RETRY_MAX_ATTEMPTS": "1",
+        "FALLBACK_CHAINS": "{}",
+    })
+    # 빈 값이면 serve.py가 공유 파일을 채우지 않는다
+    for name, file in (("SHARED_STATE_PATH", "shared.db"), ("CACHE_SQLITE_PATH", "cache.db"), ("JOB_SQLITE_PATH", "jobs.db")):
+        env[name] = os.path.join(state_dir, file) if shared else ""
+    return env
+
+
+async def _wait_ready(client: httpx.AsyncClient) -> None:
+    for _ in range(150):
+        try:
+            await client.get("/")
+            return
+        except httpx.TransportError:
+            await asyncio.sleep(0.2)
+    raise RuntimeError("app did not start")
+
+
+async def _load(client: httpx.AsyncClient, requests: int, concurrency: int, make_input):
+    samples = []
+    errors = 0
+    sem = asyncio.Semaphore(concurrency)
+
+    async def worker(i):
+        nonlocal errors
+        async with sem:
+            start = time.perf_counter()
+            res = await client.post("/call", json={"tool": "generate_problem", "input": make_input(i)})
+            samples.append((time.perf_counter() - start) * 1000)
+            if res.status_code != 200:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(requests)))
+    elapsed = time.perf_counter() - start
+    q = statistics.quantiles(samples, n=100, method="inclusive")
+    return requests / elapsed, q[49], q[98], errors
+
+
+async def run(workers: int, shared: bool, args) -> dict:
+    name = f"{workers} worker(s){' shared' if shared else ''}"
+    summary = {"name": name}
+    mock_port, app_port = free_port(), free_port()
+    mock_server, mock_task = await start_server(mock_port)
+    settings.latency, settings.error_rate = "fixed:0", 0.0
+    with tempfile.TemporaryDirectory() as state_dir:
+        proc = subprocess.Popen(
+            [sys.executable, "serve.py", "--workers", str(workers), "--port", str(app_port)],
+            env=_app_env(mock_port, state_dir, shared),
+            stdout=subprocess.DEVNULL,
+        )
+        # 새 연결을 자주 만들어 여러 worker에 골고루 가도록 keep-alive 연결 수를 작게
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency // 4)
+        try:
+            async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{app_port}", limits=limits, timeout=120) as client:
+                await _wait_ready(client)
+                await asyncio.sleep(1.0)
+
+                def cached(i):
+                    return {"prompt": "조건부확률 문제를 하나 만들어줘", "llm": LLM}
+
+                await _load(client, args.concurrency, args.concurrency, cached)
+                rps, p50, p99, errors = await _load(client, args.requests, args.concurrency, cached)
+                summary["cache"] = (rps, p99)
+                print(f"{name:<20} cache hit  {rps:8.1f} req/s  p50={p50:6.2f}ms p99={p99:6.2f}ms  errors={errors}")
+
+                settings.latency = f"fixed:{args.latency}"
+                counters["max_inflight"] = 0
+                rps, p50, p99, errors = await _load(
+                    client, args.generate, args.concurrency, lambda i: {"prompt": f"문제 #{i}", "llm": LLM, "no_cache": True}
+                )
+                summary["generate"] = (rps, p99)
+                summary["max_inflight"] = counters["max_inflight"]
+                print(
+                    f"{name:<20} generate   {rps:8.1f} req/s  p50={p50:6.2f}ms p99={p99:6.2f}ms  errors={errors}  "
+                    f"upstream max inflight={counters['max_inflight']} (limit {LIMIT})"
+                )
+
+                settings.latency = "fixed:0"
+                before = counters["requests"]
+                for _ in range(args.repeat):
+                    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{app_port}", timeout=30) as fresh:
+                        await fresh.post("/call", json={"tool": "generate_problem", "input": {"prompt": "반복 요청", "llm": LLM}})
+                summary["repeat"] = counters["requests"] - before
+                print(f"{name:<20} repeat     {args.repeat} requests -> {counters['requests'] - before} upstream calls")
+
+                settings.error_rate = 1.0
+                before = counters["requests"]
+                for i in range(args.repeat):
+                    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{app_port}", timeout=30) as fresh:
+                        await fresh.post("/call", json={"tool": "generate_problem", "input": {"prompt": f"오류 #{i}", "llm": LLM}})
+                summary["circuit"] = counters["requests"] - before
+                print(f"{name:<20} circuit    {args.repeat} failing requests -> {counters['requests'] - before} upstream calls")
+        finally:
+            proc.terminate()
+            proc.wait(30)
+            await stop_server(mock_server, mock_task)
+    return summary
+
+
+async def main_async(args) -> None:
+    results = [await run(1, False, args), await run(args.workers, False, args), await run(args.workers, True, args)]
+
+    # 공유 상태의 대가: p99가 얼마나 늘고 그 대신 upstream 호출이 얼마나 줄었는지
+    print()
+    print(f"{'':<20} {'cache p99':>10} {'gen p99':>10} {'gen req/s':>10} {'max inflight':>13} {'repeat':>7} {'circuit':>8}")
+    for r in results:
+        print(
+            f"{r['name']:<20} {r['cache'][1]:8.2f}ms {r['generate'][1]:8.2f}ms {r['generate'][0]:10.1f} "
+            f"{r['max_inflight']:>6} (<={LIMIT}) {r['repeat']:>7} {r['circuit']:>8}"
+        )
+    single, unshared, shared = results
+    # provider limit이 같은 1 worker와 비교하면 공유 상태 자체의 비용 (unshared는 limit을 worker 수만큼 넘겨서 빠름)
+    print(
+        f"shared vs 1 worker (same provider limit): cache hit p99 {shared['cache'][1] - single['cache'][1]:+.2f}ms, "
+        f"generate p99 {shared['generate'][1] - single['generate'][1]:+.2f}ms, "
+        f"generate {single['generate'][0]:.1f} -> {shared['generate'][0]:.1f} req/s"
+    )
+    print(
+        f"shared vs unshared ({args.workers} workers): cache hit p99 {shared['cache'][1] - unshared['cache'][1]:+.2f}ms, "
+        f"generate p99 {shared['generate'][1] - unshared['generate'][1]:+.2f}ms, "
+        f"upstream max inflight {unshared['max_inflight']} -> {shared['max_inflight']}, "
+        f"repeat calls {unshared['repeat']} -> {shared['repeat']}, circuit calls {unshared['circuit']} -> {shared['circuit']}"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=2000, help="cache hit 요청 수")
+    parser.add_argument("--generate", type=int, default=200, help="no_cache 생성 요청 수")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--latency", type=float, default=0.1, help="대역 LLM 응답 지연(초)")
+    asyncio.run(main_async(parser.parse_args()))
@@ -0,0 +1,229 @@
+"""/call 과 MCP tools/call 용 비동기 부하 생성기.
+
+closed loop: 동시 실행 수(--concurrency)를 고정하고 응답이 오면 바로 다음 요청.
+open loop: 도착률(--rate, req/s)을 고정. 지연시간을 '보냈어야 할 시각'부터 재서
+서버가 밀릴 때 대기 시간이 결과에서 빠지지 않게 한다 (coordinated omission 방지).
+
+결과는 HdrHistogram의 .hgrm 형식 백분위 분포로 출력/저장한다.
+
+mcp_server 디렉토리에서 실행 (서버는 따로 띄워 둔다):
+    python -m benchmarks.loadgen --mode closed --concurrency 20 --duration 30
+    python -m benchmarks.loadgen --mode open --rate 50 --ramp-up 10 --prompts prompts.txt --output call.hgrm
+    python -m benchmarks.loadgen --target mcp --url http://127.0.0.1:8000/mcp/ --mode open --rate 20
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import math
+import statistics
+import sys
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+DEFAULT_PROMPT = "조건부확률 문제를 하나 만들어줘"
+
+
+def load_inputs(path: Optional[str], llm: str) -> List[Dict[str, Any]]:
+    """프롬프트 파일: 한 줄에 하나. JSON 객체면 /call input 그대로, 아니면 prompt 문자열로 본다."""
+    if not path:
+        return [{"prompt": DEFAULT_PROMPT, "llm": llm}]
+    inputs = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("{"):
+                item = json.loads(line)
+                item.setdefault("llm", llm)
+                inputs.append(item)
+            else:
+                inputs.append({"prompt": line, "llm": llm})
+    if not inputs:
+        raise ValueError(f"{path}: 프롬프트가 없습니다")
+    return inputs
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: List[float] = []  # ms
+        self.errors: Dict[str, int] = {}
+        self.max_inflight = 0
+        self.started = time.perf_counter()
+
+    def record(self, latency_ms: float, error: Optional[str] = None) -> None:
+        self.latencies.append(latency_ms)
+        if error:
+            self.errors[error] = self.errors.get(error, 0) + 1
+
+    def summary(self) -> str:
+        elapsed = time.perf_counter() - self.started
+        total = len(self.latencies)
+        failed = sum(self.errors.values())
+        lines = [f"requests={total} errors={failed} elapsed={elapsed:.1f}s throughput={total / elapsed:.1f} req/s max_inflight={self.max_inflight}"]
+        for error, count in sorted(self.errors.items(), key=lambda kv: -kv[1]):
+            lines.append(f"  {error}: {count}")
+        return "\n".join(lines)
+
+    def hgrm(self) -> str:
+        """HdrHistogram outputPercentileDistribution 과 같은 형식 (HdrHistogram plotter로 그릴 수 있음)."""
+        values = sorted(self.latencies)
+        if not values:
+            return "# no samples\n"
+        n = len(values)
+        lines = [f"{'Value':>12} {'Percentile':>14} {'TotalCount':>10} {'1/(1-Percentile)':>14}", ""]
+        # HdrHistogram과 같은 눈금: 남은 구간이 반으로 줄 때마다 간격도 반 (반 구간당 5개)
+        percentile = 0.0
+        while True:
+            index = max(0, min(n - 1, math.ceil(percentile * n) - 1))
+            lines.append(f"{values[index]:12.3f} {percentile:14.12f} {index + 1:10d} {1 / (1 - percentile):14.2f}")
+            if index == n - 1:
+                break
+            halves = math.floor(math.log2(1 / (1 - percentile)))
+            percentile += 1 / (5 * 2 ** (halves + 1))
+        lines.append(f"{values[-1]:12.3f} {1.0:14.12f} {n:10d}")
+        stdev = statistics.pstdev(values)
+        lines.append(f"#[Mean    = {statistics.fmean(values):12.3f}, StdDeviation   = {stdev:12.3f}]")
+        lines.append(f"#[Max     = {values[-1]:12.3f}, Total count    = {n:12d}]")
+        lines.append(f"#[Buckets = {n:12d}, SubBuckets     = {1:12d}]")
+        return "\n".join(lines) + "\n"
+
+
+# 대상별 요청 함수: input dict -> None (실패 시 예외)
+def make_call_sender(client: httpx.AsyncClient, url: str, tool: str, stream: bool) -> Callable[[Dict[str, Any]], Awaitable[None]]:
+    async def send(input_data: Dict[str, Any]) -> None:
+        body = {"tool": tool, "input": input_data, "stream": stream}
+        if stream:
+            async with client.stream("POST", url, json=body) as res:
+                res.raise_for_status()
+                async for line in res.aiter_lines():
+                    if line.startswith("event: error"):
+                        raise RuntimeError("stream error")
+            return
+        res = await client.post(url, json=body)
+        res.raise_for_status()
+        if res.json().get("output") is None:
+            raise RuntimeError("empty output")
+
+    return send
+
+
+def make_mcp_sender(mcp_client, tool: str) -> Callable[[Dict[str, Any]], Awaitable[None]]:
+    async def send(input_data: Dict[str, Any]) -> None:
+        # 하나의 MCP 세션 위에서 요청 id로 다중화된다
+        await mcp_client.call_tool(tool, {"input": input_data})
+
+    return send
+
+
+async def _timed(send, input_data: Dict[str, Any], intended: float, recorder: Recorder, inflight: List[int]) -> None:
+    inflight[0] += 1
+    recorder.max_inflight = max(recorder.max_inflight, inflight[0])
+    error = None
+    try:
+        await send(input_data)
+    except httpx.HTTPStatusError as e:
+        error = f"http {e.response.status_code}"
+    except Exception as e:
+        error = type(e).__name__
+    finally:
+        inflight[0] -= 1
+    recorder.record((time.perf_counter() - intended) * 1000, error)
+
+
+async def run_closed(send, inputs, concurrency: int, duration: float, requests: int, ramp_up: float, recorder: Recorder) -> None:
+    deadline = recorder.started + duration
+    counter = [0]
+    inflight = [0]
+
+    async def worker(k: int):
+        # ramp_up 동안 worker를 균등하게 나눠서 시작
+        await asyncio.sleep(ramp_up * k / concurrency)
+        while time.perf_counter() < deadline and (not requests or counter[0] < requests):
+            i = counter[0]
+            counter[0] += 1
+            await _timed(send, inputs[i % len(inputs)], time.perf_counter(), recorder, inflight)
+
+    await asyncio.gather(*(worker(k) for k in range(concurrency)))
+
+
+def _arrival_time(n: int, rate: float, ramp_up: float) -> float:
+    """n번째 요청의 예정 시각. ramp_up 동안 도착률이 0에서 rate까지 선형으로 오른다."""
+    ramp_count = rate * ramp_up / 2
+    if n < ramp_count:
+        return math.sqrt(2 * ramp_up * n / rate)
+    return ramp_up + (n - ramp_count) / rate
+
+
+async def run_open(send, inputs, rate: float, duration: float, requests: int, ramp_up: float, recorder: Recorder) -> None:
+    tasks = set()
+    inflight = [0]
+    n = 0
+    while not requests or n < requests:
+        offset = _arrival_time(n, rate, ramp_up)
+        if offset >= duration:
+            break
+        intended = recorder.started + offset
+        delay = intended - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        # 응답을 기다리지 않고 예정대로 계속 보낸다
+        task = asyncio.create_task(_timed(send, inputs[n % len(inputs)], intended, recorder, inflight))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+        n += 1
+    if tasks:
+        await asyncio.gather(*tasks)
+
+
+async def main(args) -> None:
+    inputs = load_inputs(args.prompts, args.llm)
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=args.connections, max_keepalive_connections=args.connections)
+
+    async with contextlib.AsyncExitStack() as stack:
+        if args.target == "mcp":
+            from fastmcp import Client
+
+            mcp_client = await stack.enter_async_context(Client(args.url or "http://127.0.0.1:8000/mcp/", timeout=args.timeout))
+            send = make_mcp_sender(mcp_client, args.tool)
+        else:
+            client = await stack.enter_async_context(httpx.AsyncClient(limits=limits, timeout=args.timeout))
+            send = make_call_sender(client, args.url or "http://127.0.0.1:8000/call", args.tool, args.stream)
+
+        recorder.started = time.perf_counter()
+        if args.mode == "closed":
+            await run_closed(send, inputs, args.concurrency, args.duration, args.requests, args.ramp_up, recorder)
+        else:
+            await run_open(send, inputs, args.rate, args.duration, args.requests, args.ramp_up, recorder)
+
+    print(recorder.summary(), file=sys.stderr)
+    report = recorder.hgrm()
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(report)
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--target", choices=("call", "mcp"), default="call")
+    parser.add_argument("--url", help="기본값: http://127.0.0.1:8000/call 또는 /mcp/")
+    parser.add_argument("--tool", default="generate_problem")
+    parser.add_argument("--llm", default="ollama", help="프롬프트 파일 줄에 llm이 없을 때 쓸 provider")
+    parser.add_argument("--prompts", help="한 줄에 프롬프트 하나 (또는 /call input JSON), 순서대로 반복")
+    parser.add_argument("--mode", choices=("closed", "open"), default="closed")
+    parser.add_argument("--concurrency", type=int, default=10, help="closed loop 동시 실행 수")
+    parser.add_argument("--rate", type=float, default=10.0, help="open loop 초당 요청 수")
+    parser.add_argument("--duration", type=float, default=30.0, help="요청을 보내는 시간(초)")
+    parser.add_argument("--requests", type=int, default=0, help="총 요청 수 상한 (0이면 duration만)")
+    parser.add_argument("--ramp-up", type=float, default=0.0, help="부하를 0에서 목표까지 올리는 시간(초)")
+    parser.add_argument("--connections", type=int, default=100)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--stream", action="store_true", help="/call stream=True 로 호출")
+    parser.add_argument("--output", help=".hgrm 파일로 저장 (없으면 stdout)")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,246 @@
+"""벤치마크용 로컬 LLM 대역 서버.
+
+Ollama(/api/generate, /api/chat), OpenAI(/v1/chat/completions), Upstage(/v1/solar/chat/completions),
+CLOVA(/testapp/v3/chat-completions/{model}) 의 응답 형식을 그대로 흉내낸다.
+지연시간 분포, 오류 비율, 스트리밍 토큰 간격은 MockSettings로 조절한다.
+
+단독 실행 (mcp_server 디렉토리에서):
+    python -m benchmarks.mock_llm --port 8100 --latency lognormal:-1.5,0.5 --error-rate 0.01
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import socket
+import time
+from dataclasses import dataclass
+from typing import Dict
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+SAMPLE_PROBLEM = {
+    "title": "조건부확률",
+    "content": "주사위를 던져 짝수가 나왔을 때 6일 확률은?\n1) 1/6\n2) 1/3\n3) 1/2\n4) 2/3",
+    "type": "select",
+    "answer": "2",
+    "category": "수학/확률과통계/조건부확률",
+}
+
+
+@dataclass
+class MockSettings:
+    # fixed:초 | uniform:최소,최대 | lognormal:mu,sigma (초 단위 로그정규)
+    latency: str = "fixed:0"
+    error_rate: float = 0.0
+    error_status: int = 500
+    token_delay: float = 0.0  # 스트리밍 토큰 사이 간격(초)
+    chunk_chars: int = 8  # 스트리밍 토큰 하나의 글자 수
+    cold_start: float = 0.0  # Ollama 대역: 첫 호출에만 더해지는 모델 로드 시간(초)
+
+    def sample_latency(self) -> float:
+        kind, _, args = self.latency.partition(":")
+        values = [float(v) for v in args.split(",") if v]
+        if kind == "uniform":
+            return random.uniform(values[0], values[1])
+        if kind == "lognormal":
+            return math.exp(random.gauss(values[0], values[1]))
+        return values[0] if values else 0.0
+
+
+settings = MockSettings()
+# 받은 요청 수와 동시에 처리 중인 요청 수 (최대값) - 서버 쪽 동시성 제한 확인용
+counters = {"requests": 0, "inflight": 0, "max_inflight": 0}
+app = FastAPI()
+
+
+def _problem_text() -> str:
+    return json.dumps(SAMPLE_PROBLEM, ensure_ascii=False)
+
+
+def _chunks(text: str):
+    for i in range(0, len(text), settings.chunk_chars):
+        yield text[i:i + settings.chunk_chars]
+
+
+async def _before_response():
+    # 지연 후 error_rate 확률로 오류 응답 (429면 Retry-After 포함)
+    counters["requests"] += 1
+    counters["inflight"] += 1
+    counters["max_inflight"] = max(counters["max_inflight"], counters["inflight"])
+    try:
+        await asyncio.sleep(settings.sample_latency())
+    finally:
+        counters["inflight"] -= 1
+    if random.random() < settings.error_rate:
+        headers = {"Retry-After": "0.1"} if settings.error_status == 429 else None
+        return JSONResponse({"error": "mock failure"}, status_code=settings.error_status, headers=headers)
+    return None
+
+
+def _sse(data: str, event: str = "") -> str:
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {data}\n\n"
+
+
+@app.post("/api/generate")
+async def ollama_generate(request: Request):
+    body = await request.json()
+    error = await _before_response()
+    if error is not None:
+        return error
+    text = _problem_text()
+    if not body.get("stream"):
+        return {"model": body.get("model", "mistral"), "response": text, "done": True}
+
+    async def lines():
+        for chunk in _chunks(text):
+            yield json.dumps({"response": chunk, "done": False}, ensure_ascii=False) + "\n"
+            await asyncio.sleep(settings.token_delay)
+        yield json.dumps({"response": "", "done": True}) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+_ollama_loaded = False
+
+
+@app.post("/api/chat")
+async def ollama_chat(request: Request):
+    global _ollama_loaded
+    body = await request.json()
+    start = time.perf_counter()
+    # 모델이 아직 안 올라갔으면 cold_start 만큼 더 기다린다
+    load = 0.0 if _ollama_loaded else settings.cold_start
+    _ollama_loaded = True
+    await asyncio.sleep(load)
+    error = await _before_response()
+    if error is not None:
+        return error
+    text = _problem_text() if body.get("messages") else ""
+    prompt_chars = sum(len(m.get("content", "")) for m in body.get("messages", []))
+
+    def timings():
+        return {
+            "total_duration": int((time.perf_counter() - start) * 1e9),
+            "load_duration": int(load * 1e9),
+            "prompt_eval_count": prompt_chars // 4,
+            "eval_count": len(text) // 4,
+        }
+
+    if not body.get("stream"):
+        return {"model": body.get("model"), "message": {"role": "assistant", "content": text}, "done": True, **timings()}
+
+    async def lines():
+        for chunk in _chunks(text):
+            yield json.dumps({"message": {"role": "assistant", "content": chunk}, "done": False}, ensure_ascii=False) + "\n"
+            await asyncio.sleep(settings.token_delay)
+        yield json.dumps({"message": {"role": "assistant", "content": ""}, "done": True, **timings()}) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+async def _chat_completions(request: Request):
+    body = await request.json()
+    error = await _before_response()
+    if error is not None:
+        return error
+    text = _problem_text()
+    if not body.get("stream"):
+        return {
+            "id": "mock",
+            "object": "chat.completion",
+            "model": body.get("model"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+        }
+
+    async def events():
+        for chunk in _chunks(text):
+            delta = {"choices": [{"index": 0, "delta": {"content": chunk}, "finish_reason": None}]}
+            yield _sse(json.dumps(delta, ensure_ascii=False))
+            await asyncio.sleep(settings.token_delay)
+        yield _sse("[DONE]")
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@app.post("/v1/chat/completions")
+async def openai_chat(request: Request):
+    return await _chat_completions(request)
+
+
+@app.post("/v1/solar/chat/completions")
+async def upstage_chat(request: Request):
+    return await _chat_completions(request)
+
+
+@app.post("/testapp/v3/chat-completions/{model}")
+async def clova_chat(model: str, request: Request):
+    await request.json()
+    error = await _before_response()
+    if error is not None:
+        return error
+    text = _problem_text()
+    if "text/event-stream" not in request.headers.get("accept", ""):
+        return {
+            "status": {"code": "20000", "message": "OK"},
+            "result": {"message": {"role": "assistant", "content": text}, "finishReason": "stop"},
+        }
+
+    async def events():
+        for chunk in _chunks(text):
+            yield _sse(json.dumps({"message": {"role": "assistant", "content": chunk}}, ensure_ascii=False), "token")
+            await asyncio.sleep(settings.token_delay)
+        yield _sse(json.dumps({"message": {"role": "assistant", "content": text}}, ensure_ascii=False), "result")
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+def provider_env(base_url: str) -> Dict[str, str]:
+    # config가 import 되기 전에 os.environ에 넣으면 모든 provider가 대역 서버를 호출한다
+    return {
+        "OLLAMA_URL": f"{base_url}/api/generate",
+        "OLLAMA_CHAT_URL": f"{base_url}/api/chat",
+        "OPENAI_URL": f"{base_url}/v1/chat/completions",
+        "UPSTAGE_URL": f"{base_url}/v1/solar/chat/completions",
+        "CLOVA_URL": f"{base_url}/testapp/v3/chat-completions/HCX-005",
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+# 같은 이벤트 루프에서 uvicorn을 띄우고 (server, task) 반환
+async def start_server(port: int, target=app):
+    server = uvicorn.Server(uvicorn.Config(target, host="127.0.0.1", port=port, log_level="warning"))
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    return server, task
+
+
+async def stop_server(server, task) -> None:
+    server.should_exit = True
+    await task
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency", default="fixed:0")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--token-delay", type=float, default=0.0)
+    parser.add_argument("--cold-start", type=float, default=0.0)
+    args = parser.parse_args()
+    settings.latency = args.latency
+    settings.error_rate = args.error_rate
+    settings.error_status = args.error_status
+    settings.token_delay = args.token_delay
+    settings.cold_start = args.cold_start
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
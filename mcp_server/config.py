@@ -1,11 +1,185 @@
 import os
+import json
 from dotenv import load_dotenv
 
 
 load_dotenv()
-OLLAMA_URL = "http://localhost:11434/api/generate"
-OLLAMA_MODEL = "mistral"
+
+
+# JSON 문자열 환경변수 (예: OPENAI_PARAMS='{"temperature": 0.3}')
+def _env_json(name: str, default):
+    value = os.getenv(name)
+    return json.loads(value) if value else default
+
+
+OLLAMA_URL = os.getenv("OLLAMA_URL", "http://localhost:11434/api/generate")
+OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "mistral")
+# system 프롬프트를 고정 chat prefix로 보내야 Ollama가 이전 요청의 KV cache를 재사용한다
+OLLAMA_CHAT_URL = os.getenv("OLLAMA_CHAT_URL", OLLAMA_URL.replace("/api/generate", "/api/chat"))
+# 모델을 메모리에 유지할 시간 ("30m", "1h" 또는 초 단위 숫자, -1이면 내리지 않음)
+_keep_alive = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+OLLAMA_KEEP_ALIVE = int(_keep_alive) if _keep_alive.lstrip("-").isdigit() else _keep_alive
+OLLAMA_WARMUP = os.getenv("OLLAMA_WARMUP", "true").lower() == "true"  # 서버 시작 시 모델 미리 로드
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 CLOVA_API_KEY = os.getenv("CLOVA_API_KEY")
-UPSTAGE_API_KEY = os.getenv("UPSTAGE_API_KEY")
\ No newline at end of file
+UPSTAGE_API_KEY = os.getenv("UPSTAGE_API_KEY")
+
+# provider 레지스트리 설정
+# factory: "모듈:클래스" (처음 사용할 때 import), params: 요청 payload에 그대로 합쳐지는 샘플링 값
+LLM_PROVIDERS = {
+    "ollama": {
+        "factory": "llm.ollama:OllamaProvider",
+        "url": OLLAMA_CHAT_URL,
+        "model": OLLAMA_MODEL,
+        "keep_alive": OLLAMA_KEEP_ALIVE,
+        "params": _env_json("OLLAMA_PARAMS", {}),
+    },
+    "chatgpt": {
+        "factory": "llm.chatgpt:ChatGPTProvider",
+        "url": os.getenv("OPENAI_URL", "https://api.openai.com/v1/chat/completions"),
+        "model": os.getenv("OPENAI_MODEL", "gpt-4o-mini"),
+        "api_key": OPENAI_API_KEY,
+        "params": _env_json("OPENAI_PARAMS", {}),
+    },
+    "solar": {
+        "factory": "llm.solar:SolarProvider",
+        "url": os.getenv("UPSTAGE_URL", "https://api.upstage.ai/v1/solar/chat/completions"),
+        "model": os.getenv("UPSTAGE_MODEL", "solar-1-mini-chat"),
+        "api_key": UPSTAGE_API_KEY,
+        "params": _env_json("UPSTAGE_PARAMS", {"temperature": 0.7}),
+    },
+    "hyperclova": {
+        "factory": "llm.hyperclova:HyperClovaProvider",
+        "url": os.getenv("CLOVA_URL", "https://clovastudio.stream.ntruss.com/testapp/v3/chat-completions/HCX-005"),
+        "model": os.getenv("CLOVA_MODEL", "HCX-005"),
+        "api_key": CLOVA_API_KEY,
+        "params": _env_json("CLOVA_PARAMS", {"topP": 0.8, "temperature": 0.7, "maxTokens": 512}),
+    },
+}
+
+# provider별 공유 HTTP 클라이언트 (커넥션 풀) 설정
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+HTTP2 = os.getenv("HTTP2", "false").lower() == "true"  # h2 패키지 필요
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "120"))
+HTTP_WRITE_TIMEOUT = float(os.getenv("HTTP_WRITE_TIMEOUT", "10"))
+HTTP_POOL_TIMEOUT = float(os.getenv("HTTP_POOL_TIMEOUT", "10"))
+
+# generate_problem 결과 캐시
+CACHE_ENABLED = os.getenv("CACHE_ENABLED", "true").lower() == "true"
+CACHE_TTL = float(os.getenv("CACHE_TTL", "3600"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "1024"))
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+CACHE_SQLITE_PATH = os.getenv("CACHE_SQLITE_PATH") or None  # 설정 시 재시작 후에도 유지되는 디스크 캐시
+
+# 캐시/중복 요청 키 정규화: none | whitespace | casefold (쉼표로 조합 가능)
+PROMPT_NORMALIZE = [m.strip() for m in os.getenv("PROMPT_NORMALIZE", "whitespace").split(",") if m.strip()]
+
+# 동일한 진행 중 요청 합치기 (single-flight)
+SINGLEFLIGHT_ENABLED = os.getenv("SINGLEFLIGHT_ENABLED", "true").lower() == "true"
+SINGLEFLIGHT_WINDOW = float(os.getenv("SINGLEFLIGHT_WINDOW", "0"))  # 완료 후에도 성공 결과를 공유할 시간(초)
+
+# /call/batch 동시 실행 제한
+BATCH_MAX_CALLS = int(os.getenv("BATCH_MAX_CALLS", "100"))
+BATCH_DEFAULT_CONCURRENCY = int(os.getenv("BATCH_DEFAULT_CONCURRENCY", "8"))
+BATCH_PROVIDER_CONCURRENCY = _env_json("BATCH_PROVIDER_CONCURRENCY", {"ollama": 2})  # provider별 상한
+
+# provider별 적응형 동시성 제한 (AIMD) 및 재시도
+ADMISSION_INITIAL_LIMIT = int(os.getenv("ADMISSION_INITIAL_LIMIT", "4"))
+ADMISSION_MIN_LIMIT = int(os.getenv("ADMISSION_MIN_LIMIT", "1"))
+ADMISSION_MAX_LIMIT = int(os.getenv("ADMISSION_MAX_LIMIT", "32"))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "100"))
+# 예: {"ollama": {"initial": 1, "max": 2}}
+ADMISSION_PROVIDER_LIMITS = _env_json("ADMISSION_PROVIDER_LIMITS", {"ollama": {"initial": 2, "max": 4}})
+RETRY_MAX_ATTEMPTS = int(os.getenv("RETRY_MAX_ATTEMPTS", "3"))
+RETRY_BASE_DELAY = float(os.getenv("RETRY_BASE_DELAY", "0.5"))
+RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", "8"))
+RETRY_DEADLINE = float(os.getenv("RETRY_DEADLINE", "60"))  # 대기+재시도를 포함한 전체 제한 시간(초)
+
+# 여러 provider 경쟁 호출 (llm="race" 또는 llm=[...])
+RACE_PROVIDERS = [p.strip() for p in os.getenv("RACE_PROVIDERS", "ollama,solar").split(",") if p.strip()]
+HEDGE_DELAY = float(os.getenv("HEDGE_DELAY", "0"))  # 다음 provider를 띄우기 전 기다리는 시간(초), 0이면 동시에
+
+# provider circuit breaker 및 fallback 순서
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))  # 연속 실패 횟수
+CIRCUIT_ERROR_RATE = float(os.getenv("CIRCUIT_ERROR_RATE", "0.5"))  # 최근 CIRCUIT_WINDOW 호출 중 실패 비율
+CIRCUIT_WINDOW = int(os.getenv("CIRCUIT_WINDOW", "20"))
+CIRCUIT_MIN_CALLS = int(os.getenv("CIRCUIT_MIN_CALLS", "10"))
+CIRCUIT_OPEN_SECONDS = float(os.getenv("CIRCUIT_OPEN_SECONDS", "30"))
+CIRCUIT_HALF_OPEN_PROBES = int(os.getenv("CIRCUIT_HALF_OPEN_PROBES", "1"))
+FALLBACK_CHAINS = _env_json("FALLBACK_CHAINS", {"ollama": ["solar", "chatgpt"]})
+
+# 구조화 로깅 (JSON lines, 백그라운드 스레드에서 출력)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "info").lower()  # debug | info | warn | error
+LOG_DEBUG_SAMPLE_RATE = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "0.1"))  # debug 로그 중 실제로 남길 비율
+LOG_MAX_FIELD_CHARS = int(os.getenv("LOG_MAX_FIELD_CHARS", "500"))
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "50000"))  # 인코딩된 줄 기준, 가득 차면 버리고 dropped로 집계
+LOG_FLUSH_INTERVAL = float(os.getenv("LOG_FLUSH_INTERVAL", "0.05"))  # writer 스레드가 모아서 쓰는 주기(초)
+
+# 프롬프트 템플릿과 입력 토큰 예산
+PROMPT_LANG = os.getenv("PROMPT_LANG", "ko")  # ko | en, 요청에서 input.lang 으로 바꿀 수 있음
+PROMPT_MAX_INPUT_TOKENS = int(os.getenv("PROMPT_MAX_INPUT_TOKENS", "3000"))  # system + user 합계
+# provider별 예산 (Ollama 기본 num_ctx는 2048이라 응답 자리를 남겨 둔다)
+PROMPT_INPUT_BUDGETS = _env_json("PROMPT_INPUT_BUDGETS", {"ollama": 1536})
+# tiktoken 같은 토크나이저가 없을 때 쓰는 추정 계수: 한글 글자당, 그 외 글자당, 공백 글자당 토큰 수
+# tiktoken: 설치되어 있으면 그 인코딩으로 정확히 센다
+# ollama(mistral)는 SentencePiece 토크나이저로 ko/en 템플릿, 카테고리 요청문, 한글 문장 40개를 세어 맞춘 값
+# (실제보다 적게 세지 않는 범위에서 오차 평균 6%, 공백은 다음 토큰에 붙어서 따로 세지 않음)
+TOKEN_ESTIMATES = _env_json("TOKEN_ESTIMATES", {
+    "ollama": {"hangul": 1.7, "other": 0.3, "space": 0.0},
+    "chatgpt": {"hangul": 0.7, "other": 0.25, "space": 0.1, "tiktoken": "o200k_base"},
+    "solar": {"hangul": 0.6, "other": 0.3, "space": 0.5},
+    "hyperclova": {"hangul": 0.4, "other": 0.3, "space": 0.5},
+    "default": {"hangul": 1.0, "other": 0.3, "space": 0.5},
+})
+
+# 비동기 job API (/jobs)
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))  # 동시에 실행하는 job 수
+JOB_MAX_QUEUE = int(os.getenv("JOB_MAX_QUEUE", "1000"))
+JOB_RESULT_TTL = float(os.getenv("JOB_RESULT_TTL", "3600"))  # 끝난 job 결과를 보관하는 시간(초)
+JOB_MAX_WAIT = float(os.getenv("JOB_MAX_WAIT", "30"))  # long-poll 최대 대기(초)
+JOB_SQLITE_PATH = os.getenv("JOB_SQLITE_PATH") or None  # 설정 시 대기 중인 job이 재시작 후에도 유지
+
+# 생성된 문제 저장소 (SQLite WAL), 빈 값이면 저장하지 않음
+PROBLEM_STORE_PATH = os.getenv("PROBLEM_STORE_PATH", "problems.db")
+PROBLEM_STORE_BATCH_SIZE = int(os.getenv("PROBLEM_STORE_BATCH_SIZE", "100"))
+PROBLEM_STORE_FLUSH_INTERVAL = float(os.getenv("PROBLEM_STORE_FLUSH_INTERVAL", "0.2"))  # 모아서 쓰는 주기(초)
+
+# 비슷한 문제 중복 감지 (MinHash/LSH)
+DEDUP_MODE = os.getenv("DEDUP_MODE", "flag")  # off | flag (duplicate_of 표시) | regenerate (다시 생성 후 그래도 겹치면 표시)
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.6"))  # 추정 Jaccard 유사도 (title + content 글자 3-gram)
+DEDUP_WINDOW = float(os.getenv("DEDUP_WINDOW", str(7 * 24 * 3600)))  # 이 시간(초) 안에 만든 문제와만 비교, 0이면 제한 없음
+DEDUP_MAX_ITEMS = int(os.getenv("DEDUP_MAX_ITEMS", "1000000"))  # 메모리 인덱스에 유지하는 문제 수
+DEDUP_MAX_RETRIES = int(os.getenv("DEDUP_MAX_RETRIES", "1"))
+
+# 자주 요청되는 category/type 문제 미리 생성, 빈 목록이면 사용하지 않음
+# 예: [{"category": "수학/확률과통계", "type": "select", "llm": "ollama", "lang": "ko"}]
+PREGEN_POOLS = _env_json("PREGEN_POOLS", [])
+PREGEN_WATERMARK = int(os.getenv("PREGEN_WATERMARK", "5"))  # 키마다 유지할 재고 수
+PREGEN_TTL = float(os.getenv("PREGEN_TTL", "3600"))  # 만든 뒤 이 시간(초)이 지나면 버림
+PREGEN_CONCURRENCY = int(os.getenv("PREGEN_CONCURRENCY", "2"))  # 동시에 미리 생성하는 수
+PREGEN_RESERVE = int(os.getenv("PREGEN_RESERVE", "1"))  # provider 동시 호출 한도 중 실제 요청 몫으로 비워 둘 자리
+PREGEN_INTERVAL = float(os.getenv("PREGEN_INTERVAL", "0.5"))  # 재고 확인 주기(초)
+
+# MCP 클라이언트용 FastMCP 엔드포인트 (/call 과 같은 프로세스, provider 커넥션 풀 공유)
+MCP_TRANSPORT = os.getenv("MCP_TRANSPORT", "streamable-http")  # streamable-http | sse | off
+MCP_PATH = os.getenv("MCP_PATH", "/mcp")  # streamable-http: {MCP_PATH}/, sse: {MCP_PATH}/sse
+MCP_STATELESS = os.getenv("MCP_STATELESS", "false").lower() == "true"  # 세션 없이 요청마다 처리 (여러 인스턴스 뒤 로드밸런서용)
+MCP_JSON_RESPONSE = os.getenv("MCP_JSON_RESPONSE", "false").lower() == "true"  # SSE 대신 JSON 한 번에 응답 (progress 알림 없음)
+
+# 응답 JSON 직렬화: orjson (설치되어 있을 때, 더 빠름) | std (json 모듈)
+JSON_RESPONSE = os.getenv("JSON_RESPONSE", "orjson")
+
+# 여러 worker 프로세스로 실행 (python serve.py)
+WEB_HOST = os.getenv("WEB_HOST", "127.0.0.1")
+WEB_PORT = int(os.getenv("WEB_PORT", "8000"))
+WEB_WORKERS = os.getenv("WEB_WORKERS", "auto")  # auto: 사용 가능한 CPU 코어 수, serve.py가 실제 수로 바꿔서 worker에 넘긴다
+# worker끼리 provider 동시 호출 수/AIMD limit/circuit 상태를 공유하는 SQLite 파일, 빈 값이면 프로세스마다 따로
+# serve.py로 2개 이상 띄우면 설정하지 않은 경우 shared_state.db (CACHE_SQLITE_PATH, JOB_SQLITE_PATH도 파일로 채움, 빈 값이면 공유 안 함)
+SHARED_STATE_PATH = os.getenv("SHARED_STATE_PATH") or None
+SHARED_STATE_SYNC_INTERVAL = float(os.getenv("SHARED_STATE_SYNC_INTERVAL", "0.5"))  # heartbeat + limit/circuit 갱신 주기(초)
+SHARED_STATE_POLL_INTERVAL = float(os.getenv("SHARED_STATE_POLL_INTERVAL", "0.02"))  # 대기자가 있을 때 다른 worker의 slot 반납을 다시 확인하는 주기(초)
+SHARED_STATE_WORKER_TTL = float(os.getenv("SHARED_STATE_WORKER_TTL", "10"))  # heartbeat가 끊긴 worker의 slot을 정리하기까지(초)
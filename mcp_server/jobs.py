@@ -0,0 +1,344 @@
+import asyncio
+import itertools
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from logger import log
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+FINISHED = (DONE, FAILED, CANCELLED)
+
+# 다른 worker가 실행 중인 job을 long-poll 할 때 DB를 다시 읽는 주기(초)
+REMOTE_POLL_INTERVAL = 0.2
+
+
+class JobQueueFullError(Exception):
+    pass
+
+
+@dataclass
+class Job:
+    id: str
+    tool: str
+    input: Dict[str, Any]
+    priority: int = 0
+    status: str = QUEUED
+    result: Any = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    # 실행 중인 작업 (취소용), 끝나면 set 되는 이벤트 (long-poll용)
+    task: Optional[asyncio.Task] = field(default=None, repr=False)
+    done: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+    # 같은 DB를 쓰는 다른 worker 프로세스가 받은 job (DB에서 읽은 스냅샷)
+    remote: bool = field(default=False, repr=False)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "tool": self.tool,
+            "priority": self.priority,
+            "status": self.status,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobManager:
+    """tool 호출을 job으로 받아 우선순위 큐에 넣고, 고정 개수의 worker가 꺼내 실행한다.
+
+    priority가 클수록 먼저, 같으면 먼저 들어온 순서. 끝난 job은 result_ttl 뒤에 지운다.
+    sqlite_path가 있으면 job을 기록해 두고, 재시작 시 끝나지 않은 job을 다시 큐에 넣는다.
+    여러 worker 프로세스가 같은 sqlite_path를 쓰면 다른 worker가 받은 job도 조회할 수 있고,
+    복원은 restore()가 True인 worker 한 곳에서만 한다.
+    """
+
+    def __init__(
+        self,
+        run: Callable[[str, Dict[str, Any]], Awaitable[Any]],
+        workers: int = 4,
+        max_queue: int = 1000,
+        result_ttl: float = 3600,
+        sqlite_path: Optional[str] = None,
+        restore: Optional[Callable[[], Awaitable[bool]]] = None,
+    ):
+        self.run = run
+        self.workers = workers
+        self.max_queue = max_queue
+        self.result_ttl = result_ttl
+        self.sqlite_path = sqlite_path
+        self.restore = restore
+
+        self._jobs: Dict[str, Job] = {}
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._seq = itertools.count()
+        self._tasks: List[asyncio.Task] = []
+        self._stopping = False
+
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.expired = 0
+
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+
+    async def start(self) -> None:
+        self._queue = asyncio.PriorityQueue()
+        self._stopping = False
+        if self.sqlite_path:
+            self._db = sqlite3.connect(self.sqlite_path, check_same_thread=False, timeout=5.0)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, tool TEXT NOT NULL, input TEXT NOT NULL, priority INTEGER NOT NULL, "
+                "status TEXT NOT NULL, result TEXT, error TEXT, created_at REAL NOT NULL, finished_at REAL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status)")
+            self._db.commit()
+            if self.restore is None or await self.restore():
+                self._restore(await asyncio.to_thread(self._db_load))
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._sweep()))
+
+    async def stop(self) -> None:
+        # 실행 중이던 job은 취소로 기록하지 않고 queued로 남겨 다음 기동 때 다시 실행
+        self._stopping = True
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._db is not None:
+            with self._db_lock:
+                self._db.close()
+            self._db = None
+
+    async def submit(self, tool: str, input_data: Dict[str, Any], priority: int = 0) -> Job:
+        # 큐에는 취소된 job 항목도 남아 있을 수 있어 대략적인 상한
+        if self._queue.qsize() >= self.max_queue:
+            raise JobQueueFullError(f"job queue full ({self.max_queue})")
+        job = Job(id=uuid.uuid4().hex, tool=tool, input=input_data, priority=priority)
+        self._jobs[job.id] = job
+        await self._save(job)
+        self._enqueue(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        job = self._jobs.get(job_id)
+        if job is not None and self._expired(job, time.time()):
+            self._forget(job)
+            return None
+        return job
+
+    async def find(self, job_id: str) -> Optional[Job]:
+        """이 worker의 job, 없으면 같은 DB를 쓰는 다른 worker가 받은 job."""
+        job = self.get(job_id)
+        if job is None and self._db is not None:
+            row = await asyncio.to_thread(self._db_get, job_id)
+            if row is not None:
+                job = self._from_row(row)
+                job.remote = True
+                if self._expired(job, time.time()):
+                    return None
+        return job
+
+    async def wait(self, job: Job, timeout: float) -> Job:
+        """끝날 때까지 최대 timeout초 기다린다 (long-poll)."""
+        if job.remote:
+            return await self._wait_remote(job, timeout)
+        if job.status not in FINISHED and timeout > 0:
+            try:
+                await asyncio.wait_for(job.done.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return job
+
+    async def cancel(self, job: Job) -> Job:
+        if job.status == QUEUED:
+            # 큐에서 빼지 않고 표시만, worker가 꺼낼 때 건너뛴다
+            await self._finish(job, CANCELLED, error="cancelled")
+        elif job.status == RUNNING and job.task is not None:
+            job.task.cancel()
+            await self.wait(job, 1.0)
+        return job
+
+    # 다른 worker의 job은 이벤트가 없으므로 DB를 주기적으로 다시 읽는다
+    async def _wait_remote(self, job: Job, timeout: float) -> Job:
+        deadline = time.monotonic() + timeout
+        while job.status not in FINISHED and time.monotonic() < deadline:
+            await asyncio.sleep(min(REMOTE_POLL_INTERVAL, max(0.0, deadline - time.monotonic())))
+            row = await asyncio.to_thread(self._db_get, job.id)
+            if row is None:
+                break
+            job = self._from_row(row)
+            job.remote = True
+        return job
+
+    def queued(self) -> int:
+        return sum(1 for job in self._jobs.values() if job.status == QUEUED)
+
+    def stats(self) -> Dict[str, Any]:
+        running = sum(1 for job in self._jobs.values() if job.status == RUNNING)
+        return {
+            "workers": self.workers,
+            "queued": self.queued(),
+            "running": running,
+            "stored": len(self._jobs),
+            "completed": self.completed,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+            "expired": self.expired,
+            "persistent": self._db is not None,
+        }
+
+    def _enqueue(self, job: Job) -> None:
+        self._queue.put_nowait((-job.priority, next(self._seq), job.id))
+
+    async def _worker(self) -> None:
+        while True:
+            _, _, job_id = await self._queue.get()
+            job = self._jobs.get(job_id)
+            if job is None or job.status != QUEUED:
+                continue
+            await self._execute(job)
+
+    async def _execute(self, job: Job) -> None:
+        job.status = RUNNING
+        job.started_at = time.time()
+        await self._save(job)
+        job.task = asyncio.create_task(self.run(job.tool, job.input))
+        try:
+            result = await job.task
+        except asyncio.CancelledError:
+            if self._stopping:
+                job.task.cancel()
+                job.status = QUEUED
+                raise
+            await self._finish(job, CANCELLED, error="cancelled")
+            return
+        except Exception as e:
+            log.error("job 실행 실패", job_id=job.id, tool=job.tool, error=str(e))
+            await self._finish(job, FAILED, error=str(e))
+            return
+        finally:
+            job.task = None
+
+        if result is None:
+            await self._finish(job, FAILED, error="Generation failed")
+        else:
+            await self._finish(job, DONE, result=result)
+
+    async def _finish(self, job: Job, status: str, result: Any = None, error: Optional[str] = None) -> None:
+        job.status = status
+        job.result = result
+        job.error = error
+        job.finished_at = time.time()
+        if status == DONE:
+            self.completed += 1
+        elif status == FAILED:
+            self.failed += 1
+        else:
+            self.cancelled += 1
+        job.done.set()
+        await self._save(job)
+
+    def _expired(self, job: Job, now: float) -> bool:
+        return job.finished_at is not None and job.finished_at + self.result_ttl <= now
+
+    def _forget(self, job: Job) -> None:
+        self._jobs.pop(job.id, None)
+        self.expired += 1
+
+    # 끝난 지 result_ttl이 지난 job 정리
+    async def _sweep(self) -> None:
+        while True:
+            await asyncio.sleep(min(self.result_ttl, 60))
+            now = time.time()
+            for job in [job for job in self._jobs.values() if self._expired(job, now)]:
+                self._forget(job)
+            if self._db is not None:
+                await asyncio.to_thread(self._db_delete_expired, now - self.result_ttl)
+
+    async def _save(self, job: Job) -> None:
+        if self._db is not None:
+            await asyncio.to_thread(self._db_save, job.to_dict(), job.input)
+
+    def _db_save(self, row: Dict[str, Any], input_data: Dict[str, Any]) -> None:
+        with self._db_lock:
+            if self._db is None:
+                return
+            self._db.execute(
+                "INSERT OR REPLACE INTO jobs (id, tool, input, priority, status, result, error, created_at, finished_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    row["job_id"], row["tool"], json.dumps(input_data, ensure_ascii=False), row["priority"],
+                    row["status"], json.dumps(row["result"], ensure_ascii=False), row["error"],
+                    row["created_at"], row["finished_at"],
+                ),
+            )
+            self._db.commit()
+
+    def _db_delete_expired(self, before: float) -> None:
+        with self._db_lock:
+            if self._db is None:
+                return
+            self._db.execute("DELETE FROM jobs WHERE finished_at IS NOT NULL AND finished_at <= ?", (before,))
+            self._db.commit()
+
+    def _db_get(self, job_id: str) -> Optional[tuple]:
+        with self._db_lock:
+            if self._db is None:
+                return None
+            return self._db.execute(
+                "SELECT id, tool, input, priority, status, result, error, created_at, finished_at FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+
+    def _db_load(self) -> List[tuple]:
+        with self._db_lock:
+            return self._db.execute(
+                "SELECT id, tool, input, priority, status, result, error, created_at, finished_at FROM jobs "
+                "ORDER BY created_at"
+            ).fetchall()
+
+    def _restore(self, rows: List[tuple]) -> None:
+        # running 상태로 남은 job은 이전 프로세스가 도중에 종료된 것이라 다시 실행
+        now = time.time()
+        requeued = 0
+        for row in rows:
+            job = self._from_row(row)
+            if job.status in FINISHED:
+                if self._expired(job, now):
+                    continue
+            else:
+                job.status = QUEUED
+                self._enqueue(job)
+                requeued += 1
+            self._jobs[job.id] = job
+        if requeued:
+            log.info("저장된 job 복원", requeued=requeued)
+
+    @staticmethod
+    def _from_row(row: tuple) -> Job:
+        id, tool, input_text, priority, status, result, error, created_at, finished_at = row
+        job = Job(
+            id=id, tool=tool, input=json.loads(input_text), priority=priority,
+            status=status, result=json.loads(result) if result else None, error=error,
+            created_at=created_at, finished_at=finished_at,
+        )
+        if status in FINISHED:
+            job.done.set()
+        return job
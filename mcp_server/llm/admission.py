@@ -0,0 +1,356 @@
+import asyncio
+import random
+import sqlite3
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+import httpx
+from llm.registry import get_provider
+from metrics import UPSTREAM_LATENCY, ERRORS
+from utils.shared_state import SharedState
+from logger import log
+from config import (
+    ADMISSION_INITIAL_LIMIT,
+    ADMISSION_MIN_LIMIT,
+    ADMISSION_MAX_LIMIT,
+    ADMISSION_MAX_QUEUE,
+    ADMISSION_PROVIDER_LIMITS,
+    RETRY_MAX_ATTEMPTS,
+    RETRY_BASE_DELAY,
+    RETRY_MAX_DELAY,
+    RETRY_DEADLINE,
+    SHARED_STATE_PATH,
+    SHARED_STATE_SYNC_INTERVAL,
+    SHARED_STATE_POLL_INTERVAL,
+    SHARED_STATE_WORKER_TTL,
+)
+
+# 여러 worker 프로세스가 provider 동시 호출 수/limit/circuit을 나눠 쓰는 상태, 없으면 프로세스마다 따로
+shared_state = (
+    SharedState(SHARED_STATE_PATH, SHARED_STATE_SYNC_INTERVAL, SHARED_STATE_WORKER_TTL) if SHARED_STATE_PATH else None
+)
+
+
+class AdmissionError(Exception):
+    pass
+
+
+class QueueFullError(AdmissionError):
+    pass
+
+
+class DeadlineExceededError(AdmissionError):
+    pass
+
+
+def _is_overload(status: int) -> bool:
+    return status == 429 or status >= 500
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    # Retry-After: 초 단위 숫자 또는 HTTP 날짜
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _backoff(attempt: int) -> float:
+    # full jitter
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * (2 ** attempt)))
+
+
+class AdmissionController:
+    """provider 하나의 동시 호출 수를 AIMD 방식으로 조절하는 관문.
+
+    성공하면 limit을 천천히 늘리고 (+1/limit), 429/5xx/타임아웃이면 절반으로 줄인다.
+    limit을 넘는 호출은 크기가 제한된 대기열에서 기다리고, 대기열이 차면 바로 거절한다.
+    shared가 있으면 limit과 동시 호출 수는 모든 worker 프로세스 합계 기준, 대기는 worker마다 하지만
+    slot은 공유 번호표로 모든 worker를 합쳐 먼저 기다린 순서대로 받는다.
+    """
+
+    def __init__(
+        self, name: str, initial: int, minimum: int, maximum: int, max_queue: int, shared: Optional[SharedState] = None
+    ):
+        self.name = name
+        self.shared = shared
+        self.initial = float(initial)
+        self.limit = float(initial)
+        self.min_limit = minimum
+        self.max_limit = maximum
+        self.max_queue = max_queue
+        self.inflight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        # 공유 상태를 쓸 때: 번호 -> (도착 시각, future), 번호표를 올리고 slot을 받아 오는 task
+        self._tickets: Dict[int, Tuple[float, asyncio.Future]] = {}
+        self._next_ticket = 0
+        self._granter: Optional[asyncio.Task] = None
+        self._kick = asyncio.Event()
+
+        self.admitted = 0
+        self.rejected = 0
+        self.retries = 0
+        self.overloads = 0
+
+    async def acquire(self, timeout: Optional[float] = None) -> None:
+        if self.shared is not None:
+            await self._acquire_shared(timeout)
+            return
+        if not self._waiters and self.inflight < int(self.limit):
+            self.inflight += 1
+            self.admitted += 1
+            return
+
+        if len(self._waiters) >= self.max_queue:
+            self.rejected += 1
+            raise QueueFullError(f"{self.name} 대기열이 가득 찼습니다 ({self.max_queue})")
+
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters.append(fut)
+        try:
+            await asyncio.wait_for(asyncio.shield(fut), timeout)
+        except BaseException as e:
+            if fut.done() and not fut.cancelled():
+                # 슬롯을 받은 직후 취소/타임아웃 되었으면 반납
+                await self.release()
+            else:
+                fut.cancel()
+                self._waiters.remove(fut)
+            if isinstance(e, asyncio.TimeoutError):
+                self.rejected += 1
+                raise DeadlineExceededError(f"{self.name} 대기 시간 초과") from None
+            raise
+        self.admitted += 1
+
+    async def _acquire_shared(self, timeout: Optional[float]) -> None:
+        if len(self._tickets) >= self.max_queue:
+            self.rejected += 1
+            raise QueueFullError(f"{self.name} 대기열이 가득 찼습니다 ({self.max_queue})")
+
+        # 자리가 있어도 어느 worker든 먼저 기다리는 호출이 있으면 그 뒤에서 받는다 (DB 접근은 _grant_loop 하나만)
+        self._next_ticket += 1
+        ticket = self._next_ticket
+        fut = asyncio.get_running_loop().create_future()
+        self._tickets[ticket] = (time.time(), fut)
+        if self._granter is None:
+            self._granter = asyncio.create_task(self._grant_loop())
+        else:
+            self._kick.set()
+        try:
+            await asyncio.wait_for(asyncio.shield(fut), timeout)
+        except BaseException as e:
+            if fut.done() and not fut.cancelled():
+                # 슬롯을 받은 직후 취소/타임아웃 되었으면 반납
+                await self.release()
+            else:
+                # 올려 둔 번호표는 _grant_loop가 바로 지운다
+                fut.cancel()
+                self._tickets.pop(ticket, None)
+                self._kick.set()
+            if isinstance(e, asyncio.TimeoutError):
+                self.rejected += 1
+                raise DeadlineExceededError(f"{self.name} 대기 시간 초과") from None
+            raise
+        self.admitted += 1
+
+    async def _grant_loop(self) -> None:
+        # 다른 worker가 slot을 반납해도 알림이 오지 않으므로 이 worker의 반납/성공 때 깨우거나 poll 주기마다 다시 확인
+        try:
+            while True:
+                # 확인하는 동안 들어온 반납/새 대기자 알림은 남겨 둔다
+                self._kick.clear()
+                waiting = [(ticket, arrived) for ticket, (arrived, _) in self._tickets.items()]
+                try:
+                    granted = await self.shared.grant(self.name, waiting, self.initial)
+                except sqlite3.Error as e:
+                    # 올려 둔 번호표가 남지 않도록 대기자가 없어도 다시 시도
+                    log.warn("공유 slot 확인 실패", provider=self.name, error=str(e))
+                    await asyncio.sleep(SHARED_STATE_POLL_INTERVAL)
+                    continue
+                # 다른 worker가 바꾼 limit 반영
+                self.limit = self.shared.limits.get(self.name, self.limit)
+                for ticket in granted:
+                    entry = self._tickets.pop(ticket, None)
+                    if entry is None or entry[1].done():
+                        # 그 사이 포기한 대기자 몫
+                        await self.shared.release(self.name)
+                    else:
+                        self.inflight += 1
+                        entry[1].set_result(None)
+                if not waiting and not self._tickets:
+                    # 남은 번호표까지 지운 뒤 종료
+                    return
+                if self._tickets and len(granted) < len(waiting):
+                    try:
+                        await asyncio.wait_for(self._kick.wait(), SHARED_STATE_POLL_INTERVAL)
+                    except asyncio.TimeoutError:
+                        pass
+        finally:
+            self._granter = None
+
+    async def release(self) -> None:
+        self.inflight -= 1
+        if self.shared is not None:
+            # 취소되어도 공유 slot은 반납
+            await asyncio.shield(self.shared.release(self.name))
+        self._wake()
+
+    # 대기 중인 호출이 없고 reserve개 이상 자리가 남아 있는지 (백그라운드 작업용)
+    def idle(self, reserve: int = 0) -> bool:
+        if self.shared is not None:
+            return not self._tickets and self.shared.inflight.get(self.name, 0) + reserve < int(self.limit)
+        return not self._waiters and self.inflight + reserve < int(self.limit)
+
+    def on_success(self) -> None:
+        if self.shared is not None:
+            # 공유 limit은 기다리지 않고 갱신 (다음 slot 확인 때 반영)
+            self.shared.increase_limit(self.name, float(self.max_limit))
+        else:
+            self.limit = min(float(self.max_limit), self.limit + 1.0 / self.limit)
+        self._wake()
+
+    def on_overload(self) -> None:
+        self.overloads += 1
+        if self.shared is not None:
+            self.shared.decrease_limit(self.name, float(self.min_limit))
+        else:
+            self.limit = max(float(self.min_limit), self.limit / 2)
+
+    # 재시도 없이 슬롯만 잡는 경우 (스트리밍), 결과는 limit 조절에 반영
+    @asynccontextmanager
+    async def slot(self, timeout: Optional[float] = None):
+        await self.acquire(timeout)
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            yield
+            outcome = "ok"
+        except httpx.HTTPStatusError as e:
+            outcome = str(e.response.status_code)
+            if _is_overload(e.response.status_code):
+                self.on_overload()
+            raise
+        except httpx.TimeoutException:
+            outcome = "timeout"
+            self.on_overload()
+            raise
+        except (asyncio.CancelledError, GeneratorExit):
+            # 클라이언트가 끊어서 스트림을 닫은 경우, upstream 실패가 아니므로 limit 조절/오류 집계에서 뺀다
+            outcome = "cancelled"
+            raise
+        else:
+            self.on_success()
+        finally:
+            UPSTREAM_LATENCY.observe(time.perf_counter() - start, provider=self.name, outcome=outcome)
+            if outcome not in ("ok", "cancelled"):
+                ERRORS.inc(stage="upstream", provider=self.name)
+            await self.release()
+
+    async def run(self, fn: Callable[[], Awaitable[Any]], deadline: float = RETRY_DEADLINE) -> Any:
+        """슬롯을 얻어 fn을 실행, 과부하 응답이면 Retry-After/지터 백오프로 deadline 안에서 재시도."""
+        deadline_at = time.monotonic() + deadline
+        attempt = 0
+        while True:
+            remaining = deadline_at - time.monotonic()
+            if remaining <= 0:
+                raise DeadlineExceededError(f"{self.name} 제한 시간 초과")
+
+            await self.acquire(remaining)
+            start = time.perf_counter()
+            outcome = "error"
+            try:
+                result = await fn()
+                outcome = "ok"
+            except httpx.HTTPStatusError as e:
+                outcome = str(e.response.status_code)
+                if not _is_overload(e.response.status_code):
+                    raise
+                self.on_overload()
+                error, delay = e, _retry_after(e.response)
+            except httpx.TimeoutException as e:
+                outcome = "timeout"
+                self.on_overload()
+                error, delay = e, None
+            except asyncio.CancelledError:
+                outcome = "cancelled"
+                raise
+            else:
+                self.on_success()
+                return result
+            finally:
+                UPSTREAM_LATENCY.observe(time.perf_counter() - start, provider=self.name, outcome=outcome)
+                if outcome not in ("ok", "cancelled"):
+                    ERRORS.inc(stage="upstream", provider=self.name)
+                await self.release()
+
+            attempt += 1
+            if delay is None:
+                delay = _backoff(attempt)
+            if attempt >= RETRY_MAX_ATTEMPTS or time.monotonic() + delay >= deadline_at:
+                raise error
+            self.retries += 1
+            await asyncio.sleep(delay)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limit": round(self.limit, 2),
+            "inflight": self.inflight,
+            "queued": len(self._tickets) if self.shared is not None else len(self._waiters),
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "retries": self.retries,
+            "overloads": self.overloads,
+            # 모든 worker 합계 (공유 상태를 쓸 때만)
+            "shared_inflight": self.shared.inflight.get(self.name, 0) if self.shared is not None else None,
+        }
+
+    def _wake(self) -> None:
+        if self.shared is not None:
+            # 대기자가 있으면 poll 주기를 기다리지 않고 바로 다시 확인
+            if self._tickets:
+                self._kick.set()
+            return
+        while self._waiters and self.inflight < int(self.limit):
+            fut = self._waiters.popleft()
+            if not fut.done():
+                self.inflight += 1
+                fut.set_result(None)
+
+
+# provider 이름 -> controller
+_controllers: Dict[str, AdmissionController] = {}
+
+
+def get_controller(name: str) -> AdmissionController:
+    controller = _controllers.get(name)
+    if controller is None:
+        limits = ADMISSION_PROVIDER_LIMITS.get(name, {})
+        controller = _controllers[name] = AdmissionController(
+            name,
+            initial=limits.get("initial", ADMISSION_INITIAL_LIMIT),
+            minimum=limits.get("min", ADMISSION_MIN_LIMIT),
+            maximum=limits.get("max", ADMISSION_MAX_LIMIT),
+            max_queue=limits.get("queue", ADMISSION_MAX_QUEUE),
+            shared=shared_state,
+        )
+    return controller
+
+
+def controller_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: controller.stats() for name, controller in _controllers.items()}
+
+
+# provider 하나를 동시성 제한/재시도와 함께 호출
+async def admitted_generate(name: str, prompt: str, system: Optional[str] = None) -> str:
+    provider = get_provider(name)
+    return await get_controller(name).run(lambda: provider.generate(prompt, system))
@@ -0,0 +1,50 @@
+import json
+import httpx
+from httpx_sse import aconnect_sse
+from typing import Any, AsyncIterator, Dict, List, Optional
+from llm.http_client import get_client
+
+
+# system 프롬프트를 매 요청 같은 위치(맨 앞)에 두면 backend의 prompt cache를 재사용할 수 있다
+def chat_messages(prompt: str, system: Optional[str] = None) -> List[Dict[str, str]]:
+    messages = [{"role": "system", "content": system}] if system else []
+    messages.append({"role": "user", "content": prompt})
+    return messages
+
+
+# 모든 LLM backend가 따르는 공통 비동기 인터페이스
+class Provider:
+    def __init__(self, name: str, settings: Dict[str, Any]):
+        self.name = name
+        self.url: str = settings["url"]
+        self.model: str = settings["model"]
+        self.api_key: Optional[str] = settings.get("api_key")
+        self.params: Dict[str, Any] = dict(settings.get("params", {}))
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        return get_client(self.name)
+
+    async def generate(self, prompt: str, system: Optional[str] = None) -> str:
+        raise NotImplementedError
+
+    # 토큰 단위 스트리밍, 지원하지 않는 backend는 전체 응답을 한 번에 돌려준다
+    async def stream(self, prompt: str, system: Optional[str] = None) -> AsyncIterator[str]:
+        text = await self.generate(prompt, system)
+        if text:
+            yield text
+
+
+# OpenAI 호환 chat completions 스트림 (choices[0].delta.content)
+async def stream_chat_completions(
+    client: httpx.AsyncClient, url: str, headers: Dict[str, str], payload: Dict[str, Any]
+) -> AsyncIterator[str]:
+    async with aconnect_sse(client, "POST", url, headers=headers, json={**payload, "stream": True}) as source:
+        source.response.raise_for_status()
+        async for sse in source.aiter_sse():
+            if sse.data == "[DONE]":
+                break
+            choices = json.loads(sse.data).get("choices") or []
+            content = choices[0].get("delta", {}).get("content") if choices else None
+            if content:
+                yield content
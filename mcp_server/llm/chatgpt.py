@@ -1,16 +1,31 @@
-from config import OPENAI_API_KEY
-import httpx
+from typing import Any, AsyncIterator, Dict, Optional
+from llm.base import Provider, chat_messages, stream_chat_completions
+from llm.registry import get_provider
 
-async def generate(prompt: str) -> str:
-    headers = {
-        "Authorization": f"Bearer {OPENAI_API_KEY}",
-        "Content-Type": "application/json"
-    }
-    payload = {
-        "model": "gpt-4o-mini",
-        "messages": [{"role": "user", "content": prompt}]
-    }
-    async with httpx.AsyncClient() as client:
-        res = await client.post("https://api.openai.com/v1/chat/completions", headers=headers, json=payload)
+
+class ChatGPTProvider(Provider):
+    def _headers(self) -> Dict[str, str]:
+        return {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+
+    def _payload(self, prompt: str, system: Optional[str] = None) -> Dict[str, Any]:
+        return {
+            "model": self.model,
+            "messages": chat_messages(prompt, system),
+            **self.params,
+        }
+
+    async def generate(self, prompt: str, system: Optional[str] = None) -> str:
+        res = await self.client.post(self.url, headers=self._headers(), json=self._payload(prompt, system))
         res.raise_for_status()
         return res.json()["choices"][0]["message"]["content"]
+
+    async def stream(self, prompt: str, system: Optional[str] = None) -> AsyncIterator[str]:
+        async for token in stream_chat_completions(self.client, self.url, self._headers(), self._payload(prompt, system)):
+            yield token
+
+
+async def generate(prompt: str, system: Optional[str] = None) -> str:
+    return await get_provider("chatgpt").generate(prompt, system)
@@ -0,0 +1,191 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple, TypeVar
+
+from llm.admission import AdmissionError, shared_state
+from utils.prompt import PromptTooLongError
+from logger import log
+from config import (
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_ERROR_RATE,
+    CIRCUIT_WINDOW,
+    CIRCUIT_MIN_CALLS,
+    CIRCUIT_OPEN_SECONDS,
+    CIRCUIT_HALF_OPEN_PROBES,
+    FALLBACK_CHAINS,
+)
+
+T = TypeVar("T")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class ProviderHealth:
+    """provider 하나의 상태 추적 + circuit breaker.
+
+    closed: 정상 호출. 연속 실패가 threshold 이상이거나 최근 실패율이 높으면 open.
+    open: 호출하지 않고 바로 실패, open_seconds가 지나면 half_open.
+    half_open: probe 호출 몇 개만 허용, 성공하면 closed / 실패하면 다시 open.
+    여러 worker를 공유 상태로 띄우면 한 worker가 연 circuit은 다른 worker도 남은 시간 동안 open,
+    probe가 성공해서 닫히면 같이 closed.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.consecutive_failures = 0
+        self._outcomes: Deque[bool] = deque(maxlen=CIRCUIT_WINDOW)  # True = 실패
+        self._probes = 0
+        # 마지막으로 반영한 공유 circuit의 open 시각 (time.time())
+        self._shared_opened_at = 0.0
+
+        self.successes = 0
+        self.failures = 0
+        self.short_circuits = 0
+        self.latency_ewma: Optional[float] = None
+
+    def allow(self) -> bool:
+        if shared_state is not None:
+            self._sync_shared()
+        if self.state == OPEN:
+            if time.monotonic() - self.opened_at < CIRCUIT_OPEN_SECONDS:
+                self.short_circuits += 1
+                return False
+            self.state = HALF_OPEN
+            self._probes = 0
+        if self.state == HALF_OPEN:
+            if self._probes >= CIRCUIT_HALF_OPEN_PROBES:
+                self.short_circuits += 1
+                return False
+            self._probes += 1
+        return True
+
+    def record_success(self, latency: float) -> None:
+        self.successes += 1
+        self.consecutive_failures = 0
+        self._outcomes.append(False)
+        self.latency_ewma = latency if self.latency_ewma is None else 0.8 * self.latency_ewma + 0.2 * latency
+        if self.state == HALF_OPEN:
+            self.state = CLOSED
+            self._outcomes.clear()
+            if shared_state is not None:
+                shared_state.close_circuit(self.name)
+                self._shared_opened_at = 0.0
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self.consecutive_failures += 1
+        self._outcomes.append(True)
+        if self.state == HALF_OPEN or self.consecutive_failures >= CIRCUIT_FAILURE_THRESHOLD or (
+            len(self._outcomes) >= CIRCUIT_MIN_CALLS and self.error_rate >= CIRCUIT_ERROR_RATE
+        ):
+            self._open()
+
+    # provider 책임이 아닌 이유(대기열 초과, 취소)로 끝난 호출
+    def record_ignored(self) -> None:
+        if self.state == HALF_OPEN and self._probes > 0:
+            self._probes -= 1
+
+    @property
+    def error_rate(self) -> float:
+        return sum(self._outcomes) / len(self._outcomes) if self._outcomes else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "error_rate": round(self.error_rate, 3),
+            "consecutive_failures": self.consecutive_failures,
+            "latency_ewma": round(self.latency_ewma, 3) if self.latency_ewma is not None else None,
+            "successes": self.successes,
+            "failures": self.failures,
+            "short_circuits": self.short_circuits,
+        }
+
+    def _open(self) -> None:
+        if self.state != OPEN:
+            log.warn("circuit open", provider=self.name, error_rate=self.error_rate)
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        if shared_state is not None:
+            # 기록은 기다리지 않고, 반영된 값은 다음 _sync_shared에서 받는다 (그 전에는 닫힌 것으로 보지 않게 0)
+            shared_state.open_circuit(self.name)
+            self._shared_opened_at = 0.0
+
+    # 공유 상태가 마지막으로 읽어 둔 값과 맞춘다 (DB는 guarded가 호출 직전에, 그 외에는 sync_interval마다 읽음)
+    def _sync_shared(self) -> None:
+        opened_at = shared_state.circuits.get(self.name)
+        if opened_at is None:
+            # 다른 worker의 probe가 성공해서 닫힘
+            if self.state != CLOSED and self._shared_opened_at:
+                self.state = CLOSED
+                self.consecutive_failures = 0
+                self._outcomes.clear()
+                self._shared_opened_at = 0.0
+            return
+        if opened_at > self._shared_opened_at:
+            # 다른 worker가 연 circuit: 남은 시간만큼 이 worker도 open
+            self._shared_opened_at = opened_at
+            elapsed = time.time() - opened_at
+            if elapsed < CIRCUIT_OPEN_SECONDS and self.state != OPEN:
+                self.state = OPEN
+                self.opened_at = time.monotonic() - elapsed
+
+
+# provider 이름 -> 상태
+_health: Dict[str, ProviderHealth] = {}
+
+
+def get_health(name: str) -> ProviderHealth:
+    health = _health.get(name)
+    if health is None:
+        health = _health[name] = ProviderHealth(name)
+    return health
+
+
+def health_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: health.stats() for name, health in _health.items()}
+
+
+async def guarded(name: str, fn: Callable[[], Awaitable[T]]) -> T:
+    """circuit이 열려 있으면 바로 CircuitOpenError, 아니면 fn 실행 결과를 상태에 기록."""
+    health = get_health(name)
+    if shared_state is not None:
+        await shared_state.read_circuits()
+    if not health.allow():
+        raise CircuitOpenError(f"{name}: circuit open")
+
+    start = time.monotonic()
+    try:
+        result = await fn()
+    except (AdmissionError, PromptTooLongError, asyncio.CancelledError):
+        # provider 상태와 상관없는 실패 (대기 시간 초과, 입력 예산 초과, 취소)
+        health.record_ignored()
+        raise
+    except Exception:
+        health.record_failure()
+        raise
+    health.record_success(time.monotonic() - start)
+    return result
+
+
+def fallback_chain(name: str) -> List[str]:
+    return [name] + [n for n in FALLBACK_CHAINS.get(name, []) if n != name]
+
+
+async def call_with_fallback(name: str, fn: Callable[[str], Awaitable[T]]) -> Tuple[str, T]:
+    """요청한 provider부터 fallback 순서대로 시도, (실제로 응답한 provider, 결과) 반환."""
+    errors = []
+    for candidate in fallback_chain(name):
+        try:
+            return candidate, await guarded(candidate, lambda: fn(candidate))
+        except Exception as e:
+            errors.append(f"{candidate}: {e}")
+    raise RuntimeError("사용 가능한 provider가 없습니다 - " + "; ".join(errors))
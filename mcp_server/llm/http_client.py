@@ -0,0 +1,70 @@
+import httpx
+from typing import Dict, Iterable
+from config import (
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    HTTP_KEEPALIVE_EXPIRY,
+    HTTP2,
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_READ_TIMEOUT,
+    HTTP_WRITE_TIMEOUT,
+    HTTP_POOL_TIMEOUT,
+    LLM_PROVIDERS,
+)
+from logger import log
+
+# provider 이름 -> 공유 AsyncClient
+_clients: Dict[str, httpx.AsyncClient] = {}
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def _make_client() -> httpx.AsyncClient:
+    http2 = HTTP2
+    if http2 and not _http2_available():
+        log.warn("HTTP2=true 이지만 h2 패키지가 없어 HTTP/1.1을 사용합니다.")
+        http2 = False
+
+    return httpx.AsyncClient(
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(
+            connect=HTTP_CONNECT_TIMEOUT,
+            read=HTTP_READ_TIMEOUT,
+            write=HTTP_WRITE_TIMEOUT,
+            pool=HTTP_POOL_TIMEOUT,
+        ),
+    )
+
+
+# FastAPI lifespan 시작 시 호출
+async def open_clients(names: Iterable[str] = tuple(LLM_PROVIDERS)) -> None:
+    for name in names:
+        if name not in _clients:
+            _clients[name] = _make_client()
+
+
+# FastAPI lifespan 종료 시 호출
+async def close_clients() -> None:
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        await client.aclose()
+
+
+def get_client(name: str) -> httpx.AsyncClient:
+    # lifespan 밖(스크립트 등)에서 호출되면 처음 사용할 때 생성
+    client = _clients.get(name)
+    if client is None or client.is_closed:
+        client = _clients[name] = _make_client()
+    return client
@@ -1,48 +1,56 @@
-from config import CLOVA_API_KEY
+import json
 import httpx
+from httpx_sse import aconnect_sse
+from typing import Any, AsyncIterator, Dict, Optional
+from llm.base import Provider, chat_messages
+from llm.registry import get_provider
+from logger import log
 
 
-async def generate(prompt: str) -> str:
-    headers = {
-        "Content-Type": "application/json; charset=utf-8",
-        "Authorization": f"Bearer {CLOVA_API_KEY}",
-    }
-    # payload = {
-    #     "messages": [{"role": "user", "content": prompt}],
-    #     "topP": 0.8,
-    #     "temperature": 0.7
-    # }
-    # async with httpx.AsyncClient() as client:
-    #     res = await client.post("https://clovastudio.stream.ntruss.com/testapp/v1/chat-completions/HCX-DASH-001", headers=headers, json=payload)
-    #     res.raise_for_status()
-    #     return res.json()["result"]["message"]["content"]
-
-    payload = {
-        "messages": [
-            {"role": "user", "content": prompt}
-        ],
-        "topP": 0.8,
-        "temperature": 0.7,
-        "maxTokens": 512
-    }
-
-    try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            res = await client.post(
-                "https://clovastudio.stream.ntruss.com/testapp/v3/chat-completions/HCX-005",
-                headers=headers,
-                json=payload
-            )
+class HyperClovaProvider(Provider):
+    def _headers(self) -> Dict[str, str]:
+        return {
+            "Content-Type": "application/json; charset=utf-8",
+            "Authorization": f"Bearer {self.api_key}",
+        }
+
+    def _payload(self, prompt: str, system: Optional[str] = None) -> Dict[str, Any]:
+        # topP, temperature, maxTokens 등은 config의 CLOVA_PARAMS로 조정
+        return {
+            "messages": chat_messages(prompt, system),
+            **self.params,
+        }
+
+    async def generate(self, prompt: str, system: Optional[str] = None) -> str:
+        try:
+            res = await self.client.post(self.url, headers=self._headers(), json=self._payload(prompt, system))
             res.raise_for_status()
             data = res.json()
             return data["result"]["message"]["content"]
-        
-    except httpx.HTTPStatusError as e:
-        print("[ERROR] 상태코드:", e.response.status_code)
-        print("[ERROR] 응답 내용:", e.response.text)
-    except Exception as e:
-        print("[ERROR] 예외 발생:", str(e))
-    return None
+
+        # 429/5xx 재시도 판단은 호출하는 쪽(admission)에서 하도록 예외를 다시 올린다
+        except httpx.HTTPStatusError as e:
+            log.error("hyperclova 호출 실패", status=e.response.status_code, body=e.response.text)
+            raise
+        except Exception as e:
+            log.error("hyperclova 예외 발생", error=str(e))
+            raise
+
+    # v3 스트림: event=token 마다 message.content 조각, event=result 로 종료
+    async def stream(self, prompt: str, system: Optional[str] = None) -> AsyncIterator[str]:
+        async with aconnect_sse(self.client, "POST", self.url, headers=self._headers(), json=self._payload(prompt, system)) as source:
+            source.response.raise_for_status()
+            async for sse in source.aiter_sse():
+                if sse.event == "token":
+                    content = json.loads(sse.data).get("message", {}).get("content")
+                    if content:
+                        yield content
+                elif sse.event in ("result", "error"):
+                    break
+
+
+async def generate(prompt: str, system: Optional[str] = None) -> str:
+    return await get_provider("hyperclova").generate(prompt, system)
 
 
 #"X-NCP-CLOVASTUDIO-REQUEST-ID": "cb74c8fb916a4ebbba73c47fe99e8c83"
@@ -51,4 +59,4 @@ async def generate(prompt: str) -> str:
 # https://clovastudio.stream.ntruss.com/testapp/v1/completions/HCX-005
 # https://clovastudio.stream.ntruss.com/testapp/v3/chat-completions/HCX-DASH-002
 
-# 하이퍼클로바X api는 주소가 다 다름
\ No newline at end of file
+# 하이퍼클로바X api는 주소가 다 다름
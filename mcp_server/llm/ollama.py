@@ -1,9 +1,89 @@
-from config import OLLAMA_URL, OLLAMA_MODEL
-import httpx
+import json
+import time
+from typing import Any, AsyncIterator, Dict, Optional
+from llm.base import Provider, chat_messages
+from llm.registry import get_provider
+from metrics import OLLAMA_LATENCY, OLLAMA_PROMPT_TOKENS
+from logger import log
 
-async def generate(prompt: str) -> str:
-    data = {"model": OLLAMA_MODEL, "prompt": prompt, "stream": False}
-    async with httpx.AsyncClient() as client:
-        res = await client.post(OLLAMA_URL, json=data)
+# load_duration이 이보다 길면 모델을 새로 올린 cold 호출로 본다
+COLD_LOAD_SECONDS = 0.5
+
+
+def _record_timings(data: Dict[str, Any]) -> None:
+    # Ollama의 *_duration 값은 나노초
+    if "total_duration" not in data:
+        return
+    start = "cold" if data.get("load_duration", 0) / 1e9 > COLD_LOAD_SECONDS else "warm"
+    OLLAMA_LATENCY.observe(data["total_duration"] / 1e9, start=start)
+    if "prompt_eval_count" in data:
+        OLLAMA_PROMPT_TOKENS.observe(data["prompt_eval_count"])
+
+
+class OllamaProvider(Provider):
+    def __init__(self, name: str, settings: Dict[str, Any]):
+        super().__init__(name, settings)
+        self.keep_alive = settings.get("keep_alive")
+        self.warmup: Dict[str, Any] = {}
+
+    # /api/chat: system 메시지가 항상 같은 prefix라 Ollama가 KV cache를 이어서 쓴다
+    def _payload(self, prompt: str, system: Optional[str], stream: bool) -> Dict[str, Any]:
+        data = {"model": self.model, "messages": chat_messages(prompt, system), "stream": stream, **self.params}
+        if self.keep_alive is not None:
+            data["keep_alive"] = self.keep_alive
+        return data
+
+    async def generate(self, prompt: str, system: Optional[str] = None) -> str:
+        res = await self.client.post(self.url, json=self._payload(prompt, system, False))
         res.raise_for_status()
-        return res.json()["response"]
+        data = res.json()
+        _record_timings(data)
+        return data["message"]["content"]
+
+    async def stream(self, prompt: str, system: Optional[str] = None) -> AsyncIterator[str]:
+        # stream=True 이면 한 줄에 JSON 하나씩 (message.content 조각, 마지막 줄은 done=True)
+        async with self.client.stream("POST", self.url, json=self._payload(prompt, system, True)) as res:
+            res.raise_for_status()
+            async for line in res.aiter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                content = chunk.get("message", {}).get("content")
+                if content:
+                    yield content
+                if chunk.get("done"):
+                    _record_timings(chunk)
+                    break
+
+    async def warm_up(self, system: Optional[str] = None) -> Dict[str, Any]:
+        """모델을 메모리에 올리고 system 프롬프트까지 한 번 평가해 둔다 (토큰 1개만 생성)."""
+        options = {**self.params.get("options", {}), "num_predict": 1}
+        data = {**self._payload("", system, False), "options": options}
+        if not system:
+            # 메시지가 비어 있으면 Ollama는 모델 로드만 한다
+            data["messages"] = []
+        start = time.perf_counter()
+        try:
+            res = await self.client.post(self.url, json=data)
+            res.raise_for_status()
+            body = res.json()
+            _record_timings(body)
+            self.warmup = {
+                "ok": True,
+                "seconds": round(time.perf_counter() - start, 3),
+                "load_seconds": round(body.get("load_duration", 0) / 1e9, 3),
+            }
+        except Exception as e:
+            self.warmup = {"ok": False, "seconds": round(time.perf_counter() - start, 3), "error": str(e)}
+            log.warn("ollama warm-up 실패", error=str(e))
+        else:
+            log.info("ollama warm-up 완료", **self.warmup)
+        return self.warmup
+
+
+async def generate(prompt: str, system: Optional[str] = None) -> str:
+    return await get_provider("ollama").generate(prompt, system)
+
+
+async def warm_up(system: Optional[str] = None) -> Dict[str, Any]:
+    return await get_provider("ollama").warm_up(system)
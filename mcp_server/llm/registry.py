@@ -0,0 +1,24 @@
+import importlib
+from typing import Dict, List
+from config import LLM_PROVIDERS
+from llm.base import Provider
+
+# 이름 -> 한 번 생성된 provider 인스턴스
+_providers: Dict[str, Provider] = {}
+
+
+def get_provider(name: str) -> Provider:
+    provider = _providers.get(name)
+    if provider is None:
+        settings = LLM_PROVIDERS.get(name)
+        if settings is None:
+            raise ValueError(f"Unsupported LLM: {name}")
+        # backend 모듈은 처음 사용할 때만 import
+        module_path, class_name = settings["factory"].split(":")
+        cls = getattr(importlib.import_module(module_path), class_name)
+        provider = _providers[name] = cls(name, settings)
+    return provider
+
+
+def available_providers() -> List[str]:
+    return list(LLM_PROVIDERS)
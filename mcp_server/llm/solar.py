@@ -1,23 +1,32 @@
-import httpx
-from config import UPSTAGE_API_KEY
+from typing import Any, AsyncIterator, Dict, Optional
+from llm.base import Provider, chat_messages, stream_chat_completions
+from llm.registry import get_provider
 
-async def generate(prompt: str) -> str:
-    headers = {
-        "Authorization": f"Bearer {UPSTAGE_API_KEY}",
-        "Content-Type": "application/json"
-    }
 
-    payload = {
-        "model": "solar-1-mini-chat", 
-        "messages": [{"role": "user", "content": prompt}],
-        "temperature": 0.7,
-    }
+class SolarProvider(Provider):
+    def _headers(self) -> Dict[str, str]:
+        return {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
 
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            "https://api.upstage.ai/v1/solar/chat/completions",
-            headers=headers,
-            json=payload
-        )
+    def _payload(self, prompt: str, system: Optional[str] = None) -> Dict[str, Any]:
+        return {
+            "model": self.model,
+            "messages": chat_messages(prompt, system),
+            **self.params,
+        }
+
+    async def generate(self, prompt: str, system: Optional[str] = None) -> str:
+        response = await self.client.post(self.url, headers=self._headers(), json=self._payload(prompt, system))
         response.raise_for_status()
         return response.json()["choices"][0]["message"]["content"]
+
+    # Upstage는 OpenAI 호환 스트림 형식을 사용
+    async def stream(self, prompt: str, system: Optional[str] = None) -> AsyncIterator[str]:
+        async for token in stream_chat_completions(self.client, self.url, self._headers(), self._payload(prompt, system)):
+            yield token
+
+
+async def generate(prompt: str, system: Optional[str] = None) -> str:
+    return await get_provider("solar").generate(prompt, system)
@@ -0,0 +1,164 @@
+import itertools
+import json
+import queue
+import random
+import sys
+import threading
+import time
+from typing import Any, Optional, TextIO
+from config import LOG_LEVEL, LOG_DEBUG_SAMPLE_RATE, LOG_MAX_FIELD_CHARS, LOG_QUEUE_SIZE, LOG_FLUSH_INTERVAL
+
+LEVELS = {"debug": 10, "info": 20, "warn": 30, "error": 40}
+
+_STOP = object()
+
+# 잘라서 기록할 때 dict/list 안쪽을 몇 단계, 몇 개까지 볼지
+_MAX_DEPTH = 3
+_MAX_ITEMS = 50
+# 호출마다 JSONEncoder를 새로 만들지 않도록 재사용
+_encode = json.JSONEncoder(ensure_ascii=False, default=str).encode
+# 한 번에 쓰는 줄 수 (join/인코딩하는 동안 GIL을 오래 잡지 않도록)
+_WRITE_BATCH = 256
+
+
+class StructuredLogger:
+    """요청 처리 경로에서는 필드를 잘라 한 줄로 만들어 큐에 넣기만 하고, 출력은 백그라운드 스레드가 맡는다.
+
+    긴 문자열과 dict/list 필드는 직렬화하기 전에 max_field_chars 안쪽으로 잘라서
+    인코딩 비용이 값 크기와 상관없이 작게 유지된다. writer 스레드는 flush_interval 동안 모인 줄을
+    한 번에 쓰기만 해서 GIL을 오래 잡지 않는다.
+    큐가 가득 차면 기다리지 않고 버린다 (dropped 로 집계).
+    debug 레벨은 sample_rate 비율만 남긴다.
+    """
+
+    def __init__(
+        self,
+        level: str = "info",
+        sample_rate: float = 1.0,
+        max_field_chars: int = 500,
+        max_queue: int = 50000,
+        stream: Optional[TextIO] = None,
+        flush_interval: float = 0.05,
+    ):
+        self.level = LEVELS.get(level, LEVELS["info"])
+        self.sample_rate = sample_rate
+        self.max_field_chars = max_field_chars
+        self.stream = stream
+        self.flush_interval = flush_interval
+        self.written = 0
+        self.dropped = 0
+        self.sampled_out = 0
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_queue)  # 인코딩된 줄
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def debug(self, msg: str, **fields: Any) -> None:
+        self.log("debug", msg, **fields)
+
+    def info(self, msg: str, **fields: Any) -> None:
+        self.log("info", msg, **fields)
+
+    def warn(self, msg: str, **fields: Any) -> None:
+        self.log("warn", msg, **fields)
+
+    def error(self, msg: str, **fields: Any) -> None:
+        self.log("error", msg, **fields)
+
+    def enabled(self, level: str) -> bool:
+        return LEVELS[level] >= self.level
+
+    def log(self, level: str, msg: str, **fields: Any) -> None:
+        if LEVELS[level] < self.level:
+            return
+        if level == "debug" and self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            self.sampled_out += 1
+            return
+
+        record = {"ts": time.time(), "level": level, "msg": msg}
+        for key, value in fields.items():
+            record[key] = self._truncate(value)
+        line = _encode(record)
+
+        self._ensure_writer()
+        try:
+            self._queue.put_nowait(line)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self, timeout: float = 2.0) -> None:
+        thread = self._thread
+        if thread is None:
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            pass
+        thread.join(timeout)
+        self._thread = None
+
+    def _truncate(self, value: Any) -> Any:
+        if isinstance(value, str):
+            return self._cut(value)
+        if isinstance(value, (dict, list, tuple)):
+            # 통째로 직렬화하지 않고 작게 줄인 뒤 인코딩, 결과 문자열도 max_field_chars까지
+            return self._cut(_encode(self._shrink(value, _MAX_DEPTH)))
+        return value
+
+    def _cut(self, text: str) -> str:
+        if len(text) > self.max_field_chars:
+            return text[:self.max_field_chars] + f"...(+{len(text) - self.max_field_chars})"
+        return text
+
+    def _shrink(self, value: Any, depth: int) -> Any:
+        if isinstance(value, str):
+            return value[:self.max_field_chars]
+        if isinstance(value, dict):
+            if depth <= 0:
+                return f"{{...{len(value)} keys}}"
+            items = list(itertools.islice(value.items(), _MAX_ITEMS))
+            return {str(k): self._shrink(v, depth - 1) for k, v in items}
+        if isinstance(value, (list, tuple)):
+            if depth <= 0:
+                return f"[...{len(value)} items]"
+            return [self._shrink(v, depth - 1) for v in value[:_MAX_ITEMS]]
+        return value
+
+    def _ensure_writer(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        stream = self.stream or sys.stdout
+        stop = False
+        while not stop:
+            lines = [self._queue.get()]
+            # 잠깐 기다렸다가 그 사이에 쌓인 줄을 한 번에 출력 (쓰기/깨어나는 횟수를 줄인다)
+            if lines[0] is not _STOP and self.flush_interval > 0:
+                time.sleep(self.flush_interval)
+            # 지금 쌓여 있는 만큼만 (계속 들어와도 이번 묶음은 끝낸다)
+            for _ in range(self._queue.qsize()):
+                try:
+                    lines.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if _STOP in lines:
+                stop = True
+                lines = [line for line in lines if line is not _STOP]
+            for i in range(0, len(lines), _WRITE_BATCH):
+                batch = lines[i:i + _WRITE_BATCH]
+                try:
+                    stream.write("\n".join(batch) + "\n")
+                    self.written += len(batch)
+                except Exception:
+                    pass
+            try:
+                stream.flush()
+            except Exception:
+                pass
+
+
+log = StructuredLogger(LOG_LEVEL, LOG_DEBUG_SAMPLE_RATE, LOG_MAX_FIELD_CHARS, LOG_QUEUE_SIZE, flush_interval=LOG_FLUSH_INTERVAL)
@@ -1,10 +1,64 @@
+import asyncio
+from contextlib import asynccontextmanager, nullcontext
 from fastapi import FastAPI
-from router import call_router
-from middleware import log_requests
+from router import call_router, job_manager, ResponseClass
+from middleware import RequestLogMiddleware
+from llm.http_client import open_clients, close_clients
+from llm import ollama
+from llm.admission import shared_state
+from tools.generate_problem import mcp, result_cache, problem_store, problem_pool
+from tools.prompts import get_template
+from logger import log
+from config import OLLAMA_WARMUP, MCP_TRANSPORT, MCP_PATH
 
-app = FastAPI(title="Multi LLM MCP Server")
-app.middleware("http")(log_requests)
+# MCP 클라이언트가 /call JSON 변환 없이 바로 tools/call 을 보내는 엔드포인트
+# 세션마다 요청을 동시에 처리하므로 한 세션에서 여러 tools/call 을 이어서 보내도 된다
+mcp_app = None
+if MCP_TRANSPORT == "streamable-http":
+    mcp_app = mcp.http_app(path="/")
+elif MCP_TRANSPORT == "sse":
+    mcp_app = mcp.http_app(path="/sse", transport="sse")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # provider별 커넥션 풀은 서버 수명 동안 공유
+    await open_clients()
+    if shared_state is not None:
+        await shared_state.start()
+    # 모델 로드는 수십 초 걸릴 수 있어 기동을 막지 않고 백그라운드에서
+    warmup = asyncio.create_task(ollama.warm_up(get_template().text)) if OLLAMA_WARMUP else None
+    if problem_store is not None:
+        await problem_store.start()
+    await job_manager.start()
+    if problem_pool is not None:
+        await problem_pool.start()
+    try:
+        # MCP 세션 매니저는 FastAPI lifespan 안에서 같이 띄운다 (종료 시 먼저 닫힘)
+        async with mcp_app.lifespan(mcp_app) if mcp_app is not None else nullcontext():
+            yield
+    finally:
+        if warmup is not None:
+            warmup.cancel()
+        if problem_pool is not None:
+            await problem_pool.stop()
+        await job_manager.stop()
+        if problem_store is not None:
+            await problem_store.close()
+        await close_clients()
+        if shared_state is not None:
+            await shared_state.stop()
+            shared_state.close()
+        if result_cache is not None:
+            result_cache.close()
+        log.close()
+
+
+app = FastAPI(title="Multi LLM MCP Server", lifespan=lifespan, default_response_class=ResponseClass)
+app.add_middleware(RequestLogMiddleware)
 app.include_router(call_router)
+if mcp_app is not None:
+    app.mount(MCP_PATH, mcp_app)
 
 @app.get("/")
 def root():
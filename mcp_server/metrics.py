@@ -0,0 +1,153 @@
+import bisect
+import math
+from typing import Dict, List, Sequence, Tuple
+
+# 초 단위 기본 버킷 (LLM 호출은 수십 초까지 걸릴 수 있음)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+# JSON 추출 같은 짧은 작업용
+FAST_BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1)
+
+_metrics: List["_Metric"] = []
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(names: Sequence[str], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        _metrics.append(self)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        for key, value in self._values.items():
+            lines.append(f"{self.name}{_label_text(self.labelnames, key)} {value}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [버킷별 개수(+Inf 포함), 합계, 개수]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def quantile(self, q: float, **labels: str) -> float:
+        """버킷 안에서 선형 보간한 분위수 추정 (Prometheus histogram_quantile과 같은 방식)."""
+        series = self._series.get(self._key(labels))
+        if series is None or series[2] == 0:
+            return math.nan
+        rank = q * series[2]
+        cumulative = 0
+        for i, count in enumerate(series[0]):
+            if cumulative + count >= rank and count:
+                if i == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[i - 1] if i else 0.0
+                return lower + (self.buckets[i] - lower) * (rank - cumulative) / count
+            cumulative += count
+        return self.buckets[-1]
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        result = {}
+        for key, (_, total, count) in self._series.items():
+            labels = dict(zip(self.labelnames, key))
+            name = "/".join(v for v in key if v) or "all"
+            result[name] = {
+                "count": count,
+                "mean": total / count if count else 0.0,
+                "p50": self.quantile(0.5, **labels),
+                "p95": self.quantile(0.95, **labels),
+                "p99": self.quantile(0.99, **labels),
+            }
+        return result
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        for key, (counts, total, count) in self._series.items():
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                le = 'le="%s"' % bound
+                lines.append(f"{self.name}_bucket{_label_text(self.labelnames, key, le)} {cumulative}")
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_label_text(self.labelnames, key, le)} {count}")
+            lines.append(f"{self.name}_sum{_label_text(self.labelnames, key)} {total}")
+            lines.append(f"{self.name}_count{_label_text(self.labelnames, key)} {count}")
+        return lines
+
+
+def render_metrics() -> str:
+    lines: List[str] = []
+    for metric in _metrics:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+REQUEST_LATENCY = Histogram(
+    "mcp_http_request_duration_seconds", "HTTP request latency", ("method", "path", "status")
+)
+TOOL_LATENCY = Histogram(
+    "mcp_tool_duration_seconds", "Tool call latency including cache and upstream", ("tool", "llm")
+)
+UPSTREAM_LATENCY = Histogram(
+    "mcp_upstream_duration_seconds", "Single upstream LLM call latency", ("provider", "outcome")
+)
+EXTRACT_LATENCY = Histogram(
+    "mcp_json_extract_duration_seconds", "JSON extraction time", ("provider",), buckets=FAST_BUCKETS
+)
+ERRORS = Counter("mcp_errors_total", "Errors by stage", ("stage", "provider"))
+# Ollama 응답의 load_duration으로 모델을 새로 올린 호출(cold)과 아닌 호출(warm)을 나눈다
+OLLAMA_LATENCY = Histogram(
+    "mcp_ollama_duration_seconds", "Ollama total_duration by model load state", ("start",)
+)
+# 실제로 평가된 프롬프트 토큰 수 (prefix가 재사용되면 system 프롬프트 토큰만큼 줄어든다)
+OLLAMA_PROMPT_TOKENS = Histogram(
+    "mcp_ollama_prompt_eval_tokens", "Prompt tokens evaluated per Ollama call", (),
+    buckets=(8, 16, 32, 64, 128, 256, 512, 1024, 2048, 4096),
+)
+# kind: input(실제 보낸 토큰), saved(템플릿 정리로 줄인 토큰), rejected(예산 초과로 거절한 요청의 토큰)
+PROMPT_TOKENS = Counter("mcp_prompt_tokens_total", "Estimated prompt tokens per provider", ("provider", "kind"))
+# event: hit/miss(요청 시 재고 유무), produced(미리 생성 성공), expired(ttl이 지나 버림)
+POOL_EVENTS = Counter("mcp_pool_events_total", "Pre-generated problem pool events", ("event",))
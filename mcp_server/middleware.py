@@ -1,12 +1,64 @@
-import random
 import time
-from fastapi import Request
-
-async def log_requests(request: Request, call_next):
-    request_id = random.randint(1000, 9999)
-    print(f"[{request_id}] {request.method} {request.url}")
-    start = time.time()
-    response = await call_next(request)
-    duration = time.time() - start
-    print(f"[{request_id}] Completed in {duration:.2f}s with {response.status_code}")
-    return response
+import uuid
+from starlette.routing import Mount
+from metrics import REQUEST_LATENCY
+from logger import log
+
+
+# path 라벨은 라우트 템플릿 기준 (/jobs/{id} 등) 으로 카디널리티 제한
+def _route_path(scope, app, path: str) -> str:
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    # scope["route"]는 FastAPI APIRoute만 채우므로 마운트된 앱 (MCP 등) 은 마운트 경로로
+    for mount in getattr(app, "routes", ()):
+        if isinstance(mount, Mount) and (path == mount.path or path.startswith(mount.path + "/")):
+            return mount.path
+    return "unmatched"
+
+
+class RequestLogMiddleware:
+    """요청마다 지연시간 기록 + X-Request-ID 헤더 + 완료 로그.
+
+    BaseHTTPMiddleware(app.middleware("http"))는 응답 본문을 한 번 더 중계해서
+    SSE/MCP 스트림에서 느리고 연결이 끊길 때 오류가 나므로 ASGI 수준에서 send만 감싼다.
+    지연시간은 전과 같이 응답 헤더가 나갈 때까지.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # 충돌하지 않는 요청 ID, 클라이언트가 보낸 X-Request-ID가 있으면 그대로 사용
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")
+                break
+        request_id = request_id or uuid.uuid4().hex
+        start = time.perf_counter()
+        # 마운트된 Starlette 앱이 scope["app"]을 자기 자신으로 바꾸므로 들어올 때 값을 잡아 둔다
+        app, path = scope.get("app"), scope["path"]
+
+        async def send_with_log(message):
+            if message["type"] == "http.response.start":
+                duration = time.perf_counter() - start
+                status = message["status"]
+                REQUEST_LATENCY.observe(duration, method=scope["method"], path=_route_path(scope, app, path), status=str(status))
+
+                message["headers"] = list(message.get("headers", [])) + [(b"x-request-id", request_id.encode("latin-1"))]
+                log.info(
+                    "request completed",
+                    request_id=request_id,
+                    method=scope["method"],
+                    path=scope["path"],
+                    status=status,
+                    duration=round(duration, 4),
+                )
+            await send(message)
+
+        await self.app(scope, receive, send_with_log)
@@ -1,26 +1,281 @@
+import asyncio
+import json
+import time
+from typing import Any, Dict, Optional, Type
 from fastapi import APIRouter, Request, HTTPException
-from tools.generate_problem import generate_problem_internal
+from fastapi.responses import JSONResponse, ORJSONResponse, PlainTextResponse
+from pydantic import BaseModel, ValidationError
+from sse_starlette.sse import EventSourceResponse
+from tools.generate_problem import (
+    generate_problem_internal, stream_problem_internal, check_budget, result_cache, flights, problem_store, dedup_index, problem_pool,
+)
+from llm.admission import controller_stats, shared_state
+from llm.health import health_stats
+from llm.registry import get_provider
+from utils.prompt import PromptTooLongError, prompt_stats
+from metrics import TOOL_LATENCY, UPSTREAM_LATENCY, OLLAMA_LATENCY, ERRORS, render_metrics
+from jobs import JobManager, JobQueueFullError
+from schemas import ToolCall, JobRequest, BatchRequest, validate_input
+from logger import log
+from config import (
+    BATCH_MAX_CALLS, BATCH_DEFAULT_CONCURRENCY, BATCH_PROVIDER_CONCURRENCY,
+    JOB_WORKERS, JOB_MAX_QUEUE, JOB_RESULT_TTL, JOB_MAX_WAIT, JOB_SQLITE_PATH, JSON_RESPONSE,
+)
+
+try:
+    import orjson
+except ImportError:  # 없으면 json 모듈
+    orjson = None
+
+# 응답 클래스 (main에서 FastAPI 기본값으로도 사용)
+# /call 처럼 자주 불리는 경로는 dict 대신 이 클래스를 바로 반환해 jsonable_encoder 변환을 건너뛴다
+ResponseClass = ORJSONResponse if orjson is not None and JSON_RESPONSE == "orjson" else JSONResponse
 
 call_router = APIRouter()
 
+# tool 이름 -> 내부 함수
+TOOLS = {
+    "generate_problem": generate_problem_internal,
+}
+
+# stream=True 를 지원하는 tool
+STREAM_TOOLS = {
+    "generate_problem": stream_problem_internal,
+}
+
+# 입력 토큰 예산 확인 (넘으면 PromptTooLongError)
+BUDGET_CHECKS = {
+    "generate_problem": check_budget,
+}
+
+# provider 이름 -> batch 동시 실행 제한
+_batch_limits: Dict[str, asyncio.Semaphore] = {}
+
+
+def _batch_limit(llm: str) -> asyncio.Semaphore:
+    sem = _batch_limits.get(llm)
+    if sem is None:
+        sem = _batch_limits[llm] = asyncio.Semaphore(BATCH_PROVIDER_CONCURRENCY.get(llm, BATCH_DEFAULT_CONCURRENCY))
+    return sem
+
+
+# 입력값은 빼고 (긴 프롬프트, JSON이 아닌 본문 bytes) 위치와 이유만
+def _validation_detail(e: ValidationError):
+    return e.errors(include_url=False, include_context=False, include_input=False)
+
+
+# 본문 JSON 파싱 + 모델 검증을 한 번에 (pydantic-core), 실패하면 422
+async def _parse_body(request: Request, model: Type[BaseModel]):
+    try:
+        return model.model_validate_json(await request.body())
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=_validation_detail(e))
+
+
+# 모르는 tool이면 400, 입력이 잘못되면 422, 프롬프트가 입력 예산을 넘으면 413 (모두 LLM을 호출하기 전에)
+def _tool_input(tool: str, input_data: Dict[str, Any]) -> Dict[str, Any]:
+    if tool not in TOOLS:
+        raise HTTPException(status_code=400, detail=f"Unknown tool: {tool}")
+    try:
+        input_data = validate_input(tool, input_data)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=_validation_detail(e))
+    try:
+        if tool in BUDGET_CHECKS:
+            BUDGET_CHECKS[tool](input_data)
+    except PromptTooLongError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    return input_data
+
+
 @call_router.post("/call")
 async def handle_call(request: Request):
+    call = await _parse_body(request, ToolCall)
+    input_data = _tool_input(call.tool, call.input)
+    # debug 로그는 LOG_DEBUG_SAMPLE_RATE 비율만 기록
+    log.debug("/call request", tool=call.tool, input=input_data)
+
+    if call.stream and call.tool in STREAM_TOOLS:
+        return EventSourceResponse(_stream_events(STREAM_TOOLS[call.tool], input_data))
+
+    try:
+        result = await _run_tool(call.tool, input_data)
+    except Exception as e:
+        log.error("Exception in /call", error=str(e))
+        raise HTTPException(status_code=500, detail=f"Internal error: {str(e)}")
+    log.debug("/call result", tool=call.tool, output=result)
+    return ResponseClass({"output": result})
+
+
+def _llm_label(input_data: Dict[str, Any]) -> str:
+    llm = input_data.get("llm", "")
+    return ",".join(map(str, llm)) if isinstance(llm, list) else str(llm)
+
+
+# tool 실행 + 지연시간/실패 기록
+async def _run_tool(tool: str, input_data: Dict[str, Any]) -> Any:
+    llm = _llm_label(input_data)
+    start = time.perf_counter()
     try:
-        print("[DEBUG] /call endpoint hit")
+        result = await TOOLS[tool](input_data)
+    except Exception:
+        ERRORS.inc(stage="tool", provider=llm)
+        raise
+    finally:
+        TOOL_LATENCY.observe(time.perf_counter() - start, tool=tool, llm=llm)
+    if result is None:
+        ERRORS.inc(stage="tool", provider=llm)
+    return result
+
 
-        body = await request.json()
-        print(f"[DEBUG] Request body: {body}")
+# 오래 걸리는 생성은 /jobs 로 받아 연결과 상관없이 worker가 실행 (main lifespan에서 start/stop)
+# 여러 worker가 같은 job DB를 쓰면 재시작 후 복원은 한 worker만
+job_manager = JobManager(
+    _run_tool, JOB_WORKERS, JOB_MAX_QUEUE, JOB_RESULT_TTL, JOB_SQLITE_PATH,
+    restore=(lambda: shared_state.claim("jobs_restore")) if shared_state is not None else None,
+)
 
-        tool = body.get("tool")
-        input_data = body.get("input", {})
-        print(f"[DEBUG] tool: {tool}, input: {input_data}")
 
-        if tool == "generate_problem":
-            result = await generate_problem_internal(input_data)
-            print(f"[DEBUG] Generated problem result: {result}")
-            return {"output": result}
-        else:
-            raise HTTPException(status_code=400, detail=f"Unknown tool: {tool}")
+# token 이벤트는 도착하는 대로, 마지막에 파싱된 문제를 result 이벤트로 전송
+async def _stream_events(stream_fn, input_data: Dict[str, Any]):
+    try:
+        async for event in stream_fn(input_data):
+            yield {"event": event["event"], "data": json.dumps(event["data"], ensure_ascii=False)}
     except Exception as e:
-        print(f"[ERROR] Exception in /call: {str(e)}") 
-        raise HTTPException(status_code=500, detail=f"Internal error: {str(e)}")
+        log.error("Exception in /call stream", error=str(e))
+        yield {"event": "error", "data": json.dumps({"detail": str(e)}, ensure_ascii=False)}
+
+
+# batch 항목 하나 실행, 실패해도 예외 대신 항목별 error로 반환
+async def _run_batch_item(index: int, call: ToolCall) -> Dict[str, Any]:
+    if call.tool not in TOOLS:
+        return {"index": index, "output": None, "error": f"Unknown tool: {call.tool}"}
+    try:
+        input_data = validate_input(call.tool, call.input)
+    except ValidationError as e:
+        return {"index": index, "output": None, "error": "Invalid input", "detail": _validation_detail(e)}
+
+    try:
+        async with _batch_limit(_llm_label(input_data)):
+            result = await _run_tool(call.tool, input_data)
+    except Exception as e:
+        log.error("Exception in /call/batch", index=index, error=str(e))
+        return {"index": index, "output": None, "error": str(e)}
+
+    if result is None:
+        return {"index": index, "output": None, "error": "Generation failed"}
+    return {"index": index, "output": result}
+
+
+@call_router.post("/call/batch")
+async def handle_batch(request: Request):
+    body = await _parse_body(request, BatchRequest)
+    calls = body.calls
+    if len(calls) > BATCH_MAX_CALLS:
+        raise HTTPException(status_code=400, detail=f"Too many calls: {len(calls)} > {BATCH_MAX_CALLS}")
+
+    # stream=True 이면 끝나는 순서대로 SSE 이벤트로 전송
+    if body.stream:
+        async def events():
+            tasks = [asyncio.create_task(_run_batch_item(i, call)) for i, call in enumerate(calls)]
+            try:
+                for next_done in asyncio.as_completed(tasks):
+                    item = await next_done
+                    yield {"event": "result", "data": json.dumps(item, ensure_ascii=False)}
+                yield {"event": "done", "data": json.dumps({"count": len(tasks)})}
+            finally:
+                # 클라이언트 연결이 끊기면 남은 작업 취소
+                for task in tasks:
+                    task.cancel()
+
+        return EventSourceResponse(events())
+
+    results = await asyncio.gather(*(_run_batch_item(i, call) for i, call in enumerate(calls)))
+    return ResponseClass({"outputs": results})
+
+
+@call_router.post("/jobs", status_code=202)
+async def handle_submit_job(request: Request):
+    body = await _parse_body(request, JobRequest)
+    input_data = _tool_input(body.tool, body.input)
+    try:
+        job = await job_manager.submit(body.tool, input_data, body.priority)
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return {"job_id": job.id, "status": job.status}
+
+
+# wait > 0 이면 job이 끝나거나 wait초가 지날 때까지 응답을 미룬다 (long-poll)
+@call_router.get("/jobs/{job_id}")
+async def handle_get_job(job_id: str, wait: float = 0):
+    job = await job_manager.find(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    job = await job_manager.wait(job, min(wait, JOB_MAX_WAIT))
+    return job.to_dict()
+
+
+@call_router.delete("/jobs/{job_id}")
+async def handle_cancel_job(job_id: str):
+    job = await job_manager.find(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    if job.remote:
+        # 실행 중인 task는 job을 받은 worker에만 있다
+        raise HTTPException(status_code=409, detail=f"Job {job_id} is handled by another worker")
+    await job_manager.cancel(job)
+    return job.to_dict()
+
+
+# 저장된 문제 조회: category는 앞부분 일치, q는 title/content 검색, before는 이전 페이지 마지막 id
+@call_router.get("/problems")
+async def handle_list_problems(
+    category: Optional[str] = None,
+    type: Optional[str] = None,
+    q: Optional[str] = None,
+    limit: int = 20,
+    before: Optional[str] = None,
+):
+    if problem_store is None:
+        raise HTTPException(status_code=404, detail="Problem store is disabled")
+    limit = max(1, min(limit, 100))
+    problems = await problem_store.search(category, type, q, limit, before)
+    return {"problems": problems, "next": problems[-1]["id"] if len(problems) == limit else None}
+
+
+@call_router.get("/problems/{problem_id}")
+async def handle_get_problem(problem_id: str):
+    problem = await problem_store.get(problem_id) if problem_store is not None else None
+    if problem is None:
+        raise HTTPException(status_code=404, detail=f"Unknown problem: {problem_id}")
+    return problem
+
+
+@call_router.get("/stats")
+async def handle_stats():
+    return {
+        "cache": result_cache.stats() if result_cache is not None else None,
+        "singleflight": flights.stats() if flights is not None else None,
+        "providers": controller_stats(),
+        "shared": shared_state.stats() if shared_state is not None else None,
+        "health": health_stats(),
+        "prompt": prompt_stats(),
+        "jobs": job_manager.stats(),
+        "problems": problem_store.stats() if problem_store is not None else None,
+        "dedup": dedup_index.stats() if dedup_index is not None else None,
+        "pool": problem_pool.stats() if problem_pool is not None else None,
+        "log": {"written": log.written, "dropped": log.dropped, "sampled_out": log.sampled_out},
+        "latency": {
+            "tool": TOOL_LATENCY.summary(),
+            "upstream": UPSTREAM_LATENCY.summary(),
+            # cold: 모델 로드가 포함된 호출, warm: 이미 올라가 있던 호출
+            "ollama": OLLAMA_LATENCY.summary(),
+        },
+        "ollama_warmup": get_provider("ollama").warmup,
+    }
+
+
+# Prometheus text 형식
+@call_router.get("/metrics")
+async def handle_metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,108 @@
+from typing import Any, Dict, List, Literal, Optional, Union
+from pydantic import BaseModel, ConfigDict, Field, field_validator, model_validator
+from llm.registry import available_providers
+from tools.prompts import TEMPLATES
+
+# 요청/응답 모델 (pydantic v2). 요청은 LLM을 호출하기 전에 여기서 검증한다
+
+
+class Problem(BaseModel):
+    """생성된 문제. LLM이 돌려준 JSON에 서버가 붙이는 필드(id, provider 등)도 포함."""
+
+    model_config = ConfigDict(extra="allow")
+
+    title: str = Field(min_length=1)
+    content: str = Field(min_length=1)
+    type: Literal["select", "write"]
+    # 보통 문자열, 여러 개를 고르는 문제 등은 목록
+    answer: Union[str, List[Any]]
+    category: str = Field(min_length=1)
+    id: Optional[str] = None
+    provider: Optional[str] = None
+    duplicate_of: Optional[str] = None
+    similarity: Optional[float] = None
+
+    # 객관식 정답을 숫자로 주는 모델이 많아 문자열로 맞춘다
+    @field_validator("answer", mode="before")
+    @classmethod
+    def _answer_text(cls, value: Any) -> Any:
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return str(value)
+        return value
+
+    @field_validator("answer")
+    @classmethod
+    def _answer_not_empty(cls, value: Union[str, List[Any]]) -> Union[str, List[Any]]:
+        if not value:
+            raise ValueError("answer is empty")
+        return value
+
+
+class GenerateProblemInput(BaseModel):
+    """generate_problem tool 입력. prompt 또는 category 중 하나는 있어야 한다."""
+
+    model_config = ConfigDict(extra="forbid")
+
+    prompt: str = ""
+    # provider 이름, "race", 또는 경쟁시킬 provider 목록
+    llm: Union[str, List[str]]
+    lang: Optional[str] = None
+    category: Optional[str] = None
+    type: Optional[Literal["select", "write"]] = None
+    no_cache: bool = False
+    pool: bool = True
+    hedge_delay: Optional[float] = Field(default=None, ge=0)
+    stream: bool = False
+
+    @field_validator("llm")
+    @classmethod
+    def _known_llm(cls, value: Union[str, List[str]]) -> Union[str, List[str]]:
+        names = value if isinstance(value, list) else [] if value == "race" else [value]
+        if isinstance(value, list) and not value:
+            raise ValueError("llm list is empty")
+        for name in names:
+            if name not in available_providers():
+                raise ValueError(f"Unsupported LLM: {name}")
+        return value
+
+    @field_validator("lang")
+    @classmethod
+    def _known_lang(cls, value: Optional[str]) -> Optional[str]:
+        if value is not None and value not in TEMPLATES:
+            raise ValueError(f"Unsupported lang: {value}")
+        return value
+
+    @model_validator(mode="after")
+    def _prompt_or_category(self) -> "GenerateProblemInput":
+        if not self.prompt.strip() and not self.category:
+            raise ValueError("prompt or category is required")
+        return self
+
+
+# tool 이름 -> 입력 모델
+TOOL_INPUTS = {
+    "generate_problem": GenerateProblemInput,
+}
+
+
+def validate_input(tool: str, data: Any) -> Dict[str, Any]:
+    """tool 입력을 검증해서 내부 함수에 넘길 dict로 (지정하지 않은 값은 빼서 기본값 처리를 그대로 둔다).
+
+    형식이 맞지 않으면 pydantic.ValidationError (ValueError 하위 클래스).
+    """
+    return TOOL_INPUTS[tool].model_validate(data).model_dump(exclude_none=True)
+
+
+class ToolCall(BaseModel):
+    tool: str
+    input: Dict[str, Any] = Field(default_factory=dict)
+    stream: bool = False
+
+
+class JobRequest(ToolCall):
+    priority: int = 0
+
+
+class BatchRequest(BaseModel):
+    calls: List[ToolCall]
+    stream: bool = False
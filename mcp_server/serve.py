@@ -0,0 +1,71 @@
+"""서버 실행 CLI (mcp_server 디렉토리에서).
+
+    python serve.py                          # 사용 가능한 CPU 코어 수만큼 worker
+    python serve.py --workers 1              # 프로세스 하나 (uvicorn main:app 과 같음)
+    python serve.py --workers 4 --port 8000
+
+worker가 2개 이상이면 provider 동시 호출 수/AIMD limit/circuit (SHARED_STATE_PATH), 결과 캐시 (CACHE_SQLITE_PATH),
+job (JOB_SQLITE_PATH)을 SQLite 파일로 공유해서 worker를 늘려도 upstream 호출이 worker 수만큼 늘거나
+캐시 적중률이 나뉘지 않는다. 이미 설정한 환경변수는 그대로 쓴다 (빈 값으로 두면 공유하지 않음).
+공유 상태 파일은 worker를 띄우기 전에 비운다 (지난 실행의 limit/slot/circuit이 남지 않게).
+"""
+import argparse
+import os
+
+import uvicorn
+from utils.shared_state import reset_state
+from config import WEB_HOST, WEB_PORT, WEB_WORKERS, LOG_LEVEL
+
+# worker 여러 개일 때 설정되지 않았으면 채우는 공유 파일
+SHARED_DEFAULTS = {
+    "SHARED_STATE_PATH": "shared_state.db",
+    "CACHE_SQLITE_PATH": "result_cache.db",
+    "JOB_SQLITE_PATH": "jobs.db",
+}
+
+
+def cpu_count() -> int:
+    # 컨테이너/taskset으로 제한된 경우 실제로 쓸 수 있는 코어 수
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def resolve_workers(value: str) -> int:
+    if value in ("", "0", "auto"):
+        return cpu_count()
+    return max(1, int(value))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Multi LLM MCP Server")
+    parser.add_argument("--host", default=WEB_HOST)
+    parser.add_argument("--port", type=int, default=WEB_PORT)
+    parser.add_argument("--workers", default=WEB_WORKERS, help="worker 프로세스 수, auto면 CPU 코어 수")
+    args = parser.parse_args()
+
+    workers = resolve_workers(str(args.workers))
+    # worker 프로세스는 환경변수를 물려받아 config를 다시 읽는다
+    os.environ["WEB_WORKERS"] = str(workers)
+    if workers > 1:
+        for name, default in SHARED_DEFAULTS.items():
+            os.environ.setdefault(name, default)
+    # 설정이 바뀌었으면 (ADMISSION_PROVIDER_LIMITS 등) 새 값으로 시작하도록
+    if os.environ.get("SHARED_STATE_PATH"):
+        reset_state(os.environ["SHARED_STATE_PATH"])
+    print(f"Starting {workers} worker(s) on http://{args.host}:{args.port}")
+
+    uvicorn.run(
+        "main:app",
+        host=args.host,
+        port=args.port,
+        workers=workers,
+        log_level="warning" if LOG_LEVEL == "warn" else LOG_LEVEL,
+        # 요청 로그는 RequestLogMiddleware가 남긴다
+        access_log=False,
+    )
+
+
+if __name__ == "__main__":
+    main()
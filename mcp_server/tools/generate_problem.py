@@ -1,124 +1,340 @@
-from fastmcp import FastMCP
-from typing import Dict, Any
-from utils.json_extractor import extract_json_from_text
-from llm import ollama, chatgpt, hyperclova, solar
+import asyncio
+import time
+from contextlib import aclosing
+from fastmcp import FastMCP, Context
+from typing import Dict, Any, AsyncIterator, List, Optional
+from utils.json_extractor import JsonStreamExtractor, PARSING_ERROR, extract_json_from_text, is_parsing_error
+from utils.cache import ResultCache, make_key
+from utils.singleflight import SingleFlight
+from utils.prompt import PromptTooLongError, check_prompt, fit_prompt
+from utils.problem_store import ProblemStore
+from utils.dedup import DuplicateIndex
+from utils.pool import ProblemPool, PoolKey
+from llm.registry import get_provider, available_providers
+from llm.admission import AdmissionError, get_controller, admitted_generate, shared_state
+from llm.health import call_with_fallback, fallback_chain, get_health, guarded, CircuitOpenError, CLOSED
+from tools.race import race_generate, is_valid_problem
+from schemas import validate_input
+from tools.prompts import get_template, category_prompt, AVOID_DUPLICATE
+from metrics import ERRORS
+from logger import log
+from config import (
+    CACHE_ENABLED, CACHE_MAX_ENTRIES, CACHE_MAX_BYTES, CACHE_TTL, CACHE_SQLITE_PATH,
+    PROMPT_NORMALIZE, SINGLEFLIGHT_ENABLED, SINGLEFLIGHT_WINDOW, RETRY_DEADLINE,
+    RACE_PROVIDERS, HEDGE_DELAY, PROBLEM_STORE_PATH, PROBLEM_STORE_BATCH_SIZE, PROBLEM_STORE_FLUSH_INTERVAL,
+    DEDUP_MODE, DEDUP_THRESHOLD, DEDUP_WINDOW, DEDUP_MAX_ITEMS, DEDUP_MAX_RETRIES,
+    MCP_STATELESS, MCP_JSON_RESPONSE, PROMPT_LANG, PREGEN_POOLS, PREGEN_WATERMARK, PREGEN_TTL, PREGEN_CONCURRENCY, PREGEN_RESERVE, PREGEN_INTERVAL,
+    WEB_WORKERS,
+)
 
-mcp = FastMCP("multi-llm-problem-gen")
+mcp = FastMCP("multi-llm-problem-gen", stateless_http=MCP_STATELESS, json_response=MCP_JSON_RESPONSE)
+
+result_cache = ResultCache(CACHE_MAX_ENTRIES, CACHE_MAX_BYTES, CACHE_TTL, CACHE_SQLITE_PATH) if CACHE_ENABLED else None
+flights = SingleFlight(SINGLEFLIGHT_WINDOW) if SINGLEFLIGHT_ENABLED else None
+problem_store = (
+    ProblemStore(PROBLEM_STORE_PATH, PROBLEM_STORE_BATCH_SIZE, PROBLEM_STORE_FLUSH_INTERVAL) if PROBLEM_STORE_PATH else None
+)
+
+dedup_index = (
+    DuplicateIndex(threshold=DEDUP_THRESHOLD, window=DEDUP_WINDOW, max_items=DEDUP_MAX_ITEMS) if DEDUP_MODE != "off" else None
+)
+
+
+# 새로 생성된 문제에 서버 id를 붙여 저장 (캐시에도 id가 붙은 채로 들어가 같은 결과는 같은 id)
+# 문제 스키마(schemas.Problem)에 맞지 않는 JSON은 파싱 실패와 같이 처리 (저장/중복 인덱스/캐시에 넣지 않음)
+def _checked(result: Dict[str, Any], provider: str) -> Dict[str, Any]:
+    if is_parsing_error(result) or is_valid_problem(result):
+        return result
+    ERRORS.inc(stage="extract", provider=provider)
+    log.warn("문제 형식이 아닌 응답", provider=provider, keys=list(result)[:10])
+    return dict(PARSING_ERROR)
+
+
+def _store(result: Dict[str, Any]) -> None:
+    if problem_store is not None and not is_parsing_error(result):
+        result["id"] = problem_store.add(result)
+
+
+# (서명, 같은 category의 비슷한 기존 문제 ((id, title), 유사도) 또는 None)
+def _find_duplicate(result: Dict[str, Any]):
+    if dedup_index is None or is_parsing_error(result):
+        return None, None
+    sig = dedup_index.signature(f"{result.get('title', '')}\n{result.get('content', '')}")
+    return sig, dedup_index.query(str(result.get("category", "")), sig)
+
+
+# 저장 후 호출: 중복이면 표시만, 아니면 다음 비교 대상으로 인덱스에 추가
+def _remember(result: Dict[str, Any], sig, duplicate) -> None:
+    if duplicate is not None:
+        (duplicate_id, _), similarity = duplicate
+        result["duplicate_of"] = duplicate_id
+        result["similarity"] = similarity
+    elif sig is not None:
+        dedup_index.add(str(result.get("category", "")), sig, (result.get("id"), result.get("title")))
+
+
+def _pool_key(input: Dict[str, Any]) -> PoolKey:
+    return (
+        str(input.get("category", "")), str(input.get("type") or ""), str(input.get("llm", "")),
+        input.get("lang") or PROMPT_LANG,
+    )
+
+
+# 재고 하나를 만드는 함수: fallback 없이 해당 provider로만 (다른 provider 자리를 쓰지 않도록)
+async def _pregenerate(key: PoolKey) -> Optional[Dict[str, Any]]:
+    category, type, llm, lang = key
+    template = get_template(lang)
+    prompt = fit_prompt(llm, category_prompt(template, category, type), template)
+    raw = await guarded(llm, lambda: admitted_generate(llm, prompt, template.text))
+    result = _checked(await extract_json_from_text(raw, llm), llm)
+    if is_parsing_error(result):
+        return None
+    result["provider"] = llm
+    return result
+
+
+# circuit이 닫혀 있고 실제 요청 몫(PREGEN_RESERVE)을 빼고도 동시 호출 자리가 남을 때만 미리 생성
+def _provider_idle(name: str) -> bool:
+    return get_health(name).state == CLOSED and get_controller(name).idle(PREGEN_RESERVE)
+
+
+def _make_pool() -> Optional[ProblemPool]:
+    keys = []
+    for spec in PREGEN_POOLS:
+        key = _pool_key(spec)
+        if key[2] not in available_providers():
+            log.warn("PREGEN_POOLS: 알 수 없는 llm이라 건너뜁니다", llm=key[2])
+            continue
+        keys.append(key)
+    if not keys:
+        return None
+    # 재고는 worker마다 따로라서 여러 worker로 띄우면 나눠 가진다 (합계가 PREGEN_WATERMARK 정도)
+    workers = int(WEB_WORKERS) if WEB_WORKERS.isdigit() else 1
+    watermark = max(1, -(-PREGEN_WATERMARK // max(1, workers)))
+    return ProblemPool(
+        _pregenerate, _provider_idle, keys, watermark, PREGEN_TTL, PREGEN_CONCURRENCY, PREGEN_INTERVAL
+    )
 
-# 내부에서 호출 가능한 함수
-async def generate_problem_internal(input: Dict[str, Any]) -> Dict[str, Any]:
-    prompt = input.get("prompt", "")
-    llm = input.get("llm", "")
 
-    system_prompt = '''
-                    당신은 교육용 문제를 생성하는 인공지능입니다.  
-                    사용자의 요청에 따라 문제를 생성하세요.  
-                    문제 유형은 다음 중 하나입니다:  
-                    - 객관식 문제일 경우: "select"  
-                    - 서술형 문제일 경우: "write"
+problem_pool = _make_pool()
 
-                    당신의 응답은 반드시 아래 형식의 유효한 JSON 객체여야 하며, 그 외 설명이나 텍스트는 절대 포함하지 마세요:
 
-                    {
-                    "title": "문제의 간단한 제목",
-                    "content": "문제의 전체 내용 또는 질문",
-                    "type": "select 또는 write 중 하나",
-                    "answer": "문제의 정답",
-                    "category": "과목/주제/세부주제 형식의 분류 (예: 수학/확률과통계/조건부확률)"
-                    }
+# 재고에서 꺼낸 문제는 이때 id를 받고 중복 검사 대상이 된다 (캐시에는 넣지 않음)
+def _take_pooled(input: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    if problem_pool is None or not input.get("pool", True):
+        return None
+    result = problem_pool.take(_pool_key(input))
+    if result is not None:
+        sig, duplicate = _find_duplicate(result)
+        _store(result)
+        _remember(result, sig, duplicate)
+    return result
+
 
-                    만약 "select" 유형의 문제를 만들었다면, content 안에 반드시 보기 4개를 아래와 같이 포함해야 합니다:
+def _race_providers(llm: Any) -> List[str]:
+    if isinstance(llm, list):
+        return [str(name) for name in llm]
+    if llm == "race":
+        return list(RACE_PROVIDERS)
+    return []
 
-                    1) 보기1  
-                    2) 보기2  
-                    3) 보기3  
-                    4) 보기4  
 
-                    "answer" 필드는 위 보기 중 정답 번호 하나로 작성하세요 (예: "2").
+def check_budget(input: Dict[str, Any]) -> None:
+    """요청한 prompt가 호출할 수 있는 어느 provider의 입력 예산에도 들어가지 않으면 호출 전에 PromptTooLongError."""
+    prompt = input.get("prompt", "")
+    if not prompt:
+        return
+    template = get_template(input.get("lang"))
+    llm = input.get("llm", "")
+    error = None
+    for name in _race_providers(llm) or fallback_chain(llm):
+        try:
+            check_prompt(name, prompt, template)
+            return
+        except PromptTooLongError as e:
+            # 요청한 (첫) provider 기준으로 알려준다
+            error = error or e
+    raise error
 
-                    주의사항:
-                    - 절대 JSON 외의 설명이나 텍스트를 포함하지 마세요.
-                    - id 필드는 만들지 마세요. 서버에서 자동 생성됩니다.
-                    - 응답은 반드시 파싱 가능한 JSON이어야 합니다.
-                    '''
 
-    full_prompt = f"{system_prompt}\n\n{prompt}"
+# 내부에서 호출 가능한 함수
+async def generate_problem_internal(input: Dict[str, Any]) -> Dict[str, Any]:
+    prompt = input.get("prompt", "")
+    llm = input.get("llm", "")
+    # no_cache=True 이면 캐시를 읽지 않고 새로 생성한 결과로 갱신
+    no_cache = bool(input.get("no_cache", False))
 
     try:
-        if llm == "ollama":
-            raw = await ollama.generate(full_prompt)
-        elif llm == "chatgpt":
-            raw = await chatgpt.generate(full_prompt)
-        elif llm == "hyperclova":
-            raw = await hyperclova.generate(full_prompt)
-        elif llm == "solar":
-            raw = await solar.generate(full_prompt)
+        check_budget(input)
+        # lang: "ko" | "en" (없으면 PROMPT_LANG)
+        template = get_template(input.get("lang"))
+        if not prompt and input.get("category"):
+            # prompt 없이 category(+type)만 주면 미리 만들어 둔 재고에서 바로 꺼내고 (pool=False면 건너뜀),
+            # 재고가 없으면 같은 요청문으로 바로 생성
+            result = _take_pooled(input)
+            if result is not None:
+                return result
+            prompt = category_prompt(template, str(input["category"]), input.get("type"))
+        # llm이 리스트이거나 "race"이면 여러 provider 중 가장 빠른 유효 응답을 사용
+        race = _race_providers(llm)
+        if race:
+            providers = [get_provider(name) for name in race]
+            hedge_delay = float(input.get("hedge_delay", HEDGE_DELAY))
+            key = make_key(
+                "race:" + ",".join(race),
+                ",".join(p.model for p in providers),
+                prompt,
+                {p.name: p.params for p in providers},
+                PROMPT_NORMALIZE,
+                template.key,
+            )
         else:
-            raise ValueError(f"Unsupported LLM: {llm}")
+            # 등록되지 않은 llm이면 ValueError
+            provider = get_provider(llm)
+            key = make_key(llm, provider.model, prompt, provider.params, PROMPT_NORMALIZE, template.key)
+
+        if result_cache is not None and not no_cache:
+            cached = await result_cache.get(key)
+            if cached is not None:
+                return cached
 
-        return await extract_json_from_text(raw)
+        async def generate(user_prompt: str) -> Dict[str, Any]:
+            if race:
+                served_by, result = await race_generate(race, user_prompt, template, hedge_delay)
+            else:
+                # provider별 동시성 제한 + 429/5xx 재시도, circuit이 열려 있거나 실패하면 fallback 순서대로
+                # 입력 예산은 provider마다 달라서 실제로 호출할 provider 기준으로 확인 (넘으면 다음 fallback)
+                served_by, raw = await call_with_fallback(
+                    llm, lambda name: admitted_generate(name, fit_prompt(name, user_prompt, template), template.text)
+                )
+                # race는 race_generate 안에서 이미 확인
+                result = _checked(await extract_json_from_text(raw, served_by), served_by)
+            # 실제로 응답한 provider
+            result["provider"] = served_by
+            return result
 
+        async def call_upstream() -> Dict[str, Any]:
+            result = await generate(prompt)
+            sig, duplicate = _find_duplicate(result)
+            retries = 0
+            while duplicate is not None and DEDUP_MODE == "regenerate" and retries < DEDUP_MAX_RETRIES:
+                # 겹친 문제 제목을 알려주고 다시 생성
+                retries += 1
+                (_, title), _ = duplicate
+                result = await generate(f"{prompt}\n\n{AVOID_DUPLICATE[template.name].format(title=title)}")
+                sig, duplicate = _find_duplicate(result)
+            _store(result)
+            _remember(result, sig, duplicate)
+            # fallback provider의 결과는 요청한 provider의 키로 캐시하지 않는다 (복구된 뒤에도 계속 나가지 않게)
+            fallback = not race and result["provider"] != llm
+            if result_cache is not None and not is_parsing_error(result) and not fallback:
+                await result_cache.set(key, result)
+            return result
+
+        # 같은 요청이 이미 진행 중이면 upstream 호출 하나를 공유
+        if flights is not None:
+            return await flights.do(key, call_upstream)
+        return await call_upstream()
+
+    except PromptTooLongError:
+        # 잘못된 요청이라 실패(None)가 아니라 그대로 올려서 413
+        raise
     except Exception as e:
-        print(f"[ERROR] LLM 호출 실패: {str(e)}")
+        log.error("LLM 호출 실패", llm=str(llm), error=str(e))
         return None
 
 
+# 토큰 스트리밍 버전: {"event": "token", "data": 텍스트}를 도착하는 대로 내보내고
+# 마지막에 {"event": "result", "data": 문제 객체}를 보낸다 (single-flight는 거치지 않음)
+async def stream_problem_internal(input: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+    prompt = input.get("prompt", "")
+    llm = input.get("llm", "")
+    no_cache = bool(input.get("no_cache", False))
+    if _race_providers(llm):
+        raise ValueError("stream 모드는 하나의 llm만 지원합니다")
+
+    template = get_template(input.get("lang"))
+    if not prompt and input.get("category"):
+        # 재고가 있으면 토큰 없이 결과만
+        result = _take_pooled(input)
+        if result is not None:
+            yield {"event": "result", "data": result}
+            return
+        prompt = category_prompt(template, str(input["category"]), input.get("type"))
+    provider = get_provider(llm)
+    key = make_key(llm, provider.model, prompt, provider.params, PROMPT_NORMALIZE, template.key)
+
+    if result_cache is not None and not no_cache:
+        cached = await result_cache.get(key)
+        if cached is not None:
+            yield {"event": "result", "data": cached}
+            return
+
+    # 토큰을 이미 내보낸 뒤에는 다른 provider로 넘어갈 수 없으므로 circuit이 닫힌 첫 provider 하나만 사용
+    if shared_state is not None:
+        await shared_state.read_circuits()
+    served_by = next((name for name in fallback_chain(llm) if get_health(name).allow()), None)
+    if served_by is None:
+        raise CircuitOpenError(f"{llm}: circuit open")
+    health = get_health(served_by)
+    provider = get_provider(served_by)
+    prompt = fit_prompt(served_by, prompt, template)
+
+    # 객체가 닫히는 순간 결과를 확정하고 upstream 스트림은 더 읽지 않는다
+    extractor = JsonStreamExtractor()
+    start = time.monotonic()
+    try:
+        async with get_controller(served_by).slot(RETRY_DEADLINE):
+            async with aclosing(provider.stream(prompt, template.text)) as tokens:
+                async for token in tokens:
+                    yield {"event": "token", "data": token}
+                    if extractor.feed(token) is not None:
+                        break
+    except (AdmissionError, asyncio.CancelledError, GeneratorExit):
+        health.record_ignored()
+        raise
+    except Exception:
+        health.record_failure()
+        raise
+    health.record_success(time.monotonic() - start)
+
+    if extractor.result is not None:
+        result = _checked(extractor.result, served_by)
+    else:
+        ERRORS.inc(stage="extract", provider=served_by)
+        result = dict(PARSING_ERROR)
+    result["provider"] = served_by
+    # 이미 토큰을 보낸 뒤라 다시 생성할 수 없어 중복 표시만
+    sig, duplicate = _find_duplicate(result)
+    _store(result)
+    _remember(result, sig, duplicate)
+    if result_cache is not None and not is_parsing_error(result) and served_by == llm:
+        await result_cache.set(key, result)
+    yield {"event": "result", "data": result}
+
+
 # MCP에서 사용할 툴 등록
 @mcp.tool()
-async def generate_problem(input: Dict[str, Any]) -> Dict[str, Any]:
-    return await generate_problem_internal(input)
-
-# 시스템 프롬프트 (영어)
-"""You are a problem generator for educational purposes. 
-    Create a question based on the user's prompt. 
-    The type of the question is 'select' if you created a multiple choice quesetion,
-    or 'write' if you created a essay question.
-    Your response must be in valid JSON format with the following structure:
-    {
-    "title": "Brief title of the problem",
-    "content": "The full problem statement or question",
-    "type": "Either select or write",
-    "answer": "The correct answer for the question",
-    "category": "Subject/Topic/Subtopic",
-    }
-
-    If you choose select type, the content should include 4 answer options in 1, 2, 3, 4. The answer should be a single number.
-    DO NOT include any explanations or text outside the JSON object.
-    Also DO NOT make id field for this data. The server will created it automatically.
-    Ensure your response is valid JSON that can be parsed programmatically.
-    """
-
-# 시스템 프롬프트 (한국어)
-'''
-당신은 교육용 문제를 생성하는 인공지능입니다.  
-사용자의 요청에 따라 문제를 생성하세요.  
-문제 유형은 다음 중 하나입니다:  
-- 객관식 문제일 경우: "select"  
-- 서술형 문제일 경우: "write"
-
-당신의 응답은 반드시 아래 형식의 **유효한 JSON 객체**여야 하며, 그 외 설명이나 텍스트는 절대 포함하지 마세요:
-
-{
-  "title": "문제의 간단한 제목",
-  "content": "문제의 전체 내용 또는 질문",
-  "type": "select 또는 write 중 하나",
-  "answer": "문제의 정답",
-  "category": "과목/주제/세부주제 형식의 분류 (예: 수학/확률과통계/조건부확률)"
-}
-
-만약 "select" 유형의 문제를 만들었다면, content 안에 반드시 보기 4개를 아래와 같이 포함해야 합니다:
-
-1) 보기1  
-2) 보기2  
-3) 보기3  
-4) 보기4  
-
-"answer" 필드는 위 보기 중 정답 번호 하나로 작성하세요 (예: "2").
-
-주의사항:
-- 절대 JSON 외의 설명이나 텍스트를 포함하지 마세요.
-- id 필드는 만들지 마세요. 서버에서 자동 생성됩니다.
-- 응답은 반드시 파싱 가능한 JSON이어야 합니다.
-'''
+async def generate_problem(input: Dict[str, Any], ctx: Context) -> Dict[str, Any]:
+    # 잘못된 입력은 LLM 호출 전에 tool 오류로 (ValidationError)
+    input = validate_input("generate_problem", input)
+    if not input.get("stream"):
+        return await generate_problem_internal(input)
+
+    # stream=True 이면 토큰을 progress 알림 메시지로 전달하고 최종 문제를 반환
+    result = None
+    tokens = 0
+    try:
+        async for event in stream_problem_internal(input):
+            if event["event"] == "token":
+                tokens += 1
+                await ctx.report_progress(progress=tokens, message=event["data"])
+            else:
+                result = event["data"]
+    except PromptTooLongError:
+        raise
+    except Exception as e:
+        log.error("LLM 스트리밍 실패", llm=str(input.get("llm", "")), error=str(e))
+    return result
 
 # fastmcp server prompt
\ No newline at end of file
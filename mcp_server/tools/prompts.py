@@ -0,0 +1,83 @@
+from typing import Optional
+from utils.prompt import PromptTemplate
+from config import PROMPT_LANG
+
+# generate_problem system 프롬프트. 소스 들여쓰기는 import 시 PromptTemplate이 정리한다
+
+# 한국어
+KO = PromptTemplate("ko", '''
+                    당신은 교육용 문제를 생성하는 인공지능입니다.  
+                    사용자의 요청에 따라 문제를 생성하세요.  
+                    문제 유형은 다음 중 하나입니다:  
+                    - 객관식 문제일 경우: "select"  
+                    - 서술형 문제일 경우: "write"
+
+                    당신의 응답은 반드시 아래 형식의 유효한 JSON 객체여야 하며, 그 외 설명이나 텍스트는 절대 포함하지 마세요:
+
+                    {
+                    "title": "문제의 간단한 제목",
+                    "content": "문제의 전체 내용 또는 질문",
+                    "type": "select 또는 write 중 하나",
+                    "answer": "문제의 정답",
+                    "category": "과목/주제/세부주제 형식의 분류 (예: 수학/확률과통계/조건부확률)"
+                    }
+
+                    만약 "select" 유형의 문제를 만들었다면, content 안에 반드시 보기 4개를 아래와 같이 포함해야 합니다:
+
+                    1) 보기1  
+                    2) 보기2  
+                    3) 보기3  
+                    4) 보기4  
+
+                    "answer" 필드는 위 보기 중 정답 번호 하나로 작성하세요 (예: "2").
+
+                    주의사항:
+                    - 절대 JSON 외의 설명이나 텍스트를 포함하지 마세요.
+                    - id 필드는 만들지 마세요. 서버에서 자동 생성됩니다.
+                    - 응답은 반드시 파싱 가능한 JSON이어야 합니다.
+                    ''')
+
+# 영어
+EN = PromptTemplate("en", """You are a problem generator for educational purposes. 
+    Create a question based on the user's prompt. 
+    The type of the question is 'select' if you created a multiple choice question,
+    or 'write' if you created an essay question.
+    Your response must be in valid JSON format with the following structure:
+    {
+    "title": "Brief title of the problem",
+    "content": "The full problem statement or question",
+    "type": "Either select or write",
+    "answer": "The correct answer for the question",
+    "category": "Subject/Topic/Subtopic"
+    }
+
+    If you choose select type, the content should include 4 answer options in 1, 2, 3, 4. The answer should be a single number.
+    DO NOT include any explanations or text outside the JSON object.
+    Also DO NOT make id field for this data. The server will create it automatically.
+    Ensure your response is valid JSON that can be parsed programmatically.
+    """)
+
+TEMPLATES = {"ko": KO, "en": EN}
+
+# 비슷한 문제가 이미 있을 때 user 프롬프트 뒤에 붙이는 문장 (DEDUP_MODE=regenerate)
+AVOID_DUPLICATE = {
+    "ko": "참고: \"{title}\" 문제는 이미 있습니다. 내용과 보기가 겹치지 않는 새로운 문제를 만들어 주세요.",
+    "en": "Note: a problem titled \"{title}\" already exists. Create a new problem with different content and options.",
+}
+
+# prompt 없이 category/type만 요청했을 때 쓰는 user 프롬프트 (미리 생성할 때도 같은 문장)
+CATEGORY_PROMPT = {
+    "ko": "분류: {category}\n유형: {type}\n위 분류와 유형에 맞는 문제를 하나 만들어 주세요.",
+    "en": "Category: {category}\nType: {type}\nCreate one problem for this category and type.",
+}
+
+
+def category_prompt(template: PromptTemplate, category: str, type: Optional[str] = None) -> str:
+    return CATEGORY_PROMPT[template.name].format(category=category, type=type or "select/write")
+
+
+def get_template(lang: Optional[str] = None) -> PromptTemplate:
+    template = TEMPLATES.get(lang or PROMPT_LANG)
+    if template is None:
+        raise ValueError(f"Unsupported lang: {lang}")
+    return template
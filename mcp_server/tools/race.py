@@ -0,0 +1,76 @@
+import asyncio
+from typing import Any, Dict, List, Tuple
+from pydantic import ValidationError
+from utils.json_extractor import extract_json_from_text
+from llm.admission import admitted_generate
+from llm.health import guarded
+from utils.prompt import PromptTemplate, fit_prompt
+from schemas import Problem
+
+
+def is_valid_problem(result: Any) -> bool:
+    try:
+        Problem.model_validate(result)
+    except ValidationError:
+        return False
+    return True
+
+
+async def _generate_valid(name: str, prompt: str, template: PromptTemplate) -> Dict[str, Any]:
+    prompt = fit_prompt(name, prompt, template)
+    # circuit이 열린 provider는 바로 실패로 처리되어 다음 provider가 뜬다
+    raw = await guarded(name, lambda: admitted_generate(name, prompt, template.text))
+    result = await extract_json_from_text(raw, name)
+    if not is_valid_problem(result):
+        raise ValueError(f"{name}: 유효한 문제 JSON이 아닙니다")
+    return result
+
+
+async def race_generate(
+    names: List[str], prompt: str, template: PromptTemplate, hedge_delay: float = 0.0
+) -> Tuple[str, Dict[str, Any]]:
+    """여러 provider에 같은 프롬프트를 보내 가장 먼저 유효한 문제를 돌려준 (provider, 결과)를 쓰고 나머지는 취소.
+
+    hedge_delay > 0 이면 앞 provider가 그 시간 안에 끝나지 않을 때만 다음 provider를 띄운다.
+    앞 provider가 먼저 실패하면 기다리지 않고 바로 다음 provider를 띄운다.
+    """
+    pending = list(names)
+    running: Dict[asyncio.Task, str] = {}
+    errors: List[str] = []
+
+    def launch() -> None:
+        name = pending.pop(0)
+        running[asyncio.create_task(_generate_valid(name, prompt, template))] = name
+
+    try:
+        launch()
+        while running:
+            if hedge_delay <= 0:
+                while pending:
+                    launch()
+            timeout = hedge_delay if pending else None
+            done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+            if not done:
+                # hedge_delay 동안 응답이 없으면 다음 provider 추가
+                launch()
+                continue
+
+            # 같이 끝난 task의 예외도 모두 읽어 둔다 (읽지 않으면 "Task exception was never retrieved" 경고)
+            winner = None
+            for task in done:
+                name = running.pop(task)
+                error = task.exception()
+                if error is not None:
+                    errors.append(f"{name}: {error}")
+                elif winner is None:
+                    winner = name, task.result()
+            if winner is not None:
+                return winner
+            if pending:
+                launch()
+
+        raise RuntimeError("모든 provider 호출 실패 - " + "; ".join(errors))
+    finally:
+        for task in running:
+            task.cancel()
@@ -0,0 +1,148 @@
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+# 항목당 dict/키 등 파이썬 객체 오버헤드 대략치
+_ENTRY_OVERHEAD = 256
+
+
+def normalize_prompt(prompt: str, modes: Iterable[str] = ("whitespace",)) -> str:
+    if "whitespace" in modes:
+        # 공백 차이만 있는 프롬프트는 같은 요청으로 본다
+        prompt = " ".join(prompt.split())
+    if "casefold" in modes:
+        prompt = prompt.casefold()
+    return prompt
+
+
+def make_key(
+    llm: str, model: str, prompt: str, params: Dict[str, Any], modes: Iterable[str] = ("whitespace",), template: str = ""
+) -> str:
+    prompt = normalize_prompt(prompt, modes)
+    # template: system 프롬프트 식별자, 바뀌면 이전 캐시를 쓰지 않는다
+    parts = [llm, model, prompt, params] + ([template] if template else [])
+    raw = json.dumps(parts, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """메모리 LRU+TTL 캐시, sqlite_path가 있으면 디스크 계층을 추가로 사용.
+
+    디스크 계층은 여러 worker 프로세스가 같은 파일을 같이 쓸 수 있다 (WAL, 다른 worker가 만든 결과는 disk hit).
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl: float, sqlite_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        # key -> (만료 시각, 크기, 값)
+        self._entries: "OrderedDict[str, Tuple[float, int, Dict[str, Any]]]" = OrderedDict()
+        self._bytes = 0
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        if sqlite_path:
+            self._db = sqlite3.connect(sqlite_path, check_same_thread=False, timeout=5.0)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS result_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_result_cache_expires ON result_cache (expires_at)")
+            self._db.commit()
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, _, value = entry
+            if expires_at > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return dict(value)
+            self._remove(key)
+
+        if self._db is not None:
+            row = await asyncio.to_thread(self._db_get, key, now)
+            if row is not None:
+                value, expires_at = json.loads(row[0]), row[1]
+                self._put(key, value, expires_at)
+                self.disk_hits += 1
+                return dict(value)
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, value: Dict[str, Any]) -> None:
+        expires_at = time.time() + self.ttl
+        encoded = self._put(key, value, expires_at)
+        if self._db is not None and encoded is not None:
+            await asyncio.to_thread(self._db_set, key, encoded, expires_at)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            "persistent": self._db is not None,
+        }
+
+    def close(self) -> None:
+        if self._db is not None:
+            with self._db_lock:
+                self._db.close()
+            self._db = None
+
+    def _put(self, key: str, value: Dict[str, Any], expires_at: float) -> Optional[str]:
+        encoded = json.dumps(value, ensure_ascii=False)
+        size = len(encoded.encode("utf-8")) + _ENTRY_OVERHEAD
+        if size > self.max_bytes:
+            return None
+
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (expires_at, size, dict(value))
+        self._bytes += size
+
+        # 개수 또는 메모리 상한을 넘으면 가장 오래 안 쓴 항목부터 제거
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+        return encoded
+
+    def _remove(self, key: str) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def _db_get(self, key: str, now: float):
+        with self._db_lock:
+            return self._db.execute(
+                "SELECT value, expires_at FROM result_cache WHERE key = ? AND expires_at > ?",
+                (key, now),
+            ).fetchone()
+
+    def _db_set(self, key: str, encoded: str, expires_at: float) -> None:
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO result_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, encoded, expires_at),
+            )
+            self._db.execute("DELETE FROM result_cache WHERE expires_at <= ?", (time.time(),))
+            self._db.commit()
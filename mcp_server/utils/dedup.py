@@ -0,0 +1,192 @@
+import asyncio
+import hashlib
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+_MASK56 = np.uint64((1 << 56) - 1)
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+_SHINGLE_BASE = np.uint64(1000003)
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.casefold().split())
+
+
+def _category_hash(category: str) -> np.uint64:
+    digest = hashlib.blake2b(category.encode("utf-8"), digest_size=8).digest()
+    return np.uint64(int.from_bytes(digest, "little"))
+
+
+class DuplicateIndex:
+    """MinHash 서명 + LSH 밴드로 같은 category 안의 비슷한 문제를 찾는 메모리 인덱스.
+
+    - 서명: 글자 shingle_size-gram 해시에 num_perm개의 해시 함수를 NumPy로 한 번에 적용한 최솟값
+    - LSH: 서명을 bands개로 나눠 (category, 밴드) 키가 하나라도 같은 문제만 후보로 보고,
+      후보는 저장해 둔 서명의 하위 8비트 일치율로 Jaccard 유사도를 추정해 threshold와 비교
+    - 밴드 키는 정렬된 NumPy 배열(np.searchsorted 조회) + 최근 추가분 dict 버퍼에 두고,
+      버퍼가 buffer_size개를 넘으면 스레드에서 정렬 배열에 병합한다
+    - max_items를 넘으면 오래된 문제부터 인덱스에서 뺀다
+    """
+
+    def __init__(
+        self,
+        num_perm: int = 64,
+        bands: int = 16,
+        threshold: float = 0.6,
+        shingle_size: int = 3,
+        window: float = 0,
+        max_items: int = 1_000_000,
+        buffer_size: int = 8192,
+        seed: int = 1,
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self.window = window  # 0이면 시간 제한 없이 인덱스에 남아 있는 모든 문제와 비교
+        self.max_items = max_items
+        self.buffer_size = buffer_size
+
+        rng = np.random.default_rng(seed)
+        # multiply-shift 해시 함수들 (a는 홀수)
+        self._a = rng.integers(1, 2**63, num_perm, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 2**63, num_perm, dtype=np.uint64)
+        self._band_mult = rng.integers(1, 2**63, (bands, self.rows), dtype=np.uint64) | np.uint64(1)
+        self._band_tag = np.arange(bands, dtype=np.uint64) << np.uint64(56)
+
+        # 문제 번호(0부터 증가) - base = 저장 배열의 행 번호
+        self._base = 0
+        self._count = 0
+        self._sig8 = np.zeros((1024, num_perm), dtype=np.uint8)
+        self._times = np.zeros(1024, dtype=np.float64)
+        self._refs: List[Any] = []
+
+        # 밴드 키 -> 문제 번호: 정렬 배열 + (병합 중인 버퍼) + 새 버퍼
+        self._keys = np.zeros(0, dtype=np.uint64)
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._frozen: Dict[int, List[int]] = {}
+        self._buffer: Dict[int, List[int]] = {}
+        self._merging: Optional[asyncio.Task] = None
+
+        self.lookups = 0
+        self.duplicates = 0
+        self.merges = 0
+
+    def signature(self, text: str) -> np.ndarray:
+        codes = np.frombuffer(_normalize(text).encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+        k = min(self.shingle_size, len(codes)) or 1
+        if len(codes) == 0:
+            codes = np.zeros(1, dtype=np.uint64)
+        # 글자 k-gram 다항식 해시 (uint64 overflow는 mod 2^64로 동작)
+        n = len(codes) - k + 1
+        shingles = codes[:n].copy()
+        for j in range(1, k):
+            shingles = shingles * _SHINGLE_BASE + codes[j:j + n]
+        shingles = (shingles * _GOLDEN) >> np.uint64(32)
+        # (num_perm, shingle 수) 한 번에 계산해 행별 최솟값
+        hashed = (self._a[:, None] * shingles[None, :] + self._b[:, None]) >> np.uint64(32)
+        return hashed.min(axis=1).astype(np.uint32)
+
+    def _band_keys(self, category: str, sig: np.ndarray) -> np.ndarray:
+        bands = sig.astype(np.uint64).reshape(self.bands, self.rows)
+        h = (bands * self._band_mult).sum(axis=1, dtype=np.uint64) + _category_hash(category)
+        h ^= h >> np.uint64(29)
+        h *= _GOLDEN
+        # 상위 8비트에 밴드 번호를 넣어 밴드끼리 섞이지 않게
+        return self._band_tag | ((h >> np.uint64(8)) & _MASK56)
+
+    def query(self, category: str, sig: np.ndarray) -> Optional[Tuple[Any, float]]:
+        """가장 비슷한 기존 문제 (ref, 추정 유사도), threshold 미만이면 None."""
+        self.lookups += 1
+        keys = self._band_keys(category, sig)
+        candidates = set()
+        if len(self._keys):
+            left = np.searchsorted(self._keys, keys, "left")
+            right = np.searchsorted(self._keys, keys, "right")
+            for lo, hi in zip(left.tolist(), right.tolist()):
+                if hi > lo:
+                    candidates.update(self._ids[lo:hi].tolist())
+        for key in keys.tolist():
+            candidates.update(self._frozen.get(key, ()))
+            candidates.update(self._buffer.get(key, ()))
+        candidates = [c for c in candidates if c >= self._base]
+        if not candidates:
+            return None
+
+        rows = np.array(candidates, dtype=np.int64) - self._base
+        if self.window > 0:
+            rows = rows[self._times[rows] >= time.time() - self.window]
+            if not len(rows):
+                return None
+        # 하위 8비트만 비교하면 우연히 같을 확률 1/256 만큼 보정 (b-bit minwise hashing)
+        matches = (self._sig8[rows] == sig.astype(np.uint8)).mean(axis=1)
+        similarity = (matches - 1 / 256) / (1 - 1 / 256)
+        best = int(similarity.argmax())
+        if similarity[best] < self.threshold:
+            return None
+        self.duplicates += 1
+        return self._refs[rows[best]], round(float(similarity[best]), 3)
+
+    def add(self, category: str, sig: np.ndarray, ref: Any) -> None:
+        row = self._count - self._base
+        if row == len(self._sig8):
+            self._sig8 = np.concatenate([self._sig8, np.zeros_like(self._sig8)])
+            self._times = np.concatenate([self._times, np.zeros_like(self._times)])
+        self._sig8[row] = sig.astype(np.uint8)
+        self._times[row] = time.time()
+        self._refs.append(ref)
+        item = self._count
+        self._count += 1
+        for key in self._band_keys(category, sig).tolist():
+            self._buffer.setdefault(key, []).append(item)
+
+        if len(self._buffer) >= self.buffer_size * self.bands and self._merging is None:
+            self._frozen, self._buffer = self._buffer, {}
+            self._merging = asyncio.get_running_loop().create_task(self._merge())
+
+    async def _merge(self) -> None:
+        try:
+            # 정렬/병합은 스레드에서, 조회는 그동안 기존 배열 + frozen 버퍼를 본다
+            keys, ids = await asyncio.to_thread(self._merged, self._keys, self._ids, self._frozen, self._base)
+            self._keys, self._ids = keys, ids
+            self._frozen = {}
+            self.merges += 1
+            self._evict()
+        finally:
+            self._merging = None
+
+    @staticmethod
+    def _merged(keys: np.ndarray, ids: np.ndarray, frozen: Dict[int, List[int]], base: int):
+        new_keys = np.fromiter((k for k, v in frozen.items() for _ in v), dtype=np.uint64)
+        new_ids = np.fromiter((i for v in frozen.values() for i in v), dtype=np.int64)
+        order = np.argsort(new_keys, kind="stable")
+        new_keys, new_ids = new_keys[order], new_ids[order]
+        # 인덱스에서 빠진 오래된 문제는 병합하면서 같이 버린다
+        alive = ids >= base
+        keys, ids = keys[alive], ids[alive]
+        positions = np.searchsorted(keys, new_keys)
+        return np.insert(keys, positions, new_keys), np.insert(ids, positions, new_ids)
+
+    def _evict(self) -> None:
+        # max_items의 10% 이상 넘쳤을 때만 한 번에 잘라서 복사 횟수를 줄인다
+        excess = (self._count - self._base) - self.max_items
+        if excess < max(1, self.max_items // 10):
+            return
+        self._sig8 = self._sig8[excess:].copy()
+        self._times = self._times[excess:].copy()
+        del self._refs[:excess]
+        self._base += excess
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "items": self._count - self._base,
+            "lookups": self.lookups,
+            "duplicates": self.duplicates,
+            "merges": self.merges,
+            "buffered": len(self._buffer) + len(self._frozen),
+        }
@@ -1,18 +1,148 @@
 import json
-from typing import Dict, Any
+import re
+import time
+from typing import Dict, Any, List, Optional
+from metrics import EXTRACT_LATENCY, ERRORS
 
-async def extract_json_from_text(text: str) -> Dict[str, Any]:
+# 파싱 실패 시 돌려주는 대체 문제 (캐시에는 저장하지 않는다)
+PARSING_ERROR = {
+    "title": "Parsing Error",
+    "content": "Invalid JSON returned",
+    "type": "select",
+    "options": ["Check prompt", "Retry", "Contact admin"],
+    "answer": "Retry",
+    "category": "Error"
+}
+
+# JSON 객체가 될 수 있는 시작 ('{' 뒤에 '"' 또는 '}'), 청크 끝에 걸친 '{'
+_OBJECT_START = re.compile(r'\{\s*["}]')
+_TRAILING_OPEN = re.compile(r'\{\s*$')
+# 객체 안에서 의미 있는 문자, 닫는 따옴표까지의 문자열 본문
+_STRUCTURAL = re.compile(r'[{}"]')
+_NON_SPACE = re.compile(r'\S')
+_STRING_BODY = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*"', re.S)
+
+
+def is_parsing_error(result: Dict[str, Any]) -> bool:
+    return result.get("title") == PARSING_ERROR["title"] and result.get("category") == PARSING_ERROR["category"]
+
+
+def _loads_object(candidate: str) -> Optional[Dict[str, Any]]:
     try:
-        start, end = text.find("{"), text.rfind("}") + 1
-        if start != -1 and end > start:
-            return json.loads(text[start:end])
-        return json.loads(text)  # fallback
+        obj = json.loads(candidate)
     except json.JSONDecodeError:
-        return {
-            "title": "Parsing Error",
-            "content": "Invalid JSON returned",
-            "type": "select",
-            "options": ["Check prompt", "Retry", "Contact admin"],
-            "answer": "Retry",
-            "category": "Error"
-        }
+        return None
+    return obj if isinstance(obj, dict) else None
+
+
+class JsonStreamExtractor:
+    """청크를 순서대로 feed 하면 처음으로 완성된 최상위 JSON 객체를 돌려준다.
+
+    문자열과 이스케이프를 추적하므로 문자열 안의 중괄호는 무시되고,
+    코드 펜스나 앞뒤 설명 문장은 객체 바깥이라 자연스럽게 건너뛴다.
+    균형은 맞지만 JSON으로 파싱되지 않는 블록은 버리고 다음 객체를 찾는다.
+    """
+
+    def __init__(self):
+        self._parts: List[str] = []
+        self._depth = 0
+        self._in_string = False
+        self._escape = False  # 청크 끝에서 잘린 역슬래시
+        self._unverified = False  # 청크 끝의 '{'로 시작해 아직 다음 문자를 못 본 후보
+        self.result: Optional[Dict[str, Any]] = None
+
+    def feed(self, chunk: str) -> Optional[Dict[str, Any]]:
+        if self.result is not None:
+            return self.result
+
+        n = len(chunk)
+        pos = 0
+        start = 0
+        if self._escape and n:
+            pos = 1
+            self._escape = False
+
+        while pos < n:
+            if self._depth == 0:
+                # 설명 속 "{변수}" 같은 블록은 후보로 삼지 않는다
+                m = _OBJECT_START.search(chunk, pos) or _TRAILING_OPEN.search(chunk, pos)
+                if m is None:
+                    return None
+                start = m.start()
+                pos = start + 1
+                self._depth = 1
+                self._parts = []
+                self._unverified = m.re is _TRAILING_OPEN
+                continue
+
+            if self._unverified:
+                m = _NON_SPACE.search(chunk, pos)
+                if m is None:
+                    break
+                self._unverified = False
+                if m.group() not in '"}':
+                    # JSON 객체 시작이 아니었음, 이 위치부터 다시 탐색
+                    self._depth = 0
+                    self._parts = []
+                    pos = m.start()
+                    continue
+
+            if self._in_string:
+                m = _STRING_BODY.match(chunk, pos)
+                if m is None:
+                    # 청크 안에서 문자열이 끝나지 않음, 끝의 역슬래시 개수가 홀수면 다음 문자는 이스케이프
+                    backslashes = n - len(chunk.rstrip("\\"))
+                    self._escape = min(backslashes, n - pos) % 2 == 1
+                    break
+                self._in_string = False
+                pos = m.end()
+                continue
+
+            m = _STRUCTURAL.search(chunk, pos)
+            if m is None:
+                break
+            c = m.group()
+            pos = m.end()
+            if c == '"':
+                self._in_string = True
+            elif c == "{":
+                self._depth += 1
+            else:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._parts.append(chunk[start:pos])
+                    obj = _loads_object("".join(self._parts))
+                    self._parts = []
+                    if obj is not None:
+                        self.result = obj
+                        return obj
+
+        if self._depth > 0:
+            self._parts.append(chunk[start:])
+        return None
+
+
+_decoder = json.JSONDecoder()
+
+
+def extract_first_json(text: str) -> Optional[Dict[str, Any]]:
+    # 전체 텍스트가 있으면 첫 후보를 C 디코더로 바로 읽어 본다 (대부분의 정상 응답)
+    m = _OBJECT_START.search(text)
+    if m is not None:
+        try:
+            obj, _ = _decoder.raw_decode(text, m.start())
+            if isinstance(obj, dict):
+                return obj
+        except json.JSONDecodeError:
+            pass
+    return JsonStreamExtractor().feed(text)
+
+
+async def extract_json_from_text(text: str, provider: str = "") -> Dict[str, Any]:
+    start = time.perf_counter()
+    result = extract_first_json(text)
+    EXTRACT_LATENCY.observe(time.perf_counter() - start, provider=provider)
+    if result is not None:
+        return result
+    ERRORS.inc(stage="extract", provider=provider)
+    return dict(PARSING_ERROR)
@@ -0,0 +1,186 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Set, Tuple
+from metrics import POOL_EVENTS
+from logger import log
+
+# (category, type, llm, lang)
+PoolKey = Tuple[str, str, str, str]
+
+
+class _Inventory:
+    def __init__(self):
+        self.items: Deque[Tuple[float, Any]] = deque()  # (만든 시각, 문제)
+        self.producing = 0
+        self.below_since: Optional[float] = None  # watermark 아래로 내려간 시각
+
+        self.hits = 0
+        self.misses = 0
+        self.produced = 0
+        self.failed = 0
+        self.expired = 0
+        self.refills = 0
+        self.lag_total = 0.0
+        self.lag_max = 0.0
+
+
+class ProblemPool:
+    """(category, type, llm, lang)별로 미리 만들어 둔 문제를 보관하고 바로 꺼내 주는 재고.
+
+    백그라운드 작업이 재고가 watermark보다 적은 키를 골라, 해당 provider에 여유가 있을 때만
+    (is_idle) produce로 하나씩 채운다. 만든 지 ttl이 지난 문제는 버리고 expired로 집계한다.
+    refill lag: 재고가 watermark 아래로 내려간 뒤 다시 채워질 때까지 걸린 시간.
+    """
+
+    def __init__(
+        self,
+        produce: Callable[[PoolKey], Awaitable[Any]],
+        is_idle: Callable[[str], bool],
+        keys: List[PoolKey],
+        watermark: int = 5,
+        ttl: float = 3600,
+        concurrency: int = 2,
+        interval: float = 0.5,
+    ):
+        self.produce = produce
+        self.is_idle = is_idle
+        self.watermark = watermark
+        self.ttl = ttl
+        self.concurrency = concurrency
+        self.interval = interval
+
+        self._inventory: Dict[PoolKey, _Inventory] = {key: _Inventory() for key in keys}
+        self._producers: Set[asyncio.Task] = set()
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def __contains__(self, key: PoolKey) -> bool:
+        return key in self._inventory
+
+    async def start(self) -> None:
+        now = time.time()
+        for inventory in self._inventory.values():
+            inventory.below_since = now
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._refill_loop())
+
+    async def stop(self) -> None:
+        tasks = list(self._producers)
+        if self._task is not None:
+            tasks.append(self._task)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+
+    def take(self, key: PoolKey) -> Optional[Any]:
+        """재고에서 가장 오래된 (아직 유효한) 문제 하나, 없으면 None."""
+        inventory = self._inventory.get(key)
+        if inventory is None:
+            return None
+        self._drop_expired(inventory, time.time())
+        if not inventory.items:
+            inventory.misses += 1
+            POOL_EVENTS.inc(event="miss")
+            return None
+        _, item = inventory.items.popleft()
+        inventory.hits += 1
+        POOL_EVENTS.inc(event="hit")
+        if len(inventory.items) < self.watermark:
+            if inventory.below_since is None:
+                inventory.below_since = time.time()
+            if self._wake is not None:
+                self._wake.set()
+        return item
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.time()
+        keys = {}
+        hits = misses = 0
+        for key, inventory in self._inventory.items():
+            hits += inventory.hits
+            misses += inventory.misses
+            requests = inventory.hits + inventory.misses
+            keys["/".join(key)] = {
+                "size": len(inventory.items),
+                "producing": inventory.producing,
+                "hits": inventory.hits,
+                "misses": inventory.misses,
+                "hit_rate": round(inventory.hits / requests, 3) if requests else None,
+                "produced": inventory.produced,
+                "failed": inventory.failed,
+                "expired": inventory.expired,
+                "refill_lag_avg": round(inventory.lag_total / inventory.refills, 3) if inventory.refills else None,
+                "refill_lag_max": round(inventory.lag_max, 3),
+                "refill_lag_current": round(now - inventory.below_since, 3) if inventory.below_since is not None else 0.0,
+            }
+        return {
+            "watermark": self.watermark,
+            "hit_rate": round(hits / (hits + misses), 3) if hits + misses else None,
+            "expired": sum(inventory.expired for inventory in self._inventory.values()),
+            "keys": keys,
+        }
+
+    def _drop_expired(self, inventory: _Inventory, now: float) -> None:
+        while inventory.items and inventory.items[0][0] + self.ttl <= now:
+            inventory.items.popleft()
+            inventory.expired += 1
+            POOL_EVENTS.inc(event="expired")
+        if len(inventory.items) < self.watermark and inventory.below_since is None:
+            inventory.below_since = now
+
+    async def _refill_loop(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            now = time.time()
+            # 부족한 개수가 많은 키부터
+            needs = []
+            for key, inventory in self._inventory.items():
+                self._drop_expired(inventory, now)
+                missing = self.watermark - len(inventory.items) - inventory.producing
+                if missing > 0:
+                    needs.append((-missing, key))
+            for _, key in sorted(needs):
+                if len(self._producers) >= self.concurrency:
+                    break
+                # 실제 요청이 쓸 자리를 빼앗지 않도록 provider에 여유가 있을 때만
+                if not self.is_idle(key[2]):
+                    continue
+                inventory = self._inventory[key]
+                inventory.producing += 1
+                task = asyncio.create_task(self._produce_one(key, inventory))
+                self._producers.add(task)
+                task.add_done_callback(self._producers.discard)
+
+    async def _produce_one(self, key: PoolKey, inventory: _Inventory) -> None:
+        try:
+            item = await self.produce(key)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            inventory.failed += 1
+            log.warn("문제 미리 생성 실패", key="/".join(key), error=str(e))
+            return
+        finally:
+            inventory.producing -= 1
+
+        if item is None:
+            inventory.failed += 1
+            return
+        now = time.time()
+        inventory.items.append((now, item))
+        inventory.produced += 1
+        POOL_EVENTS.inc(event="produced")
+        # 실패했을 때는 interval 뒤에, 성공하면 다음 빈자리를 바로 채운다
+        self._wake.set()
+        if len(inventory.items) >= self.watermark and inventory.below_since is not None:
+            lag = now - inventory.below_since
+            inventory.below_since = None
+            inventory.refills += 1
+            inventory.lag_total += lag
+            inventory.lag_max = max(inventory.lag_max, lag)
@@ -0,0 +1,183 @@
+import asyncio
+import json
+import secrets
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from logger import log
+
+FIELDS = ("title", "content", "type", "answer", "category", "provider")
+
+
+def new_problem_id() -> str:
+    # 앞 12자리는 밀리초 시각(hex)이라 id 순서가 생성 순서와 같다
+    return f"{int(time.time() * 1000):012x}{secrets.token_hex(6)}"
+
+
+# 숫자 정답 등은 그대로, 리스트/객체는 JSON 문자열로 저장
+def _column(value: Any) -> Any:
+    if value is None or isinstance(value, (str, int, float)):
+        return value
+    return json.dumps(value, ensure_ascii=False)
+
+
+class ProblemStore:
+    """생성된 문제를 보관하는 SQLite(WAL) 저장소.
+
+    add()는 id를 붙여서 메모리 대기열에 넣기만 하고, 실제 INSERT는 백그라운드 작업이
+    batch_size개 또는 flush_interval초마다 한 트랜잭션으로 모아서 한다.
+    category/type 인덱스와 title/content 전문 검색(FTS5 trigram, 한국어 부분 일치)을 지원.
+    """
+
+    def __init__(self, path: str, batch_size: int = 100, flush_interval: float = 0.2):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        # 아직 디스크에 쓰지 않은 문제 (id -> row)
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self._fts = False
+
+        self.written = 0
+        self.flushes = 0
+
+    async def start(self) -> None:
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS problems ("
+            "id TEXT PRIMARY KEY, title TEXT, content TEXT, type TEXT, answer TEXT, "
+            "category TEXT, provider TEXT, created_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_problems_category ON problems (category, id)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_problems_type ON problems (type, id)")
+        try:
+            # external content FTS: 본문은 problems에만 저장하고 검색 인덱스만 따로 유지
+            self._db.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS problems_fts USING fts5("
+                "title, content, content='problems', content_rowid='rowid', tokenize='trigram')"
+            )
+            self._db.execute(
+                "CREATE TRIGGER IF NOT EXISTS problems_ai AFTER INSERT ON problems BEGIN "
+                "INSERT INTO problems_fts (rowid, title, content) VALUES (new.rowid, new.title, new.content); END"
+            )
+            self._fts = True
+        except sqlite3.OperationalError as e:
+            # FTS5/trigram이 없는 SQLite 빌드면 LIKE 검색으로 대신
+            log.warn("FTS5 trigram을 사용할 수 없어 LIKE 검색을 사용합니다", error=str(e))
+        self._db.commit()
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._flusher())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._db is not None:
+            await asyncio.to_thread(self._write, list(self._pending.values()))
+            self._pending.clear()
+            with self._db_lock:
+                self._db.close()
+            self._db = None
+
+    def add(self, problem: Dict[str, Any]) -> str:
+        """id를 발급하고 쓰기 대기열에 넣는다 (요청 경로에서 디스크를 기다리지 않음)."""
+        problem_id = new_problem_id()
+        row = {field: _column(problem.get(field)) for field in FIELDS}
+        row["id"] = problem_id
+        row["created_at"] = time.time()
+        self._pending[problem_id] = row
+        if self._wake is not None and len(self._pending) >= self.batch_size:
+            self._wake.set()
+        return problem_id
+
+    async def get(self, problem_id: str) -> Optional[Dict[str, Any]]:
+        row = self._pending.get(problem_id)
+        if row is not None:
+            return dict(row)
+        rows = await asyncio.to_thread(self._query, "SELECT * FROM problems WHERE id = ?", (problem_id,))
+        return rows[0] if rows else None
+
+    async def search(
+        self,
+        category: Optional[str] = None,
+        type: Optional[str] = None,
+        q: Optional[str] = None,
+        limit: int = 20,
+        before: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """최신순 조회. category는 앞부분 일치 ("수학/확률과통계" -> 하위 주제 포함), before는 이전 페이지 마지막 id."""
+        where, params = [], []
+        if category:
+            # LIKE 대신 범위 조건을 써야 category 인덱스를 탄다
+            where.append("p.category >= ? AND p.category < ?")
+            params += [category, category + "\U0010ffff"]
+        if type:
+            where.append("p.type = ?")
+            params.append(type)
+        if before:
+            where.append("p.id < ?")
+            params.append(before)
+        sql = "SELECT p.* FROM problems p"
+        if q:
+            # trigram은 3글자 이상부터 인덱스로 찾을 수 있다
+            if self._fts and len(q) >= 3:
+                sql += " JOIN problems_fts f ON f.rowid = p.rowid"
+                where.append("problems_fts MATCH ?")
+                params.append('"' + q.replace('"', '""') + '"')
+            else:
+                where.append("(p.title LIKE ? OR p.content LIKE ?)")
+                params += [f"%{q}%", f"%{q}%"]
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY p.id DESC LIMIT ?"
+        params.append(limit)
+        return await asyncio.to_thread(self._query, sql, tuple(params))
+
+    def stats(self) -> Dict[str, Any]:
+        return {"pending": len(self._pending), "written": self.written, "flushes": self.flushes, "fts": self._fts}
+
+    async def _flusher(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            if not self._pending:
+                continue
+            batch = list(self._pending.values())
+            try:
+                await asyncio.to_thread(self._write, batch)
+            except Exception as e:
+                log.error("문제 저장 실패", count=len(batch), error=str(e))
+                continue
+            # 쓰는 동안 새로 들어온 항목은 남겨 둔다
+            for row in batch:
+                self._pending.pop(row["id"], None)
+
+    def _write(self, batch: List[Dict[str, Any]]) -> None:
+        if not batch:
+            return
+        with self._db_lock:
+            self._db.executemany(
+                "INSERT OR IGNORE INTO problems (id, title, content, type, answer, category, provider, created_at) "
+                "VALUES (:id, :title, :content, :type, :answer, :category, :provider, :created_at)",
+                batch,
+            )
+            self._db.commit()
+        self.written += len(batch)
+        self.flushes += 1
+
+    def _query(self, sql: str, params: Tuple[Any, ...]) -> List[Dict[str, Any]]:
+        with self._db_lock:
+            cursor = self._db.execute(sql, params)
+            columns = [c[0] for c in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
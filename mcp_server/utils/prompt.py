@@ -0,0 +1,140 @@
+import hashlib
+import inspect
+import math
+import re
+from typing import Any, Dict, Tuple
+from metrics import PROMPT_TOKENS
+from logger import log
+from config import PROMPT_MAX_INPUT_TOKENS, PROMPT_INPUT_BUDGETS, TOKEN_ESTIMATES
+
+try:
+    import tiktoken
+except ImportError:  # 없으면 TOKEN_ESTIMATES 계수로 추정
+    tiktoken = None
+
+_HANGUL = re.compile(r"[ᄀ-ᇿ㄰-㆏가-힣]")
+_SPACE = re.compile(r"\s")
+_BLANK_LINES = re.compile(r"\n{3,}")
+
+# 인코딩 이름 -> tiktoken Encoding (불러오지 못하면 None)
+_encodings: Dict[str, Any] = {}
+
+
+def compile_prompt(text: str) -> str:
+    """들여쓰기, 줄 끝 공백, 연속된 빈 줄을 제거한 프롬프트 (내용은 그대로)."""
+    lines = [line.rstrip() for line in inspect.cleandoc(text).splitlines()]
+    return _BLANK_LINES.sub("\n\n", "\n".join(lines))
+
+
+def _encoding(name: str):
+    if name not in _encodings:
+        try:
+            _encodings[name] = tiktoken.get_encoding(name)
+        except Exception as e:
+            # 인코딩 파일을 받을 수 없는 환경 등
+            log.warn("tiktoken 인코딩을 불러오지 못해 추정값을 사용합니다", encoding=name, error=str(e))
+            _encodings[name] = None
+    return _encodings[name]
+
+
+def count_tokens(text: str, provider: str) -> int:
+    spec = TOKEN_ESTIMATES.get(provider) or TOKEN_ESTIMATES["default"]
+    if spec.get("tiktoken") and tiktoken is not None:
+        encoding = _encoding(spec["tiktoken"])
+        if encoding is not None:
+            return len(encoding.encode(text))
+    hangul = len(_HANGUL.findall(text))
+    space = len(_SPACE.findall(text))
+    other = len(text) - hangul - space
+    return math.ceil(hangul * spec["hangul"] + other * spec["other"] + space * spec["space"])
+
+
+class PromptTemplate:
+    """import 시점에 한 번만 정리해 두는 system 프롬프트.
+
+    raw는 소스에 적힌 그대로, text는 실제로 보내는 정리된 버전.
+    provider별 토큰 수는 처음 셀 때 저장해 두고 다시 세지 않는다.
+    """
+
+    def __init__(self, name: str, raw: str):
+        self.name = name
+        self.raw = raw
+        self.text = compile_prompt(raw)
+        # 캐시 키에 들어가는 식별자 (내용이 바뀌면 달라짐)
+        self.key = f"{name}:{hashlib.sha256(self.text.encode('utf-8')).hexdigest()[:12]}"
+        self._tokens: Dict[str, Tuple[int, int]] = {}
+
+    def tokens(self, provider: str) -> Tuple[int, int]:
+        """(정리된 text 토큰 수, raw 토큰 수)"""
+        counts = self._tokens.get(provider)
+        if counts is None:
+            counts = self._tokens[provider] = (count_tokens(self.text, provider), count_tokens(self.raw, provider))
+        return counts
+
+
+class PromptTooLongError(ValueError):
+    """system + user 프롬프트가 provider 입력 예산을 넘음 (자르지 않고 거절, HTTP 413)."""
+
+    def __init__(self, provider: str, tokens: int, budget: int):
+        super().__init__(f"{provider}: 프롬프트가 입력 토큰 예산을 넘습니다 ({tokens} > {budget})")
+        self.provider = provider
+        self.tokens = tokens
+        self.budget = budget
+
+
+# provider -> 누적 토큰 통계
+_stats: Dict[str, Dict[str, int]] = {}
+
+
+def _provider_stats(provider: str) -> Dict[str, int]:
+    stats = _stats.get(provider)
+    if stats is None:
+        stats = _stats[provider] = {"requests": 0, "input_tokens": 0, "saved_tokens": 0, "rejected": 0}
+    return stats
+
+
+def check_prompt(provider: str, prompt: str, template: PromptTemplate) -> int:
+    """system + user 토큰 수, provider 입력 예산을 넘으면 PromptTooLongError (통계는 남기지 않음)."""
+    system_tokens, _ = template.tokens(provider)
+    budget = PROMPT_INPUT_BUDGETS.get(provider, PROMPT_MAX_INPUT_TOKENS)
+    tokens = system_tokens + count_tokens(prompt, provider)
+    if tokens > budget:
+        raise PromptTooLongError(provider, tokens, budget)
+    return tokens
+
+
+def fit_prompt(provider: str, prompt: str, template: PromptTemplate) -> str:
+    """provider 입력 예산 안에 들어가는지 확인하고 토큰 통계를 남긴 뒤 프롬프트를 그대로 돌려준다.
+
+    예산을 넘으면 뒷부분을 잘라 보내지 않고 PromptTooLongError (잘린 요청문으로 엉뚱한 문제를 만들지 않게).
+    """
+    stats = _provider_stats(provider)
+    try:
+        tokens = check_prompt(provider, prompt, template)
+    except PromptTooLongError as e:
+        stats["rejected"] += 1
+        PROMPT_TOKENS.inc(e.tokens, provider=provider, kind="rejected")
+        log.warn("입력 토큰 예산 초과로 요청을 거절했습니다", provider=provider, budget=e.budget, input_tokens=e.tokens)
+        raise
+
+    system_tokens, raw_tokens = template.tokens(provider)
+    saved = raw_tokens - system_tokens
+    stats["requests"] += 1
+    stats["input_tokens"] += tokens
+    stats["saved_tokens"] += saved
+    PROMPT_TOKENS.inc(tokens, provider=provider, kind="input")
+    PROMPT_TOKENS.inc(saved, provider=provider, kind="saved")
+    log.debug("prompt tokens", provider=provider, template=template.name, input_tokens=tokens, saved_tokens=saved)
+    return prompt
+
+
+def prompt_stats() -> Dict[str, Dict[str, Any]]:
+    result = {}
+    for provider, stats in _stats.items():
+        requests = stats["requests"] or 1
+        result[provider] = {
+            **stats,
+            "input_per_request": round(stats["input_tokens"] / requests, 1),
+            "saved_per_request": round(stats["saved_tokens"] / requests, 1),
+        }
+    return result
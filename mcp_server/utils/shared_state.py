@@ -0,0 +1,307 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Set, Tuple
+from logger import log
+
+
+class SharedState:
+    """같은 서버를 여러 worker 프로세스로 띄웠을 때 provider 상태를 나눠 쓰는 SQLite(WAL) 파일.
+
+    - slots: provider x worker별 실행 중인 호출 수. 합계가 limit보다 작을 때만 BEGIN IMMEDIATE 안에서 늘린다
+    - tickets: slot을 기다리는 호출의 번호표 (도착 시각). 모든 worker를 합쳐 먼저 온 순서대로 slot을 받는다
+    - limits: provider별 AIMD limit 하나를 모든 worker의 성공/과부하가 같이 조절
+    - circuits: circuit을 연 시각, 다른 worker도 이 값을 보고 open 상태로 맞춘다
+    - workers: heartbeat, 끊긴 지 worker_ttl이 지난 worker가 잡고 있던 slot/번호표는 정리
+
+    DB는 asyncio.to_thread로 접근해서 다른 worker가 쓰기 잠금을 잡고 있어도 이벤트 루프는 멈추지 않는다.
+    limits/circuits/inflight 속성은 마지막으로 읽은 값 (sync_interval마다, 이 worker가 바꿀 때 갱신),
+    잠금 안에서만 바꾸므로 DB에 반영된 순서와 같다.
+    """
+
+    def __init__(self, path: str, sync_interval: float = 0.5, worker_ttl: float = 10.0):
+        self.path = path
+        self.sync_interval = sync_interval
+        self.worker_ttl = worker_ttl
+        self.pid = os.getpid()
+
+        # provider -> limit, provider -> circuit을 연 시각 (time.time()), provider -> 모든 worker의 실행 중 호출 수
+        self.limits: Dict[str, float] = {}
+        self.circuits: Dict[str, float] = {}
+        self.inflight: Dict[str, int] = {}
+        self.workers = 0
+
+        self.acquired = 0
+        self.contended = 0
+        self.reclaimed = 0
+
+        self._task: Optional[asyncio.Task] = None
+        # 기다리지 않는 쓰기 (limit 조절, circuit)
+        self._writes: Set[asyncio.Task] = set()
+        self._db_lock = threading.Lock()
+        # 수동 트랜잭션 (BEGIN IMMEDIATE) 을 쓰므로 autocommit 모드, 잠금 대기는 스레드에서
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=5.0, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        create_tables(self._db)
+        self._heartbeat()
+
+    async def start(self) -> None:
+        await asyncio.to_thread(self._sync)
+        self._task = asyncio.create_task(self._sync_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await asyncio.gather(*self._writes, return_exceptions=True)
+        await asyncio.to_thread(self._leave)
+
+    def close(self) -> None:
+        self._db.close()
+
+    async def grant(self, provider: str, waiting: List[Tuple[int, float]], initial: float) -> List[int]:
+        """이 worker의 대기자 [(번호, 도착 시각)] 중 slot을 받은 번호.
+
+        다른 worker의 번호표와 도착 순서로 합쳐서 앞에서부터 남은 자리 수만큼만 준다.
+        받지 못한 대기자는 번호표로 남겨 다른 worker도 순서를 알 수 있게 하고, 없어진 대기자의 번호표는 지운다.
+        """
+        return await asyncio.to_thread(self._grant, provider, waiting, initial)
+
+    async def release(self, provider: str) -> None:
+        await asyncio.to_thread(self._release, provider)
+
+    def increase_limit(self, provider: str, maximum: float) -> None:
+        self._background(self._update_limit, provider, "MIN(?, value + 1.0 / value)", maximum)
+
+    def decrease_limit(self, provider: str, minimum: float) -> None:
+        self._background(self._update_limit, provider, "MAX(?, value / 2)", minimum)
+
+    def open_circuit(self, provider: str) -> None:
+        self._background(self._set_circuit, provider, time.time())
+
+    def close_circuit(self, provider: str) -> None:
+        self._background(self._set_circuit, provider, None)
+
+    # upstream 호출 직전에 다른 worker가 연 circuit을 sync_interval을 기다리지 않고 다시 읽는다
+    async def read_circuits(self) -> None:
+        await asyncio.to_thread(self._read_circuits)
+
+    async def claim(self, name: str) -> bool:
+        """살아 있는 worker 중 한 곳만 하는 일 (재시작 후 job 복원 등), 먼저 요청한 worker만 True."""
+        return await asyncio.to_thread(self._claim, name)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "pid": self.pid,
+            "workers": self.workers,
+            "inflight": dict(self.inflight),
+            "limits": {name: round(value, 2) for name, value in self.limits.items()},
+            "open_circuits": list(self.circuits),
+            "acquired": self.acquired,
+            "contended": self.contended,
+            "reclaimed": self.reclaimed,
+        }
+
+    def _background(self, fn, *args) -> None:
+        task = asyncio.create_task(asyncio.to_thread(fn, *args))
+        self._writes.add(task)
+        task.add_done_callback(self._written)
+
+    def _written(self, task: asyncio.Task) -> None:
+        self._writes.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            log.warn("공유 상태 쓰기 실패", error=str(task.exception()))
+
+    async def _sync_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            try:
+                await asyncio.to_thread(self._sync)
+            except sqlite3.Error as e:
+                log.warn("공유 상태 갱신 실패", error=str(e))
+
+    # 아래는 모두 스레드에서 _db_lock을 잡고 실행
+
+    def _grant(self, provider: str, waiting: List[Tuple[int, float]], initial: float) -> List[int]:
+        tickets = {ticket for ticket, _ in waiting}
+        with self._db_lock:
+            # 줄 자리가 없고 번호표도 그대로면 쓰기 잠금 없이 읽기만 하고 끝낸다
+            free, queue, published = self._queue(provider, initial)
+            granted = self._pick(free, queue, waiting)
+            if not granted and published == tickets:
+                if waiting:
+                    self.contended += 1
+                return []
+            with self._transaction():
+                free, queue, published = self._queue(provider, initial, insert=True)
+                granted = self._pick(free, queue, waiting)
+                keep = tickets.difference(granted)
+                gone = published - keep
+                if gone:
+                    self._db.executemany(
+                        "DELETE FROM tickets WHERE provider = ? AND pid = ? AND ticket = ?",
+                        [(provider, self.pid, ticket) for ticket in gone],
+                    )
+                self._db.executemany(
+                    "INSERT INTO tickets (provider, pid, ticket, arrived) VALUES (?, ?, ?, ?)",
+                    [(provider, self.pid, ticket, arrived) for ticket, arrived in waiting if ticket in keep - published],
+                )
+                if granted:
+                    self._db.execute(
+                        "INSERT INTO slots (provider, pid, inflight) VALUES (?, ?, ?) "
+                        "ON CONFLICT (provider, pid) DO UPDATE SET inflight = inflight + excluded.inflight",
+                        (provider, self.pid, len(granted)),
+                    )
+            self.inflight[provider] = self.inflight.get(provider, 0) + len(granted)
+            self.acquired += len(granted)
+            if waiting and not granted:
+                self.contended += 1
+        return granted
+
+    # (남은 자리 수, 다른 worker의 번호표 [(도착 시각, pid, 번호)], 이 worker가 올려 둔 번호)
+    def _queue(self, provider: str, initial: float, insert: bool = False):
+        row = self._db.execute("SELECT value FROM limits WHERE provider = ?", (provider,)).fetchone()
+        if row is None and insert:
+            # 처음 쓰는 provider면 initial로 등록
+            self._db.execute("INSERT INTO limits (provider, value) VALUES (?, ?)", (provider, initial))
+        limit = row[0] if row is not None else initial
+        self.limits[provider] = limit
+        total = self._db.execute(
+            "SELECT COALESCE(SUM(inflight), 0) FROM slots WHERE provider = ?", (provider,)
+        ).fetchone()[0]
+        self.inflight[provider] = total
+        queue, published = [], set()
+        for arrived, pid, ticket in self._db.execute(
+            "SELECT arrived, pid, ticket FROM tickets WHERE provider = ?", (provider,)
+        ):
+            if pid == self.pid:
+                published.add(ticket)
+            else:
+                queue.append((arrived, pid, ticket))
+        return int(limit) - total, queue, published
+
+    def _pick(self, free: int, queue: List[tuple], waiting: List[Tuple[int, float]]) -> List[int]:
+        if free <= 0 or not waiting:
+            return []
+        # 이 worker의 대기자는 DB 번호표 대신 현재 목록 기준 (그 사이 없어졌을 수 있음)
+        merged = sorted(queue + [(arrived, self.pid, ticket) for ticket, arrived in waiting])
+        return [ticket for _, pid, ticket in merged[:free] if pid == self.pid]
+
+    def _release(self, provider: str) -> None:
+        with self._db_lock:
+            self._db.execute(
+                "UPDATE slots SET inflight = MAX(0, inflight - 1) WHERE provider = ? AND pid = ?", (provider, self.pid)
+            )
+            self.inflight[provider] = max(0, self.inflight.get(provider, 0) - 1)
+
+    def _update_limit(self, provider: str, expression: str, bound: float) -> None:
+        with self._db_lock:
+            # RETURNING 결과를 끝까지 읽어야 문장이 끝나고 쓰기 잠금이 풀린다
+            rows = self._db.execute(
+                f"UPDATE limits SET value = {expression} WHERE provider = ? RETURNING value", (bound, provider)
+            ).fetchall()
+            if rows:
+                self.limits[provider] = rows[0][0]
+
+    # opened_at이 None이면 닫기
+    def _set_circuit(self, provider: str, opened_at: Optional[float]) -> None:
+        with self._db_lock:
+            if opened_at is None:
+                self._db.execute("DELETE FROM circuits WHERE provider = ?", (provider,))
+                self.circuits.pop(provider, None)
+            else:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO circuits (provider, opened_at) VALUES (?, ?)", (provider, opened_at)
+                )
+                self.circuits[provider] = opened_at
+
+    def _read_circuits(self) -> None:
+        with self._db_lock:
+            self.circuits = dict(self._db.execute("SELECT provider, opened_at FROM circuits").fetchall())
+
+    def _claim(self, name: str) -> bool:
+        with self._db_lock, self._transaction():
+            row = self._db.execute(
+                "SELECT claims.pid FROM claims JOIN workers ON workers.pid = claims.pid "
+                "WHERE claims.name = ? AND workers.heartbeat > ?",
+                (name, time.time() - self.worker_ttl),
+            ).fetchone()
+            if row is not None and row[0] != self.pid:
+                return False
+            self._db.execute("INSERT OR REPLACE INTO claims (name, pid) VALUES (?, ?)", (name, self.pid))
+        return True
+
+    def _sync(self) -> None:
+        with self._db_lock:
+            self._heartbeat()
+            # 종료 처리 없이 죽은 worker가 잡고 있던 slot/번호표 반납
+            with self._transaction():
+                dead = time.time() - self.worker_ttl
+                self._db.execute("DELETE FROM workers WHERE heartbeat <= ?", (dead,))
+                reclaimed = self._db.execute("DELETE FROM slots WHERE pid NOT IN (SELECT pid FROM workers)").rowcount
+                self._db.execute("DELETE FROM tickets WHERE pid NOT IN (SELECT pid FROM workers)")
+            if reclaimed:
+                self.reclaimed += reclaimed
+                log.warn("멈춘 worker의 slot 정리", slots=reclaimed)
+            self.limits = dict(self._db.execute("SELECT provider, value FROM limits").fetchall())
+            self.circuits = dict(self._db.execute("SELECT provider, opened_at FROM circuits").fetchall())
+            self.inflight = dict(self._db.execute("SELECT provider, SUM(inflight) FROM slots GROUP BY provider").fetchall())
+            self.workers = self._db.execute("SELECT COUNT(*) FROM workers").fetchone()[0]
+
+    def _leave(self) -> None:
+        with self._db_lock:
+            for table in ("slots", "tickets", "workers"):
+                self._db.execute(f"DELETE FROM {table} WHERE pid = ?", (self.pid,))
+
+    def _heartbeat(self) -> None:
+        self._db.execute("INSERT OR REPLACE INTO workers (pid, heartbeat) VALUES (?, ?)", (self.pid, time.time()))
+
+    # BEGIN IMMEDIATE: 읽기 전에 쓰기 잠금을 잡아 다른 worker의 합계 확인 + 증가와 섞이지 않게
+    @contextmanager
+    def _transaction(self):
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        self._db.execute("COMMIT")
+
+
+def reset_state(path: str) -> None:
+    """worker를 띄우기 전 (serve.py 부모 프로세스) 지난 실행이 남긴 상태를 지운다.
+
+    limit을 지우면 worker가 현재 ADMISSION_PROVIDER_LIMITS의 initial로 다시 등록하고,
+    죽은 worker의 slot/번호표/claim과 지난 circuit도 새 worker에게 넘어가지 않는다.
+    """
+    db = sqlite3.connect(path, timeout=5.0)
+    try:
+        db.execute("PRAGMA journal_mode=WAL")
+        create_tables(db)
+        with db:
+            for table in ("slots", "tickets", "workers", "limits", "circuits", "claims"):
+                db.execute(f"DELETE FROM {table}")
+    finally:
+        db.close()
+
+
+def create_tables(db: sqlite3.Connection) -> None:
+    db.execute("CREATE TABLE IF NOT EXISTS workers (pid INTEGER PRIMARY KEY, heartbeat REAL NOT NULL)")
+    db.execute(
+        "CREATE TABLE IF NOT EXISTS slots ("
+        "provider TEXT NOT NULL, pid INTEGER NOT NULL, inflight INTEGER NOT NULL, PRIMARY KEY (provider, pid))"
+    )
+    db.execute(
+        "CREATE TABLE IF NOT EXISTS tickets ("
+        "provider TEXT NOT NULL, pid INTEGER NOT NULL, ticket INTEGER NOT NULL, arrived REAL NOT NULL, "
+        "PRIMARY KEY (provider, pid, ticket))"
+    )
+    db.execute("CREATE TABLE IF NOT EXISTS limits (provider TEXT PRIMARY KEY, value REAL NOT NULL)")
+    db.execute("CREATE TABLE IF NOT EXISTS circuits (provider TEXT PRIMARY KEY, opened_at REAL NOT NULL)")
+    db.execute("CREATE TABLE IF NOT EXISTS claims (name TEXT PRIMARY KEY, pid INTEGER NOT NULL)")
@@ -0,0 +1,66 @@
+import asyncio
+import copy
+import time
+from typing import Any, Awaitable, Callable, Dict, Tuple
+from utils.json_extractor import is_parsing_error
+
+
+class SingleFlight:
+    """같은 key로 이미 진행 중인 호출이 있으면 새로 호출하지 않고 그 결과를 함께 받는다.
+
+    실패는 기다리던 모든 호출자에게 그대로 전달되고 재사용되지 않는다.
+    window > 0 이면 성공 결과를 완료 후 window초 동안 추가로 공유한다 (파싱 실패 결과는 제외).
+    호출자마다 결과 사본을 받으므로 한 쪽에서 고쳐도 다른 호출자에 영향이 없다.
+    """
+
+    def __init__(self, window: float = 0.0):
+        self.window = window
+        self._inflight: Dict[str, asyncio.Task] = {}
+        # key -> (만료 시각, 결과)
+        self._recent: Dict[str, Tuple[float, Any]] = {}
+
+        self.upstream_calls = 0
+        self.shared = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        if self.window > 0:
+            recent = self._recent.get(key)
+            if recent is not None:
+                if recent[0] > time.monotonic():
+                    self.shared += 1
+                    return copy.deepcopy(recent[1])
+                del self._recent[key]
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.shared += 1
+        else:
+            # 먼저 온 호출자가 취소되어도 나머지가 결과를 받을 수 있도록 별도 task로 실행
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            self.upstream_calls += 1
+            task.add_done_callback(lambda t: self._finish(key, t))
+        return copy.deepcopy(await asyncio.shield(task))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "inflight": len(self._inflight),
+            "upstream_calls": self.upstream_calls,
+            "saved_calls": self.shared,
+            "window": self.window,
+        }
+
+    def _finish(self, key: str, task: asyncio.Task) -> None:
+        self._inflight.pop(key, None)
+        if task.cancelled() or task.exception() is not None:
+            return
+        result = task.result()
+        # 결과 캐시와 같이 파싱 실패 결과는 재사용하지 않는다
+        if isinstance(result, dict) and is_parsing_error(result):
+            return
+        if self.window > 0:
+            self._recent[key] = (time.monotonic() + self.window, result)
+            # 만료된 항목 정리
+            now = time.monotonic()
+            for k in [k for k, (expires_at, _) in self._recent.items() if expires_at <= now]:
+                del self._recent[k]
@@ -0,0 +1,128 @@
+import asyncio
+import json
+import os
+import time
+from typing import List, Dict, Any, Optional
+
+import httpx
+
+# 툴 목록 캐시 파일 (다음 실행에서도 재사용)
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".mcp_tools_cache.json")
+
+
+class MCPClient:
+    """여러 MCP 서버의 툴 목록 수집 + 툴 실행을 위한 비동기 클라이언트.
+
+    - discover(): 모든 서버의 /tools/define 을 동시에 호출 (서버별 timeout)
+    - 툴 목록은 catalog_ttl 동안 캐시, 지나면 ETag(If-None-Match)로 바뀌었는지만 확인
+      서버에 접속하지 못하면 오래된 캐시라도 사용
+    - call(): 서버별로 커넥션을 재사용하는 httpx.AsyncClient 하나로 /tools/call
+
+    async with MCPClient([...]) as client:
+        tools = await client.discover()
+        result = await client.call(tools[0], {})
+    """
+
+    def __init__(
+        self,
+        server_urls: List[str],
+        discover_timeout: float = 5.0,
+        call_timeout: float = 30.0,
+        catalog_ttl: float = 300.0,
+        cache_path: Optional[str] = DEFAULT_CACHE_PATH,
+        max_connections: int = 20,
+    ):
+        self.server_urls = [url.rstrip("/") for url in server_urls]
+        self.discover_timeout = discover_timeout
+        self.call_timeout = call_timeout
+        self.catalog_ttl = catalog_ttl
+        self.cache_path = cache_path
+
+        # 서버 URL -> {"tools": [...], "etag": str | None, "fetched_at": float}
+        self._catalog: Dict[str, Dict[str, Any]] = self._load_cache()
+        self._http = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            timeout=call_timeout,
+        )
+
+        self.stats = {"fresh": 0, "revalidated": 0, "fetched": 0, "stale": 0, "failed": 0, "calls": 0}
+
+    async def __aenter__(self) -> "MCPClient":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        await self._http.aclose()
+
+    # 모든 서버의 툴 목록 (서버 순서대로, 각 툴에 "server" 필드 추가)
+    async def discover(self, force: bool = False) -> List[Dict[str, Any]]:
+        catalogs = await asyncio.gather(*(self._server_tools(url, force) for url in self.server_urls))
+        self._save_cache()
+        tools = []
+        for url, catalog in zip(self.server_urls, catalogs):
+            for tool in catalog:
+                tools.append({"server": url, **tool})
+        return tools
+
+    async def call(self, tool: Dict[str, Any], arguments: Dict[str, Any]) -> Dict[str, Any]:
+        self.stats["calls"] += 1
+        try:
+            res = await self._http.post(
+                f"{tool['server']}/tools/call",
+                json={"name": tool["name"], "arguments": arguments},
+            )
+            res.raise_for_status()
+            return res.json()
+        except Exception as e:
+            return {"error": str(e)}
+
+    async def _server_tools(self, url: str, force: bool) -> List[Dict[str, Any]]:
+        cached = self._catalog.get(url)
+        if cached is not None and not force and time.time() - cached["fetched_at"] < self.catalog_ttl:
+            self.stats["fresh"] += 1
+            return cached["tools"]
+
+        headers = {}
+        if cached is not None and cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        try:
+            res = await self._http.post(f"{url}/tools/define", headers=headers, timeout=self.discover_timeout)
+            if res.status_code == 304 and cached is not None:
+                # 바뀌지 않음: 본문 없이 유효 기간만 연장
+                cached["fetched_at"] = time.time()
+                self.stats["revalidated"] += 1
+                return cached["tools"]
+            res.raise_for_status()
+            tools = res.json().get("tools", [])
+        except Exception as e:
+            if cached is not None:
+                print(f"⚠️ {url} 접속 실패, 캐시된 툴 목록 사용: {e}")
+                self.stats["stale"] += 1
+                return cached["tools"]
+            print(f"⚠️ {url} 접속 실패: {e}")
+            self.stats["failed"] += 1
+            return []
+
+        self._catalog[url] = {"tools": tools, "etag": res.headers.get("ETag"), "fetched_at": time.time()}
+        self.stats["fetched"] += 1
+        return tools
+
+    def _load_cache(self) -> Dict[str, Dict[str, Any]]:
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return {}
+        try:
+            with open(self.cache_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_cache(self) -> None:
+        if not self.cache_path:
+            return
+        try:
+            with open(self.cache_path, "w", encoding="utf-8") as f:
+                json.dump(self._catalog, f, ensure_ascii=False)
+        except OSError as e:
+            print(f"⚠️ 툴 목록 캐시 저장 실패: {e}")
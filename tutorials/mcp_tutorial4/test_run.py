@@ -1,20 +1,13 @@
-import requests
+import asyncio
 import httpx
 import json
 from typing import List, Dict, Any, Optional
+from mcp_client import MCPClient
+from tool_router import ToolRouter
 
-# MCP 서버에서 툴 정의를 수집하는 함수
-def gather_mcp_tools(server_urls: List[str]) -> List[Dict[str, Any]]:
-    tools = []
-    for base_url in server_urls:
-        try:
-            res = requests.post(f"{base_url}/tools/define", timeout=5)
-            res.raise_for_status()
-            for tool in res.json().get("tools", []):
-                tools.append({"server": base_url, **tool})
-        except Exception as e:
-            print(f"⚠️ {base_url} 접속 실패: {e}")
-    return tools
+# MCP 서버에서 툴 정의를 수집하는 함수 (모든 서버 동시 조회, 툴 목록은 캐시)
+async def gather_mcp_tools(client: MCPClient) -> List[Dict[str, Any]]:
+    return await client.discover()
 
 # 이름으로 툴 선택하기
 def select_tool_by_name(tools: List[Dict[str, Any]], target_name: str) -> Optional[Dict[str, Any]]:
@@ -23,18 +16,9 @@ def select_tool_by_name(tools: List[Dict[str, Any]], target_name: str) -> Option
             return tool
     return None
 
-# MCP 툴 실행 함수
-def run_tool(tool: Dict[str, Any], arguments: Dict[str, Any]) -> Dict[str, Any]:
-    try:
-        res = requests.post(
-            f"{tool['server']}/tools/call",
-            json={"name": tool["name"], "arguments": arguments},
-            timeout=30
-        )
-        res.raise_for_status()
-        return res.json()
-    except Exception as e:
-        return {"error": str(e)}
+# MCP 툴 실행 함수 (client의 커넥션 풀 재사용)
+async def run_tool(client: MCPClient, tool: Dict[str, Any], arguments: Dict[str, Any]) -> Dict[str, Any]:
+    return await client.call(tool, arguments)
 
 # LLM 호출 함수 (Mistral via Ollama)
 def call_llm_with_prompt(prompt: str) -> str:
@@ -84,26 +68,30 @@ def ask_llm_to_select_tool(prompt: str, tools: List[Dict[str, Any]]) -> Optional
         return None
 
 # 전체 실행 흐름
-def main():
+async def main():
     print("🚀 MCP 클라이언트 시작됨")
     mcp_servers = [
         "https://63b8-210-217-23-139.ngrok-free.app"
     ]
 
-    tools = gather_mcp_tools(mcp_servers)
-
-    user_prompt = "오늘 커밋이 없다면 자동으로 커밋하고 푸시해줘, 사용 가능한 여러개의 툴 중에 우선적으로 batch_commit을 사용해서 커밋하도록 해봐"
-    plan = ask_llm_to_select_tool(user_prompt, tools)
-
-    if plan:
-        selected_tool = select_tool_by_name(tools, plan["name"])
-        if selected_tool:
-            result = run_tool(selected_tool, plan["arguments"])
-            print("\n✅ 툴 실행 결과:", result)
+    async with MCPClient(mcp_servers) as client:
+        tools = await gather_mcp_tools(client)
+
+        user_prompt = "오늘 커밋이 없다면 자동으로 커밋하고 푸시해줘, 사용 가능한 여러개의 툴 중에 우선적으로 batch_commit을 사용해서 커밋하도록 해봐"
+        # 요청이 툴 설명과 뚜렷하게 맞으면 LLM 없이 바로 선택, 애매할 때만 Mistral 호출
+        router = ToolRouter(tools)
+        plan = router.plan(user_prompt, ask_llm_to_select_tool)
+        print(f"🧭 툴 선택: {router.stats} (LLM 호출 생략 비율 {router.avoided_ratio():.0%})")
+
+        if plan:
+            selected_tool = select_tool_by_name(tools, plan["name"])
+            if selected_tool:
+                result = await run_tool(client, selected_tool, plan["arguments"])
+                print("\n✅ 툴 실행 결과:", result)
+            else:
+                print("❌ 선택된 툴을 MCP 서버 목록에서 찾을 수 없습니다.")
         else:
-            print("❌ 선택된 툴을 MCP 서버 목록에서 찾을 수 없습니다.")
-    else:
-        print("❌ LLM으로부터 적절한 툴 플랜을 받지 못했습니다.")
+            print("❌ LLM으로부터 적절한 툴 플랜을 받지 못했습니다.")
 
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())
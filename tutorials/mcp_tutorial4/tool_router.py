@@ -0,0 +1,135 @@
+import math
+import re
+from collections import Counter
+from typing import List, Dict, Any, Optional, Callable, Tuple
+
+_WORD = re.compile(r"[0-9a-z]+|[가-힣]+")
+_HANGUL = re.compile(r"[가-힣]")
+_NORMALIZE = re.compile(r"[^0-9a-z가-힣_]+")
+
+# 자주 붙는 조사/어미 (긴 것부터 떼어냄)
+_SUFFIXES = sorted([
+    "으로", "에서", "에게", "까지", "부터", "처럼", "보다", "이나", "하고", "해서", "해줘", "해주세요", "하도록",
+    "하는", "하면", "이면", "라면", "다면", "은", "는", "이", "가", "을", "를", "에", "의", "로", "와", "과", "도", "만",
+], key=len, reverse=True)
+
+
+def normalize_prompt(prompt: str) -> str:
+    return " ".join(_NORMALIZE.sub(" ", prompt.casefold()).split())
+
+
+def _strip_suffix(word: str) -> str:
+    for suffix in _SUFFIXES:
+        if len(word) > len(suffix) + 1 and word.endswith(suffix):
+            return word[: -len(suffix)]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    """영문/숫자는 단어 단위 (batch_commit -> batch, commit), 한글은 조사를 뗀 어간 + 글자 bigram.
+
+    한국어는 띄어쓰기와 조사 때문에 같은 말도 형태가 달라져서 ("커밋을", "커밋하고")
+    bigram을 같이 넣어 부분 일치도 점수에 들어가게 한다.
+    """
+    tokens = []
+    for word in _WORD.findall(text.casefold()):
+        if not _HANGUL.match(word):
+            tokens.append(word)
+            continue
+        stem = _strip_suffix(word)
+        tokens.append(stem)
+        if len(stem) > 2:
+            tokens.extend(stem[i:i + 2] for i in range(len(stem) - 1))
+    return tokens
+
+
+def _required_args(tool: Dict[str, Any]) -> List[str]:
+    schema = tool.get("inputSchema") or tool.get("input_schema") or tool.get("parameters") or {}
+    return list(schema.get("required", [])) if isinstance(schema, dict) else []
+
+
+class ToolRouter:
+    """툴 이름/설명 BM25 인덱스로 LLM 없이 툴을 고르는 라우터.
+
+    - 프롬프트에 툴 이름이 그대로 하나만 나오면 그 툴
+    - 아니면 BM25 1등 점수가 min_score 이상이고 2등보다 margin배 이상 높을 때 1등 툴
+    - 필수 인자가 있는 툴은 인자를 채워야 하므로 LLM에게 넘긴다
+    - 나머지(애매한 요청)만 fallback(LLM) 호출, 결과 플랜은 정규화한 프롬프트 기준으로 캐시
+    """
+
+    def __init__(self, tools: List[Dict[str, Any]], min_score: float = 1.0, margin: float = 1.5, k1: float = 1.2, b: float = 0.75):
+        self.tools = tools
+        self.min_score = min_score
+        self.margin = margin
+        self.k1 = k1
+        self.b = b
+
+        # 이름은 두 번 넣어서 설명보다 가중치를 높게
+        self._docs = [
+            Counter(tokenize(tool["name"]) * 2 + tokenize(tool.get("description", ""))) for tool in tools
+        ]
+        self._lengths = [sum(doc.values()) for doc in self._docs]
+        self._avg_length = (sum(self._lengths) / len(self._lengths)) if tools else 0.0
+        df = Counter(token for doc in self._docs for token in doc)
+        n = len(tools)
+        self._idf = {token: math.log(1 + (n - count + 0.5) / (count + 0.5)) for token, count in df.items()}
+
+        self._plans: Dict[str, Dict[str, Any]] = {}
+        self.stats = {"requests": 0, "cached": 0, "keyword": 0, "llm": 0}
+
+    def scores(self, prompt: str) -> List[Tuple[float, Dict[str, Any]]]:
+        query = set(tokenize(prompt))
+        result = []
+        for tool, doc, length in zip(self.tools, self._docs, self._lengths):
+            score = 0.0
+            for token in query:
+                tf = doc.get(token)
+                if tf:
+                    norm = self.k1 * (1 - self.b + self.b * length / self._avg_length)
+                    score += self._idf[token] * tf * (self.k1 + 1) / (tf + norm)
+            result.append((score, tool))
+        result.sort(key=lambda item: -item[0])
+        return result
+
+    def select(self, prompt: str) -> Optional[Dict[str, Any]]:
+        """확실하게 고를 수 있으면 툴, 애매하면 None."""
+        lowered = prompt.casefold()
+        named = [tool for tool in self.tools if tool["name"].casefold() in lowered]
+        if len(named) == 1:
+            return named[0]
+
+        ranked = self.scores(prompt)
+        if not ranked:
+            return None
+        best_score, best = ranked[0]
+        second_score = ranked[1][0] if len(ranked) > 1 else 0.0
+        if best_score >= self.min_score and best_score >= second_score * self.margin:
+            return best
+        return None
+
+    def plan(self, prompt: str, fallback: Callable[[str, List[Dict[str, Any]]], Optional[Dict[str, Any]]]) -> Optional[Dict[str, Any]]:
+        """{"name": ..., "arguments": {...}} 플랜, fallback은 애매할 때만 호출되는 LLM 선택 함수."""
+        self.stats["requests"] += 1
+        key = normalize_prompt(prompt)
+        cached = self._plans.get(key)
+        if cached is not None:
+            self.stats["cached"] += 1
+            return cached
+
+        tool = self.select(prompt)
+        if tool is not None and not _required_args(tool):
+            self.stats["keyword"] += 1
+            plan = {"name": tool["name"], "arguments": {}}
+        else:
+            self.stats["llm"] += 1
+            plan = fallback(prompt, self.tools)
+            # 목록에 없는 툴을 고른 응답은 캐시하지 않는다
+            if not plan or not any(t["name"] == plan.get("name") for t in self.tools):
+                return plan
+        self._plans[key] = plan
+        return plan
+
+    def avoided_ratio(self) -> float:
+        """LLM을 부르지 않고 처리한 요청 비율."""
+        requests = self.stats["requests"]
+        return (requests - self.stats["llm"]) / requests if requests else 0.0